@@ -0,0 +1,6 @@
+"""
+Performance benchmarks of the tutorial models: hydraulic circuits, CPU
+transients and optimizations, with comparison to a stored baseline.
+
+Run from root folder: `python -m benchmarks` (see `python -m benchmarks --help`)
+"""
@@ -0,0 +1,52 @@
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+from .cases import CASES
+from .suite import compare, load, run_suite, save
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Run benchmark suite, and compare results to a baseline.",
+    )
+    parser.add_argument("-k", "--select", help="only run cases whose name contains SELECT")
+    parser.add_argument("-r", "--repeat", type=int, default=1, help="runs per case; best time is kept (default: 1)")
+    parser.add_argument("--no-memory", action="store_true", help="skip peak memory measurement")
+    parser.add_argument("-o", "--output", help="save results as JSON file OUTPUT")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline JSON file (default: benchmarks/baseline.json)")
+    parser.add_argument("--update-baseline", action="store_true", help="save results as baseline, instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="relative tolerance on time and memory (default: 0.25)")
+    args = parser.parse_args(argv)
+
+    results = run_suite(CASES, repeat=args.repeat, memory=not args.no_memory, select=args.select, verbose=True)
+    table = pd.DataFrame.from_dict({name: case["metrics"] for name, case in results["cases"].items()}, orient="index")
+    print(table.to_string())
+
+    if args.output:
+        save(results, args.output)
+    if args.update_baseline:
+        save(results, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline found at {args.baseline}; run with --update-baseline to create it")
+        return 0
+
+    comparison = compare(results, load(args.baseline), tolerance=args.tolerance)
+    regressions = comparison[comparison["regression"]]
+    if regressions.empty:
+        print(f"No regression w.r.t. baseline ({len(comparison)} metrics compared)")
+        return 0
+    print(f"{len(regressions)} regression(s) w.r.t. baseline:")
+    print(regressions.to_string(index=False))
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+Cost of repeated operating-point requests on `HydroCircuit`, with and
+without `cosapptuto.cache.ResultCache`.
+
+Requests are drawn at random among a grid of intake levels and pump powers,
+so that most points are requested several times. Reported: mean time per
+request and residue evaluations of the circuit solver, without cache, with
+an initially empty cache (misses warm-started from the nearest entry), and
+with the cache filled by the previous run (e.g. a later session).
+
+Run from root folder: `python -m benchmarks.cache`
+"""
+import itertools
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from cosapptuto.cache import ResultCache
+
+from .cases import HydroCircuit
+
+
+def make_circuit():
+    s = HydroCircuit("system")
+    s.piping.pipe_2.diameter = 0.5
+    return s
+
+
+def requests(n=200, seed=0):
+    levels, powers = np.linspace(5, 15, 5), np.linspace(1e5, 5e5, 5)
+    grid = list(itertools.product(levels, powers))
+    rng = np.random.default_rng(seed)
+    return [grid[i] for i in rng.integers(len(grid), size=n)]
+
+
+def run(points, cache=None):
+    s = make_circuit()
+    solver = s.piping.drivers["circuit_solver"]
+    evaluations = 0
+    start = time.perf_counter()
+    for level, power in points:
+        s.piping.res_in.level = level
+        s.piping.pump.power = power
+        if cache is None:
+            s.run_drivers()
+        elif cache.run(s) == "hit":
+            continue
+        evaluations += solver.results.fres_calls
+    elapsed = time.perf_counter() - start
+    row = {"time/request": elapsed / len(points), "evaluations": evaluations}
+    if cache is not None:
+        row.update(cache.stats)
+    return row
+
+
+if __name__ == "__main__":
+    points = requests()
+    with tempfile.TemporaryDirectory() as path:
+        rows = {
+            "no cache": run(points),
+            "empty cache": run(points, ResultCache(path)),
+            "filled cache": run(points, ResultCache(path)),
+        }
+    print(pd.DataFrame.from_dict(rows, orient="index").to_string())
@@ -0,0 +1,129 @@
+"""
+Benchmark cases of the tutorial models.
+
+Each case is a function running one model, whose keyword arguments are the
+case parameters; it returns the system that was run and a dict of
+case-specific metrics (e.g. time steps). `CASES` lists the parameter sets
+of the suite.
+"""
+import os
+import sys
+
+import numpy as np
+from cosapp.base import System
+from cosapp.drivers import NonLinearSolver, Optimizer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for folder in ("hydrocircuit", "cpu_model"):
+    path = os.path.join(ROOT, folder)
+    if path not in sys.path:
+        sys.path.append(path)
+
+from circuit import HydroCircuit  # noqa: E402
+from components.pipe import Pipe  # noqa: E402
+from components.pump import Pump  # noqa: E402
+from components.reservoir import DischargeReservoir, IntakeReservoir  # noqa: E402
+from cpu_transient import add_time_driver, make_system  # noqa: E402
+
+
+class PipeChain(System):
+    """
+    Hydraulic chain `IntakeReservoir -> Pump -> Pipe x pipes -> DischargeReservoir`,
+    solving for the `mass_flow` balancing the discharge reservoir pressure;
+    each pipe solves its friction factor with a nested solver.
+
+    Options
+    -------
+    pipes : int
+        Number of chained pipes
+    friction_model : str
+        Friction law of pipes (see `PipeFluid`); default "solver".
+    """
+
+    def setup(self, pipes=1, friction_model="solver"):
+        chain = [self.add_child(IntakeReservoir("res_in"), pulling=["density", "gravity", "atmosphere"])]
+        chain.append(self.add_child(Pump("pump"), pulling=["density", "mass_flow"]))
+        for i in range(pipes):
+            pipe = Pipe(f"pipe_{i}", friction_model=friction_model)
+            chain.append(self.add_child(pipe, pulling=["kin_viscosity", "density", "mass_flow"]))
+        chain.append(self.add_child(DischargeReservoir("res_out"), pulling=["density", "gravity", "atmosphere"]))
+
+        for upstream, downstream in zip(chain[:-1], chain[1:]):
+            self.connect(upstream.outwards, downstream.inwards, {"pressure_out": "pressure_in"})
+
+        self.add_unknown("mass_flow")
+        self.add_driver(NonLinearSolver("solver"))
+
+
+def circuit_chain(pipes=4):
+    """`PipeChain` of 100 m pipes, pumping water up 20 m."""
+    s = PipeChain("chain", pipes=pipes)
+    s.res_in.level = 10
+    s.res_out.level = 30
+    s.pump.power = 2e5
+    s.mass_flow = 100.0
+    for i in range(pipes):
+        pipe = s[f"pipe_{i}"]
+        pipe.length = 100.0
+        pipe.diameter = 0.3
+        pipe.roughness = 5e-5
+    s.run_drivers()
+    return s, {"mass_flow": s.mass_flow}
+
+
+def hydro_circuit():
+    """`HydroCircuit` with the settings of `hydrocircuit/notebook.ipynb`."""
+    s = HydroCircuit("system")
+    s.water.density = 1e3
+    s.water.kin_viscosity = 1e-6
+    s.piping.res_in.level = 10
+    s.piping.pipe_2.diameter = 0.5
+    s.run_drivers()
+    return s, {"mass_flow": s.piping.mass_flow}
+
+
+def cpu_transient(dt=0.05, horizon=150.0, stiff=False):
+    """CPU transient of `cpu_transient.py` at full load, over `horizon` seconds."""
+    s = make_system()
+    driver = add_time_driver(s, stiff=stiff)
+    driver.dt = dt
+    driver.time_interval = (0, horizon)
+    s.run_drivers()
+    if stiff:
+        metrics = {key: driver.stats[key] for key in ("steps", "rejected", "jacobians", "newton")}
+    else:
+        metrics = {"steps": round(horizon / dt)}
+    metrics["T_cpu"] = s.T_cpu
+    return s, metrics
+
+
+class Rastrigin(System):
+    """`rastrigin` function (see `tuto3/function.py`) of an array `x`, of size `dim`."""
+
+    def setup(self, dim=2):
+        self.add_inward("x", np.zeros(dim))
+        self.add_outward("f", 0.0)
+
+    def compute(self):
+        x = self.x
+        self.f = 10 * x.size + np.sum(x**2 - 10 * np.cos(np.pi * x))
+
+
+def optimisation(dim=2, method="L-BFGS-B"):
+    """Local minimization of `Rastrigin` in dimension `dim`, from a fixed starting point."""
+    s = Rastrigin("objective", dim=dim)
+    s.x = np.linspace(-2.3, 1.7, dim)
+    optim = s.add_driver(Optimizer("optim", method=method))
+    optim.add_unknown("x")
+    optim.set_minimum("f")
+    s.run_drivers()
+    return s, {"f": s.f}
+
+
+CASES = [
+    *[(circuit_chain, {"pipes": n}) for n in (1, 4, 16)],
+    (hydro_circuit, {}),
+    *[(cpu_transient, {"dt": dt, "horizon": horizon}) for dt in (0.1, 0.05) for horizon in (30.0, 60.0)],
+    *[(cpu_transient, {"dt": 0.5, "horizon": horizon, "stiff": True}) for horizon in (150.0, 600.0)],
+    *[(optimisation, {"dim": dim}) for dim in (2, 4, 8, 16)],
+]
@@ -0,0 +1,108 @@
+"""
+Compare CoSApp execution of assembled systems with their flat evaluator
+(`cosapptuto.flatten.FlatSystem`):
+
+- evaluation: one pass over the system tree (`run_once`) versus one call to
+  the flat residue (or derivative) function;
+- resolution: solving the system (`run_drivers`, with nested solvers)
+  versus a flat Newton resolution of all unknowns at once, warm-started
+  from the previous solution, over a sweep of pump power.
+
+Run from root folder: `python -m benchmarks.flatten`
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from cosapptuto.flatten import FlatSystem
+
+from .cases import HydroCircuit, PipeChain, make_system
+
+
+def best_time(func, number, repeat=3):
+    """Best time of one call to `func`, over `repeat` series of `number` calls."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    return min(times)
+
+
+def make_chain(pipes):
+    s = PipeChain("chain", pipes=pipes)
+    s.res_in.level = 10
+    s.res_out.level = 30
+    s.pump.power = 2e5
+    s.mass_flow = 100.0
+    for i in range(pipes):
+        pipe = s[f"pipe_{i}"]
+        pipe.length = 100.0
+        pipe.diameter = 0.3
+        pipe.roughness = 5e-5
+    return s, "pump.power"
+
+
+def make_circuit():
+    s = HydroCircuit("system")
+    s.piping.res_in.level = 10
+    s.piping.pipe_2.diameter = 0.5
+    return s, "piping.pump.power"
+
+
+def hydraulic(factory, powers=np.linspace(1e5, 1e6, 10)):
+    """Evaluation and resolution times of a hydraulic system."""
+    s, power = factory()
+    s.run_drivers()
+    flat = FlatSystem(s)
+    x, p = flat.x0(), flat.read_inputs()
+    row = {
+        "unknowns": len(flat.unknowns),
+        "cosapp eval": best_time(s.run_once, 100),
+        "flat eval": best_time(lambda: flat.residues(x, p), 1000),
+    }
+
+    start = time.perf_counter()
+    expected = []
+    for value in powers:
+        s[power] = value
+        s.run_drivers()
+        expected.append(flat.x0())
+    row["cosapp solve"] = (time.perf_counter() - start) / len(powers)
+
+    start = time.perf_counter()
+    solutions = []
+    for value in powers:
+        s[power] = value
+        flat.solve(flat.x, flat.read_inputs())
+        solutions.append(flat.x)
+    row["flat solve"] = (time.perf_counter() - start) / len(powers)
+    row["max rel. diff"] = np.max(np.abs(np.array(solutions) / np.array(expected) - 1))
+    return row
+
+
+def transient():
+    """Evaluation times of time derivatives of `CPUSystem`."""
+    s = make_system()
+    s.use = 1.0
+    flat = FlatSystem(s)
+    x, p = flat.x0(), flat.read_inputs()
+    return {
+        "unknowns": len(flat.unknowns),
+        "cosapp eval": best_time(s.run_once, 1000),
+        "flat eval": best_time(lambda: flat.derivatives(x, p), 10000),
+    }
+
+
+if __name__ == "__main__":
+    rows = {
+        "HydroCircuit": hydraulic(make_circuit),
+        **{f"PipeChain[pipes={n}]": hydraulic(lambda: make_chain(n)) for n in (4, 16)},
+        "CPUSystem": transient(),
+    }
+    table = pd.DataFrame.from_dict(rows, orient="index")
+    table["eval speedup"] = table["cosapp eval"] / table["flat eval"]
+    table["solve speedup"] = table["cosapp solve"] / table["flat solve"]
+    print(table.to_string())
@@ -0,0 +1,183 @@
+import contextlib
+import datetime
+import importlib.metadata
+import json
+import platform
+import re
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from cosapp.drivers import NonLinearSolver
+
+# metrics which must not grow from baseline (deterministic counts)
+COUNTS = ("compute_calls", "newton")
+# metrics compared with a relative tolerance (machine-dependent), and
+# absolute changes below which they are not regressions (timing noise)
+MEASURES = {"time": 0.05, "peak_memory": 0.1}
+
+_ITERATIONS = re.compile(r"in (\d+) iterations")
+
+
+@contextlib.contextmanager
+def solver_counter():
+    """
+    Count resolutions and Newton iterations of all `NonLinearSolver` drivers
+    (including nested ones) executed within the context, in a dict
+    `{"solves": ..., "newton": ...}`.
+    """
+    counts = {"solves": 0, "newton": 0}
+    compute = NonLinearSolver.compute
+
+    def counted(driver):
+        try:
+            compute(driver)
+        finally:
+            results = driver.results
+            if results is not None:
+                counts["solves"] += 1
+                match = _ITERATIONS.search(results.message)
+                counts["newton"] += int(match.group(1)) if match else 0
+
+    NonLinearSolver.compute = counted
+    try:
+        yield counts
+    finally:
+        NonLinearSolver.compute = compute
+
+
+def case_name(func, params):
+    """Case identifier, e.g. "circuit_chain[pipes=4]"."""
+    args = ",".join(f"{key}={value}" for key, value in params.items())
+    return f"{func.__name__}[{args}]" if args else func.__name__
+
+
+def _value(value):
+    """JSON-compatible `value`."""
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def measure(func, params, repeat=1, memory=True):
+    """
+    Run case `func(**params)` `repeat` times; returns its metrics:
+
+    - time: best wall time (s);
+    - compute_calls: calls to `compute` of all systems of the model tree;
+    - newton: Newton iterations of `NonLinearSolver` drivers, and of drivers
+      reporting their own (case metric "newton");
+    - solves: `NonLinearSolver` resolutions;
+    - peak_memory: peak memory allocated by Python during the run (MB),
+      measured by an additional run, as tracing slows execution down;
+    - case-specific metrics returned by `func`.
+    """
+    times = []
+    for _ in range(repeat):
+        with solver_counter() as counts:
+            start = time.perf_counter()
+            system, metrics = func(**params)
+            times.append(time.perf_counter() - start)
+
+    result = {
+        "time": min(times),
+        "compute_calls": sum(element.compute_calls for element in system.tree()),
+        "newton": counts["newton"] + metrics.pop("newton", 0),
+        "solves": counts["solves"],
+    }
+    if memory:
+        tracemalloc.start()
+        try:
+            func(**params)
+            result["peak_memory"] = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    result.update(metrics)
+    return {key: _value(value) for key, value in result.items()}
+
+
+def run_suite(cases, repeat=1, memory=True, select=None, verbose=False):
+    """
+    Run benchmark `cases` (list of `(func, params)`), optionally restricted to
+    those whose name contains `select`.
+
+    Returns
+    -------
+    dict
+        Results, with run `metadata` (versions, platform, date), and
+        `cases`: parameters and metrics of each case, by case name.
+    """
+    results = {
+        "metadata": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cosapp": importlib.metadata.version("cosapp"),
+            "numpy": np.__version__,
+            "repeat": repeat,
+        },
+        "cases": {},
+    }
+    for func, params in cases:
+        name = case_name(func, params)
+        if select and select not in name:
+            continue
+        metrics = measure(func, params, repeat=repeat, memory=memory)
+        results["cases"][name] = {"params": params, "metrics": metrics}
+        if verbose:
+            print(f"{name}: {metrics['time']:.3f} s", flush=True)
+    return results
+
+
+def save(results, path):
+    """Save suite `results` as JSON file `path`."""
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2)
+
+
+def load(path):
+    """Suite results saved in JSON file `path`."""
+    with open(path) as file:
+        return json.load(file)
+
+
+def compare(results, baseline, tolerance=0.25):
+    """
+    Compare suite `results` to `baseline` results, for cases found in both.
+
+    Counts (`compute_calls`, `newton`) are deterministic: any increase is a
+    regression. Wall time and peak memory are regressions when they exceed
+    the baseline by more than `tolerance` (relative), and by more than the
+    noise level of `MEASURES` (50 ms, 0.1 MB).
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per case and metric: baseline and current values, ratio, and
+        `regression` flag.
+    """
+    rows = []
+    for name, case in results["cases"].items():
+        reference = baseline["cases"].get(name)
+        if reference is None:
+            continue
+        for metric in COUNTS + tuple(MEASURES):
+            old = reference["metrics"].get(metric)
+            new = case["metrics"].get(metric)
+            if old is None or new is None:
+                continue
+            ratio = new / old if old else (1.0 if new == old else np.inf)
+            if metric in COUNTS:
+                regression = new > old
+            else:
+                regression = ratio > 1.0 + tolerance and new - old > MEASURES[metric]
+            rows.append({
+                "case": name,
+                "metric": metric,
+                "baseline": old,
+                "current": new,
+                "ratio": ratio,
+                "regression": regression,
+            })
+    return pd.DataFrame(rows, columns=["case", "metric", "baseline", "current", "ratio", "regression"])
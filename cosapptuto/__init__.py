@@ -0,0 +1 @@
+"""Study tools shared by the tutorial cases."""
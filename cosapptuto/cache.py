@@ -0,0 +1,335 @@
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import time
+from functools import lru_cache
+
+import numpy as np
+from cosapp.drivers.time.base import AbstractTimeDriver
+
+from .runner import _top_solvers
+
+# types of option values identified by value in keys; others by type only
+_SIMPLE = (bool, int, float, str, type(None))
+_SCALAR = (bool, int, float, str)
+
+
+@lru_cache(maxsize=None)
+def _class_id(cls):
+    """Class name and digest of its source code, so that keys change with model code."""
+    try:
+        source = inspect.getsource(cls)
+    except (OSError, TypeError):
+        source = ""
+    return f"{cls.__module__}.{cls.__qualname__}:{hashlib.sha256(source.encode()).hexdigest()[:16]}"
+
+
+def _option(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    return repr(value) if isinstance(value, _SIMPLE) else type(value).__qualname__
+
+
+def _update(digest, name, value):
+    """Feed variable `name` and its value into hash `digest`."""
+    digest.update(name.encode())
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, np.ndarray):
+        digest.update(f"{value.dtype}{value.shape}".encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    else:
+        digest.update(repr(value).encode())
+
+
+def _numeric(value):
+    """Flat float array of numeric `value`, or None."""
+    if isinstance(value, (bool, np.bool_)):
+        return None
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return np.array([value], dtype=float)
+    if isinstance(value, np.ndarray) and value.dtype.kind in "iuf":
+        return value.astype(float).ravel()
+    return None
+
+
+class ResultCache:
+    """
+    Persistent cache of converged runs of systems, on disk.
+
+    An entry is addressed by the hash of the system (classes, with their
+    source code, and options of all sub-systems; connections; types and
+    scalar options of drivers and their sub-drivers; bounds and steps of
+    unknowns) and of its free inputs: inputs of the system tree which are
+    neither connected nor solver unknowns, such as `piping.res_in.level` for
+    `HydroCircuit` or `use` for `cpu_steady.CPUSystem`, taken before the
+    run. It stores all other variables of the tree (outputs, connected
+    inputs and unknowns) after a converged run, so that a hit restores the
+    full solved state without running drivers.
+
+    Only steady problems are cached: systems with time drivers, whose result
+    depends on their scenario and time steps, raise `ValueError`.
+
+    On a miss, the nearest entry of the same system (smallest distance
+    between numeric free inputs, relative to their magnitude) can be used
+    as a warm start: its unknowns (including those of nested solvers) are
+    set as initial values.
+
+    Each entry is a pickle file `<key>.pkl` in directory `path`; an index
+    `index.json` holds the free inputs of entries, their size and last use.
+    When the total size exceeds `max_bytes`, least recently used entries
+    are removed. The cache is meant for one process at a time.
+
+    Parameters
+    ----------
+    path : str
+        Cache directory; created if needed.
+    max_bytes : int
+        Maximum total size of entries (default 100 MB)
+    max_distance : float
+        Maximum distance to nearest entry for warm starts in `run`; by
+        default, any entry of the same system is used.
+
+    Examples
+    --------
+    >>> cache = ResultCache("results")
+    >>> s.piping.res_in.level = 12.0
+    >>> cache.run(s)  # "hit", "warm" or "cold"
+    """
+
+    INDEX = "index.json"
+
+    def __init__(self, path, max_bytes=100 * 2**20, max_distance=np.inf):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_distance = max_distance
+        self.stats = {"hits": 0, "misses": 0, "warm_starts": 0, "evictions": 0}
+        os.makedirs(path, exist_ok=True)
+        index = os.path.join(path, self.INDEX)
+        if os.path.exists(index):
+            with open(index) as file:
+                self.index = json.load(file)
+        else:
+            self.index = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def _file(self, key):
+        return os.path.join(self.path, f"{key}.pkl")
+
+    def _save_index(self):
+        index = os.path.join(self.path, self.INDEX)
+        with open(index + ".tmp", "w") as file:
+            json.dump(self.index, file)
+        os.replace(index + ".tmp", index)
+
+    @staticmethod
+    def _describe(system):
+        """
+        Structure digest, free inputs and stored variables of `system`, and
+        names of unknowns, as `(structure, inputs, stored, unknowns)`.
+        Raises `ValueError` if `system` has time drivers.
+        """
+        elements = list(system.tree())
+        root = len(system.full_name()) + 1
+        paths = {id(element): element.full_name()[root:] for element in elements}
+
+        def key(path, port, name):
+            prefix = f"{path}." if path else ""
+            if port.name in ("inwards", "outwards", "modevars_in", "modevars_out"):
+                return f"{prefix}{name}"
+            return f"{prefix}{port.name}.{name}"
+
+        digest = hashlib.sha256()
+        connected, unknowns = set(), []
+        for element in elements:
+            path = paths[id(element)]
+            digest.update(f"|{path}:{_class_id(type(element))}".encode())
+            for name, value in sorted(element.properties.items()):
+                digest.update(f"{name}={_option(value)}".encode())
+            for top in element.drivers.values():
+                for driver in top.tree():
+                    if isinstance(driver, AbstractTimeDriver):
+                        raise ValueError(f"time driver {driver.full_name()!r} cannot be cached")
+                    # options set to None may be replaced by arrays when run: only numbers and strings are used
+                    options = ",".join(
+                        f"{name}={value!r}" for name, value in sorted(driver.options.items()) if isinstance(value, _SCALAR)
+                    )
+                    digest.update(f"{driver.name}:{type(driver).__qualname__}({options})".encode())
+            for connector in element.all_connectors():
+                sink = paths[id(connector.sink.owner)]
+                for target, origin in sorted(connector.mapping.items()):
+                    name = key(sink, connector.sink, target)
+                    connected.add(name)
+                    digest.update(f"{name}<-{key(paths[id(connector.source.owner)], connector.source, origin)}".encode())
+            prefix = f"{path}." if path else ""
+            for unknown in element._math.unknowns.values():
+                unknowns.append(f"{prefix}{unknown.name}")
+                bounds = (unknown.lower_bound, unknown.upper_bound, unknown.max_abs_step, unknown.max_rel_step)
+                digest.update(f"{unknowns[-1]}{bounds!r}".encode())
+
+        inputs, stored = [], []
+        excluded = connected.union(unknowns)
+        for element in elements:
+            path = paths[id(element)]
+            for port in element.inputs.values():
+                for name in port:
+                    variable = key(path, port, name)
+                    (stored if variable in excluded else inputs).append(variable)
+            for port in element.outputs.values():
+                stored.extend(key(path, port, name) for name in port)
+        return digest.hexdigest(), inputs, stored, unknowns
+
+    def key(self, system):
+        """Cache key of `system` in its current state of free inputs."""
+        return self._key(system)[0]
+
+    def _key(self, system):
+        structure, inputs, stored, unknowns = self._describe(system)
+        digest = hashlib.sha256(structure.encode())
+        values = {}
+        for name in inputs:
+            values[name] = value = system[name]
+            _update(digest, name, value)
+        return digest.hexdigest(), structure, values, stored, unknowns
+
+    def get(self, system):
+        """Restore state of `system` from cache if found; returns True on a hit."""
+        key = self._key(system)[0]
+        entry = self.index.get(key)
+        if entry is None or not os.path.exists(self._file(key)):
+            self.stats["misses"] += 1
+            return False
+        with open(self._file(key), "rb") as file:
+            values = pickle.load(file)
+        for name, value in values.items():
+            system[name] = value
+        entry["used"] = time.time()
+        self._save_index()
+        self.stats["hits"] += 1
+        return True
+
+    def put(self, system):
+        """Store current state of `system`, supposed converged; returns its key."""
+        return self._store(system, *self._key(system))
+
+    def _store(self, system, key, structure, inputs, stored, unknowns):
+        """Store current state of `system` under `key` and free `inputs`, as given by `_key`."""
+        with open(self._file(key), "wb") as file:
+            pickle.dump({name: system[name] for name in stored}, file, protocol=pickle.HIGHEST_PROTOCOL)
+        numeric, discrete = {}, hashlib.sha256()
+        for name, value in inputs.items():
+            array = _numeric(value)
+            if array is None:
+                _update(discrete, name, value)
+            else:
+                numeric[name] = array.tolist()
+        self.index[key] = {
+            "structure": structure,
+            "discrete": discrete.hexdigest(),
+            "inputs": numeric,
+            "bytes": os.path.getsize(self._file(key)),
+            "used": time.time(),
+        }
+        self._evict()
+        self._save_index()
+        return key
+
+    def _evict(self):
+        total = sum(entry["bytes"] for entry in self.index.values())
+        for key in sorted(self.index, key=lambda k: self.index[k]["used"]):
+            if total <= self.max_bytes or len(self.index) == 1:
+                break
+            total -= self.index.pop(key)["bytes"]
+            self.stats["evictions"] += 1
+            try:
+                os.remove(self._file(key))
+            except FileNotFoundError:
+                pass
+
+    def nearest(self, system):
+        """
+        Nearest entry to `system`, among those of the same system and
+        non-numeric inputs, as `(key, distance)`, or None. The distance is
+        the Euclidean norm of differences of numeric free inputs, relative
+        to their magnitude.
+        """
+        _, structure, inputs, _, _ = self._key(system)
+        numeric, discrete = [], hashlib.sha256()
+        for name, value in inputs.items():
+            array = _numeric(value)
+            if array is None:
+                _update(discrete, name, value)
+            else:
+                numeric.append((name, array))
+        discrete = discrete.hexdigest()
+
+        best = None
+        for key, entry in self.index.items():
+            if entry["structure"] != structure or entry["discrete"] != discrete:
+                continue
+            squares = 0.0
+            for name, array in numeric:
+                other = np.asarray(entry["inputs"][name])
+                scale = np.maximum(np.abs(array), np.abs(other))
+                diff = np.divide(array - other, scale, out=np.zeros_like(array), where=scale > 0)
+                squares += np.dot(diff, diff)
+            if best is None or squares < best[1]:
+                best = (key, squares)
+        return None if best is None else (best[0], np.sqrt(best[1]))
+
+    def warm_start(self, system, max_distance=np.inf):
+        """
+        Set unknowns of `system` from the nearest entry, if closer than
+        `max_distance`; returns its distance, or None.
+        """
+        found = self.nearest(system)
+        if found is None or found[1] > max_distance:
+            return None
+        key, distance = found
+        unknowns = self._describe(system)[3]
+        try:
+            with open(self._file(key), "rb") as file:
+                values = pickle.load(file)
+        except FileNotFoundError:
+            del self.index[key]
+            return None
+        for name in unknowns:
+            system[name] = values[name]
+        self.stats["warm_starts"] += 1
+        return distance
+
+    def run(self, system):
+        """
+        Restore `system` from cache, or run its drivers (warm-started from the
+        nearest entry) and store the result if solvers converged.
+
+        Returns
+        -------
+        str
+            "hit" (restored), "warm" (run from nearest entry) or "cold" (run
+            from current state)
+        """
+        if self.get(system):
+            return "hit"
+        # key of free inputs before the run, which may change some of them
+        described = self._key(system)
+        status = "cold" if self.warm_start(system, self.max_distance) is None else "warm"
+        system.run_drivers()
+        results = [driver.results for driver in _top_solvers(system)]
+        if all(r is not None and r.success for r in results):
+            self._store(system, *described)
+        return status
+
+    def clear(self):
+        """Remove all entries."""
+        for key in self.index:
+            try:
+                os.remove(self._file(key))
+            except FileNotFoundError:
+                pass
+        self.index = {}
+        self._save_index()
@@ -0,0 +1,464 @@
+import ast
+import builtins
+import inspect
+import textwrap
+
+import numpy as np
+from cosapp.ports.port import BasePort
+from cosapp.systems import System
+
+# ports whose variables are accessed without port name (e.g. `self.x`)
+_DEFAULT_PORTS = ("inwards", "outwards", "modevars_in", "modevars_out")
+
+
+class _Inliner(ast.NodeTransformer):
+    """
+    Rewrite the body of a `compute` method of `system` as flat code: variables
+    (`self.x`, `self.port.x`, `self.child.x`) become local variables of the
+    flat function, and other attributes of `self`, local names and module
+    globals are renamed with a prefix unique to the system.
+    """
+
+    def __init__(self, flat, system, prefix, func):
+        self.flat = flat
+        self.system = system
+        self.prefix = prefix
+        self.globals = func.__globals__
+        self.reads = set()
+        self.writes = set()
+        self.locals = set()
+
+    def inline(self, tree):
+        body = tree.body[0].body
+        for node in ast.walk(tree.body[0]):
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+                self.locals.add(node.id)
+            elif isinstance(node, (ast.Return, ast.Yield, ast.YieldFrom, ast.Global, ast.Nonlocal)):
+                raise NotImplementedError(f"Cannot inline `{type(node).__name__}` in {self._where}")
+        return self._block(body)
+
+    def _block(self, statements):
+        block = []
+        for statement in statements:
+            result = self.visit(statement)
+            block.extend(result if isinstance(result, list) else [result])
+        return block
+
+    @property
+    def _where(self):
+        return f"{type(self.system).__name__}.compute"
+
+    def visit_If(self, node):
+        """Keep only the active branch of tests depending on constants only (e.g. properties)."""
+        test = self.visit(node.test)
+        if not any(isinstance(name, ast.Name) and name.id.startswith("v_") for name in ast.walk(test)):
+            expression = ast.fix_missing_locations(ast.Expression(test))
+            try:
+                value = eval(compile(expression, "<test>", "eval"), self.flat._namespace)
+            except Exception:
+                pass
+            else:
+                return self._block(node.body if value else node.orelse)
+        node.test = test
+        node.body = self._block(node.body) or [ast.Pass()]
+        node.orelse = self._block(node.orelse)
+        return node
+
+    def visit_AugAssign(self, node):
+        target = self.visit(node.target)
+        if isinstance(target, ast.Name) and target.id.startswith("v_"):
+            self.reads.add(self.flat._names[target.id])
+        node.target = target
+        node.value = self.visit(node.value)
+        return node
+
+    def visit_Attribute(self, node):
+        chain, base = [], node
+        while isinstance(base, ast.Attribute):
+            chain.insert(0, base.attr)
+            base = base.value
+        if not (isinstance(base, ast.Name) and base.id == "self"):
+            return self.generic_visit(node)
+
+        resolved = self.flat._resolve(self.system, chain)
+        store = isinstance(node.ctx, ast.Store)
+        if resolved is not None:
+            key, used = resolved
+            whole = used == len(chain)
+            (self.writes if store and whole else self.reads).add(key)
+            new = ast.Name(self.flat._var(key), ast.Store() if store and whole else ast.Load())
+        elif store:
+            raise NotImplementedError(f"Cannot assign attribute `self.{'.'.join(chain)}` in {self._where}")
+        else:
+            # property, method or constant attribute: bound at compile time
+            name = chain[0]
+            used = 1
+            new = ast.Name(self.flat._constant(getattr(self.system, name), f"{self.prefix}_{name}"), ast.Load())
+        for attr in chain[used:]:
+            new = ast.Attribute(new, attr, ast.Load())
+        new.ctx = node.ctx
+        return ast.copy_location(new, node)
+
+    def visit_Name(self, node):
+        if node.id == "self":
+            raise NotImplementedError(f"Cannot inline use of `self` in {self._where}")
+        if node.id in self.locals:
+            node.id = f"{self.prefix}_{node.id}"
+        elif node.id in self.globals:
+            node.id = self.flat._constant(self.globals[node.id], f"{self.prefix}_{node.id}")
+        elif node.id == "super" or not hasattr(builtins, node.id):
+            raise NotImplementedError(f"Cannot inline name `{node.id}` in {self._where}")
+        return node
+
+
+class _ExpressionResolver(ast.NodeTransformer):
+    """Rewrite an expression of context `system` (equation, derivative), resolving variables."""
+
+    def __init__(self, flat, system):
+        self.flat = flat
+        self.system = system
+        self.reads = set()
+
+    def _chain(self, node):
+        chain = []
+        while isinstance(node, ast.Attribute):
+            chain.insert(0, node.attr)
+            node = node.value
+        return (chain, node) if isinstance(node, ast.Name) else (None, node)
+
+    def visit_Attribute(self, node):
+        chain, base = self._chain(node)
+        if chain is not None:
+            resolved = self.flat._resolve(self.system, [base.id] + chain)
+            if resolved is not None and resolved[1] == len(chain) + 1:
+                self.reads.add(resolved[0])
+                return ast.copy_location(ast.Name(self.flat._var(resolved[0]), ast.Load()), node)
+        return self.generic_visit(node)
+
+    def visit_Name(self, node):
+        resolved = self.flat._resolve(self.system, [node.id])
+        if resolved is not None:
+            self.reads.add(resolved[0])
+            return ast.copy_location(ast.Name(self.flat._var(resolved[0]), ast.Load()), node)
+        if hasattr(np, node.id):
+            return ast.copy_location(ast.Name(self.flat._constant(getattr(np, node.id), f"np_{node.id}"), ast.Load()), node)
+        if not hasattr(builtins, node.id):
+            raise NameError(f"Unknown name {node.id!r} in expression of {self.system.full_name()}")
+        return node
+
+    def resolve(self, expression):
+        return ast.unparse(self.visit(ast.parse(expression.strip(), mode="eval")).body)
+
+
+class FlatSystem:
+    """
+    Flat residual function of an assembled system (e.g. `HydroCircuit`,
+    `CPUSystem`), generated as Python source code from the `compute` methods
+    of its sub-systems.
+
+    Connections and pulled variables are resolved once: connected variables
+    share a single local variable, so that no port transfer happens at run
+    time. The `compute` bodies are inlined in execution order, with `self.x`
+    replaced by local variables; other attributes (properties, methods) and
+    module globals are bound at compile time.
+
+    Unknowns are those declared (`add_unknown`) anywhere in the system tree,
+    including those solved by nested solvers (such as pipe `f_guess`), so
+    that the whole tree is solved at once. Variables read before being
+    computed, in execution order, close algebraic loops: their values are
+    torn into additional unknowns, with residues `computed - guess`.
+    Residues are those of declared equations, normalized as in CoSApp by
+    their reference value, followed by tear residues.
+
+    Free inputs (inwards which are neither connected, computed nor unknown)
+    are passed as a list `p`, read from the system by `read_inputs()`; they
+    include transient states, whose time derivatives are given by
+    `derivatives(x, p)`, for time integrators.
+
+    Only scalar unknowns and unit-preserving connections are supported, and
+    `compute` methods must not `return` or use `self` other than by
+    attribute access.
+
+    Parameters
+    ----------
+    system : System
+        Assembled system to compile
+
+    Attributes
+    ----------
+    unknowns : list[str]
+        Names of unknowns (declared unknowns, then torn variables)
+    inputs : list[str]
+        Names of free inputs, in the order of `p`
+    states : list[str]
+        Names of transient states, in the order of `derivatives`
+    source : str
+        Generated code
+
+    Examples
+    --------
+    >>> flat = FlatSystem(s)
+    >>> iterations = flat.solve()
+    >>> flat.apply()
+    """
+
+    def __init__(self, system):
+        self.system = system
+        self._root = system.full_name()
+        self._parent = {}
+        self._names = {}
+        self._namespace = {"_array": np.array, "_float_list": lambda x: np.asarray(x, dtype=float).tolist()}
+        self.x = None
+        self._collect_connections()
+        self._generate()
+
+    def _path(self, system):
+        name = system.full_name()
+        return "" if name == self._root else name[len(self._root) + 1:]
+
+    def _port_key(self, port, name):
+        path = self._path(port.owner)
+        local = name if port.name in _DEFAULT_PORTS else f"{port.name}.{name}"
+        return f"{path}.{local}" if path else local
+
+    def _find(self, key):
+        while key in self._parent:
+            key = self._parent[key]
+        return key
+
+    def _collect_connections(self):
+        for system in self.system.tree():
+            for connector in system.all_connectors():
+                conversions = getattr(connector._wrapped, "_unit_conversions", {})
+                if any(conversion != (1.0, 0.0) for conversion in conversions.values()):
+                    raise NotImplementedError(f"Connector {connector.name!r} of {system.full_name()} converts units")
+                for sink, source in connector.mapping.items():
+                    sink_root = self._find(self._port_key(connector.sink, sink))
+                    source_root = self._find(self._port_key(connector.source, source))
+                    if sink_root != source_root:
+                        self._parent[sink_root] = source_root
+
+    def _variable_key(self, system, name):
+        reference = system.name2variable.get(name)
+        if reference is None or not isinstance(reference.mapping, BasePort) or reference.key not in reference.mapping:
+            return None
+        return self._find(self._port_key(reference.mapping, reference.key))
+
+    def _resolve(self, system, chain):
+        """Canonical key of variable designated by attribute `chain` in `system`, and length of chain used."""
+        i = 0
+        while i < len(chain):
+            if i + 1 < len(chain):
+                key = self._variable_key(system, f"{chain[i]}.{chain[i + 1]}")
+                if key is not None:
+                    return key, i + 2
+            key = self._variable_key(system, chain[i])
+            if key is not None:
+                return key, i + 1
+            if chain[i] not in system.children:
+                return None
+            system = system.children[chain[i]]
+            i += 1
+        return None
+
+    def _var(self, key):
+        name = "v_" + key.replace(".", "__")
+        self._names[name] = key
+        return name
+
+    def _constant(self, value, name):
+        name = name.replace(".", "_")
+        if name in self._namespace and self._namespace[name] is not value:
+            name = f"{name}_{len(self._namespace)}"
+        self._namespace[name] = value
+        return name
+
+    def _generate(self):
+        # inline computes in execution order (children before parent)
+        blocks, reads, writes, torn = [], set(), set(), []
+
+        def walk(system):
+            for child in system.exec_order:
+                walk(system.children[child])
+            cls = type(system)
+            if cls.compute_before is not System.compute_before:
+                raise NotImplementedError(f"Cannot inline {cls.__name__}.compute_before")
+            if cls.compute is System.compute:
+                return
+            func = cls.compute
+            tree = ast.parse(textwrap.dedent(inspect.getsource(func)))
+            inliner = _Inliner(self, system, f"c{len(blocks)}", func)
+            body = inliner.inline(tree)
+            if not body:
+                return
+            for key in inliner.reads - writes - inliner.writes:
+                if key not in torn:
+                    torn.append(key)  # may be computed later: checked below
+            reads.update(inliner.reads)
+            writes.update(inliner.writes)
+            name = self._path(system) or system.name
+            blocks.append(f"# {name} ({cls.__name__})\n" + "\n".join(ast.unparse(node) for node in body))
+
+        walk(self.system)
+        torn = [key for key in torn if key in writes]
+
+        # declared unknowns and equations of the whole tree
+        unknowns, residues = [], []
+        for system in self.system.tree():
+            problem = system._math
+            for unknown in problem.unknowns.values():
+                key = self._variable_key(unknown.context, unknown.name)
+                if key is None or not np.isscalar(self.system[key]):
+                    raise NotImplementedError(f"Unknown {unknown.name!r} of {system.full_name()} is not a scalar variable")
+                if key in writes:
+                    raise ValueError(f"Unknown {unknown.name!r} of {system.full_name()} is computed")
+                if key not in unknowns:
+                    unknowns.append(key)
+            for residue in problem.residues.values():
+                resolver = _ExpressionResolver(self, residue.context)
+                lhs, rhs = residue.equation.split("==")
+                reference = float(np.max(np.abs(residue.reference)))
+                residues.append(f"({resolver.resolve(lhs)} - ({resolver.resolve(rhs)})) / {reference!r}")
+                reads.update(resolver.reads)
+
+        # transient states and their derivatives
+        states, derivatives = [], []
+        for system in self.system.tree():
+            for name, transient in getattr(system, "transients", {}).items():
+                key = self._variable_key(system, name)
+                if key is None or key in states:
+                    continue
+                resolver = _ExpressionResolver(self, transient.context)
+                states.append(key)
+                derivatives.append(resolver.resolve(str(transient.der)))
+                reads.update(resolver.reads)
+
+        for key in torn:
+            scale = max(abs(float(self.system[key])), 1.0)
+            residues.append(f"({self._var(key)} - t_{len(residues)}) / {scale!r}")
+        torn_names = [f"t_{len(residues) - len(torn) + i}" for i in range(len(torn))]
+
+        self.unknowns = unknowns + torn
+        self.inputs = sorted(key for key in reads | set(states) if key not in writes and key not in unknowns)
+        self.states = states
+        self.torn = torn
+        self.residue_count = len(residues)
+        self.variables = sorted(set(self.inputs) | set(unknowns) | writes)
+
+        def tuple_of(names):
+            return "(" + "".join(f"{name}, " for name in names) + ")"
+
+        header = []
+        if self.inputs:
+            header.append(f"{tuple_of(self._var(key) for key in self.inputs)} = p")
+        if self.unknowns:
+            header.append(f"{tuple_of([self._var(key) for key in unknowns] + torn_names)} = _float_list(x)")
+        header += [f"{self._var(key)} = {name}" for key, name in zip(torn, torn_names)]
+        body = "\n".join(header + blocks)
+
+        functions = {
+            "_residues": f"_array([{', '.join(residues)}])",
+            "_derivatives": f"_array([{', '.join(derivatives)}])",
+            "_values": tuple_of(self._var(key) for key in self.variables),
+        }
+        self.source = "\n\n".join(
+            f"def {name}(x, p):\n{textwrap.indent(body, '    ')}\n    return {result}\n" for name, result in functions.items()
+        )
+        exec(compile(self.source, f"<flat {self.system.name}>", "exec"), self._namespace)
+        self._residues = self._namespace["_residues"]
+        self._derivatives = self._namespace["_derivatives"]
+        self._values = self._namespace["_values"]
+
+    def read_inputs(self):
+        """Current values of free inputs in the system, as list `p`."""
+        return [self.system[key] for key in self.inputs]
+
+    def x0(self):
+        """Current values of unknowns in the system."""
+        return np.array([float(self.system[key]) for key in self.unknowns])
+
+    def residues(self, x, p=None):
+        """Residues at unknowns `x` and inputs `p` (current system inputs by default)."""
+        return self._residues(x, self.read_inputs() if p is None else p)
+
+    def derivatives(self, x, p=None):
+        """Time derivatives of `states` at unknowns `x` and inputs `p`."""
+        return self._derivatives(x, self.read_inputs() if p is None else p)
+
+    def evaluate(self, x, p=None):
+        """Values of all variables (including connected aliases), as a dict."""
+        values = dict(zip(self.variables, self._values(x, self.read_inputs() if p is None else p)))
+        for key in self._parent:
+            root = self._find(key)
+            if root in values:
+                values[key] = values[root]
+        return values
+
+    def solve(self, x=None, p=None, tol=1e-10, xtol=1e-13, max_iter=50, eps=1e-7):
+        """
+        Solve residues for unknowns by Newton's method, with a finite-difference
+        Jacobian (one evaluation per unknown); steps leading to non-finite
+        residues are halved.
+
+        Parameters
+        ----------
+        x : array_like, optional
+            Initial unknowns; defaults to the current values in the system
+        p : list, optional
+            Inputs; defaults to the current values in the system
+        tol : float
+            Convergence tolerance on the maximum absolute residue
+        xtol : float
+            Convergence tolerance on Newton steps, relative to unknowns, for
+            residues which cannot reach `tol` due to round-off errors
+        max_iter : int
+            Maximum number of iterations
+        eps : float
+            Relative finite-difference step
+
+        Returns
+        -------
+        int
+            Number of iterations; the solution is stored in `x`
+        """
+        x = self.x0() if x is None else np.array(x, dtype=float)
+        p = self.read_inputs() if p is None else p
+        r = self._residues(x, p)
+        norm = np.max(np.abs(r), initial=0.0)
+        if not np.isfinite(norm):
+            raise RuntimeError("Flat solver: non-finite initial residues")
+        iteration = 0
+        converged = norm <= tol
+        while not converged:
+            if iteration == max_iter:
+                raise RuntimeError(f"Flat solver did not converge in {max_iter} iterations (residue {norm:.3e})")
+            iteration += 1
+            h = eps * np.maximum(np.abs(x), 1.0)
+            jac = np.empty((len(r), len(x)))
+            for j in range(len(x)):
+                xj = x.copy()
+                xj[j] += h[j]
+                jac[:, j] = (self._residues(xj, p) - r) / h[j]
+            step = np.linalg.solve(jac, -r)
+            for _ in range(20):
+                x_new = x + step
+                with np.errstate(all="ignore"):
+                    r_new = self._residues(x_new, p)
+                norm_new = np.max(np.abs(r_new))
+                if np.isfinite(norm_new):
+                    break
+                step *= 0.5
+            else:
+                raise RuntimeError(f"Flat solver: non-finite residues at iteration {iteration}")
+            converged = norm_new <= tol or np.all(np.abs(x_new - x) <= xtol * np.abs(x))
+            x, r, norm = x_new, r_new, norm_new
+        self.x = x
+        return iteration
+
+    def apply(self, x=None, p=None):
+        """Write unknowns `x` (last solution by default) and computed values into the system."""
+        x = self.x if x is None else x
+        inputs = set(self.inputs)
+        for key, value in self.evaluate(x, p).items():
+            if self._find(key) not in inputs:
+                self.system[key] = value
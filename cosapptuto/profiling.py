@@ -0,0 +1,250 @@
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from cosapp.drivers import NonLinearSolver
+from cosapp.drivers.driver import Driver
+from cosapp.systems import System
+
+
+def _subclasses(cls):
+    yield cls
+    for sub in cls.__subclasses__():
+        yield from _subclasses(sub)
+
+
+def _frame_name(element):
+    """Profile name of system or driver `element`, e.g. "sys.cpu", "sys:RungeKutta.NLsolver"."""
+    if isinstance(element, Driver):
+        owner = element.owner
+        return f"{owner.full_name() if owner is not None else ''}:{element.full_name()}"
+    return element.full_name()
+
+
+class Profiler:
+    """
+    Opt-in instrumentation of CoSApp runs: time spent in each system and
+    driver, and convergence of non-linear solvers.
+
+    Within the `with` block, execution methods of all `System` and `Driver`
+    classes (`run_once`, `run_children_drivers`) are wrapped to time each
+    call; they are restored on exit. Nothing is installed outside the block,
+    so runs without profiling are unaffected.
+
+    For each system and driver (by full name), it records:
+
+    - calls, cumulative time (including nested systems and drivers) and self
+      time (excluding them): a system's self time is essentially its
+      `compute`, a solver's self time its own algebra;
+    - for `NonLinearSolver` drivers: resolutions, Newton iterations,
+      Jacobian rebuilds (Jacobian evaluators must reset their statistics
+      in `setup`, as CoSApp's do), and residual history (infinity norm of residues at
+      each iteration of the last `max_history` resolutions);
+    - for drivers counting their own Jacobian evaluations in
+      `stats["jacobians"]` (as `Rosenbrock`): Jacobian rebuilds.
+
+    With `events=True`, calls are also kept as a timeline (up to
+    `max_events` calls), which can be saved as a Chrome trace
+    (`save_chrome_trace`, for chrome://tracing or https://ui.perfetto.dev)
+    or a speedscope profile (`save_speedscope`, for https://speedscope.app).
+
+    Parameters
+    ----------
+    events : bool
+        Record the call timeline, for trace export (default False)
+    max_events : int
+        Maximum number of timeline events; later events are dropped
+    max_history : int
+        Number of resolutions whose residual history is kept, per solver
+
+    Examples
+    --------
+    >>> with Profiler(events=True) as profiler:
+    ...     s.run_drivers()
+    >>> profiler.summary().head(10)
+    >>> profiler.save_speedscope("profile.json")
+    """
+
+    def __init__(self, events=False, max_events=1_000_000, max_history=100):
+        self.events = events
+        self.max_events = max_events
+        self.max_history = max_history
+        self.stats = {}
+        self.timeline = []
+        self.frames = {}
+        self.dropped = 0
+        self._stack = []
+        self._patches = []
+        self._start = None
+
+    def _record(self, name, kind):
+        record = self.stats.get(name)
+        if record is None:
+            record = self.stats[name] = {"kind": kind, "calls": 0, "total": 0.0, "self": 0.0}
+            if kind == "driver":
+                record["jacobians"] = 0
+        return record
+
+    def _begin(self, name, t):
+        """Record begin event of `name` if below `max_events`; returns its frame index, or None."""
+        if len(self.timeline) >= self.max_events:
+            self.dropped += 1
+            return None
+        frame = self.frames.setdefault(name, len(self.frames))
+        self.timeline.append(("B", frame, t))
+        return frame
+
+    def _wrap(self, method, kind):
+        profiler = self
+
+        def wrapper(element, *args, **kwargs):
+            stack = profiler._stack
+            if stack and stack[-1][0] is element:  # call to base class method
+                return method(element, *args, **kwargs)
+            name = _frame_name(element)
+            record = profiler._record(name, kind)
+            stats = getattr(element, "stats", None) if kind == "driver" else None
+            jacobians = stats.get("jacobians", 0) if isinstance(stats, dict) else None
+            start = time.perf_counter()
+            stack.append([element, 0.0])
+            frame = profiler._begin(name, start) if profiler.events else None
+            try:
+                return method(element, *args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                _, nested = stack.pop()
+                elapsed = end - start
+                record["calls"] += 1
+                record["total"] += elapsed
+                record["self"] += elapsed - nested
+                if stack:
+                    stack[-1][1] += elapsed
+                if jacobians is not None:  # statistics may be reset by the run
+                    new = element.stats.get("jacobians", 0)
+                    record["jacobians"] += new if element.stats is not stats else new - jacobians
+                if frame is not None:  # end events are kept for all recorded begin events
+                    profiler.timeline.append(("E", frame, end))
+
+        return wrapper
+
+    def _wrap_resolution(self, method):
+        profiler = self
+
+        def resolution_method(solver, fresidues, x0, *args, callback=None, **kwargs):
+            residuals = []
+
+            def track(x, r):
+                residuals.append(float(np.linalg.norm(r, np.inf)) if np.size(r) else 0.0)
+                if callback is not None:
+                    callback(x, r)
+
+            results = method(solver, fresidues, x0, *args, callback=track, **kwargs)
+            record = profiler._record(_frame_name(solver), "driver")
+            record["solves"] = record.get("solves", 0) + 1
+            record["iterations"] = record.get("iterations", 0) + max(len(residuals) - 1, 0)
+            # Jacobian evaluators (CoSApp's and `AnalyticJacobian`) reset their statistics
+            # in `setup`, at each resolution: `jac_calls` counts this resolution only
+            record["jacobians"] += getattr(results, "jac_calls", 0)
+            history = record.setdefault("residuals", [])
+            history.append(residuals)
+            del history[: -profiler.max_history]
+            return results
+
+        return resolution_method
+
+    def _patch(self, cls, attribute, wrapper):
+        self._patches.append((cls, attribute, cls.__dict__[attribute]))
+        setattr(cls, attribute, wrapper)
+
+    def __enter__(self):
+        if self._patches:
+            raise RuntimeError("Profiler is already active")
+        for base, kind, methods in [
+            (System, "system", ("run_once", "run_children_drivers")),
+            (Driver, "driver", ("run_once",)),
+        ]:
+            for cls in _subclasses(base):
+                for attribute in methods:
+                    if attribute in cls.__dict__:
+                        self._patch(cls, attribute, self._wrap(cls.__dict__[attribute], kind))
+            if "run_once" not in base.__dict__:  # inherited from `Module`
+                self._patches.append((base, "run_once", None))
+                base.run_once = self._wrap(getattr(base, "run_once"), kind)
+        self._patch(NonLinearSolver, "resolution_method", self._wrap_resolution(NonLinearSolver.resolution_method))
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        for cls, attribute, original in reversed(self._patches):
+            if original is None:
+                delattr(cls, attribute)
+            else:
+                setattr(cls, attribute, original)
+        self._patches.clear()
+        self._stack.clear()
+        return False
+
+    def summary(self):
+        """
+        Statistics by system and driver, sorted by decreasing self time.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Columns: kind ("system" or "driver"), calls, total and self time
+            (s), and for drivers, solves, Newton iterations and Jacobian
+            rebuilds, when relevant.
+        """
+        columns = ["kind", "calls", "total", "self", "solves", "iterations", "jacobians"]
+        table = pd.DataFrame.from_dict(self.stats, orient="index").reindex(columns=columns)
+        return table.sort_values("self", ascending=False)
+
+    def residuals(self, name):
+        """Residual histories of the last resolutions of solver `name` (list of lists)."""
+        return self.stats[name].get("residuals", [])
+
+    def _origin(self):
+        return self.timeline[0][2] if self.timeline else self._start
+
+    def chrome_trace(self):
+        """Timeline in Chrome trace event format (dict), with times in microseconds."""
+        if not self.events:
+            raise RuntimeError("No timeline recorded; use `Profiler(events=True)`")
+        names = list(self.frames)
+        origin = self._origin()
+        events = [
+            {"name": names[frame], "cat": self.stats[names[frame]]["kind"], "ph": phase, "ts": (t - origin) * 1e6, "pid": 0, "tid": 0}
+            for phase, frame, t in self.timeline
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"dropped_events": self.dropped}}
+
+    def speedscope(self, name="cosapp"):
+        """Timeline in speedscope file format (dict), as an evented profile in seconds."""
+        if not self.events:
+            raise RuntimeError("No timeline recorded; use `Profiler(events=True)`")
+        origin = self._origin()
+        events = [{"type": "O" if phase == "B" else "C", "frame": frame, "at": t - origin} for phase, frame, t in self.timeline]
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": [{"name": frame} for frame in self.frames]},
+            "profiles": [{
+                "type": "evented",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0.0,
+                "endValue": events[-1]["at"] if events else 0.0,
+                "events": events,
+            }],
+            "exporter": "cosapptuto.profiling",
+        }
+
+    def save_chrome_trace(self, path):
+        """Save timeline as Chrome trace JSON file `path`."""
+        with open(path, "w") as file:
+            json.dump(self.chrome_trace(), file)
+
+    def save_speedscope(self, path):
+        """Save timeline as speedscope JSON file `path`."""
+        with open(path, "w") as file:
+            json.dump(self.speedscope(), file)
@@ -0,0 +1,214 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+from cosapp.drivers import NonLinearSolver
+
+# per-worker state, set by `_init_worker`
+_factory = None
+_system = None
+_started = None
+
+
+def _init_worker(factory, started=None):
+    global _factory, _system, _started
+    _factory = factory
+    _started = started
+    _system = factory()
+
+
+def _top_solvers(system):
+    """`NonLinearSolver` drivers executed by `system.run_drivers()`."""
+    drivers = [d for d in system.drivers.values() if isinstance(d, NonLinearSolver)]
+    if drivers or system.drivers:
+        return drivers
+    return [d for child in system.children.values() for d in _top_solvers(child)]
+
+
+def _run_case(overrides, outputs):
+    for name, value in overrides.items():
+        _system[name] = value
+    _system.run_drivers()
+    results = [driver.results for driver in _top_solvers(_system)]
+    converged = all(r is not None and r.success for r in results)
+    return converged, {name: _system[name] for name in outputs}
+
+
+def _run_chunk(chunk, outputs, retries, number=None):
+    """
+    Run cases `chunk` on worker system; failed cases are retried on a fresh system.
+    Chunk `number`, if given, is flagged as started in shared array `_started`.
+    """
+    global _system
+    if number is not None:
+        _started[number] = 1
+    rows = []
+    for index, overrides in chunk:
+        start = time.perf_counter()
+        for attempt in range(1, retries + 2):
+            if attempt > 1:
+                _system = _factory()
+            try:
+                converged, values = _run_case(overrides, outputs)
+                error = ""
+            except Exception as exc:
+                converged, values, error = False, {}, repr(exc)
+            if converged:
+                break
+        rows.append({
+            "case": index,
+            **overrides,
+            **{name: values.get(name) for name in outputs},
+            "converged": converged,
+            "attempts": attempt,
+            "error": error,
+            "time": time.perf_counter() - start,
+            "worker": os.getpid(),
+        })
+    return rows
+
+
+class ScenarioRunner:
+    """
+    Parallel runner of independent cases on a model, over a process pool.
+
+    Each worker process builds the model once with `factory`, then runs its
+    share of cases by setting input overrides and calling `run_drivers()`.
+    Cases are sent to workers by chunks, to amortize inter-process traffic.
+
+    A case that raises, or whose solvers do not converge, is run again on a
+    freshly built system (up to `retries` times). If a worker process dies,
+    chunks which had not started are resubmitted to a new pool, while cases
+    of chunks running at the time are rerun one by one in a single-worker
+    pool, so that a crashing case is reported without stopping the study.
+
+    Parameters
+    ----------
+    factory : callable
+        Picklable function with no argument returning the model, e.g. a
+        module-level function (not a lambda).
+    outputs : list[str]
+        Variables collected for each case.
+    max_workers : int, optional
+        Number of worker processes; defaults to the number of CPUs.
+    chunksize : int, optional
+        Number of cases per task; by default, cases are split in about
+        four chunks per worker.
+    retries : int
+        Number of additional attempts for failed or crashed cases.
+
+    Examples
+    --------
+    >>> def make_circuit():
+    ...     return HydroCircuit("system")
+    >>> runner = ScenarioRunner(make_circuit, outputs=["piping.mass_flow"])
+    >>> cases = pd.DataFrame({"piping.res_in.level": np.linspace(1, 20, 1000)})
+    >>> df = runner.run(cases, path="results.csv")
+    """
+
+    def __init__(self, factory, outputs, max_workers=None, chunksize=None, retries=1):
+        self.factory = factory
+        self.outputs = list(outputs)
+        self.max_workers = max_workers or os.cpu_count()
+        self.chunksize = chunksize
+        self.retries = retries
+
+    def run(self, cases, path=None):
+        """
+        Run all cases.
+
+        Parameters
+        ----------
+        cases : pandas.DataFrame or list[dict]
+            Input overrides of each case, with variable names as columns/keys.
+        path : str, optional
+            CSV file to which results are appended as they come in.
+
+        Returns
+        -------
+        pandas.DataFrame
+            One row per case (in case order), with overrides, outputs,
+            convergence status, number of attempts, error message,
+            run time and worker process id.
+        """
+        if isinstance(cases, pd.DataFrame):
+            cases = cases.to_dict("records")
+        indexed = list(enumerate(cases))
+        chunksize = self.chunksize or max(1, len(indexed) // (4 * self.max_workers))
+        chunks = [indexed[i:i + chunksize] for i in range(0, len(indexed), chunksize)]
+
+        # all rows have the same columns, so that CSV appends stay aligned
+        inputs = list(dict.fromkeys(name for case in cases for name in case))
+        columns = ["case", *inputs, *self.outputs, "converged", "attempts", "error", "time", "worker"]
+        results = []
+        header = True
+
+        def collect(rows):
+            nonlocal header
+            rows = [{column: row.get(column) for column in columns} for row in rows]
+            results.extend(rows)
+            if path is not None and rows:
+                pd.DataFrame(rows, columns=columns).to_csv(
+                    path, mode="w" if header else "a", header=header, index=False, columns=columns
+                )
+                header = False
+
+        def pool(max_workers, started=None):
+            return ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=(self.factory, started))
+
+        # cases of chunks running when a worker crashed
+        suspects = []
+
+        # when a worker dies, the pool breaks and all its pending chunks are lost:
+        # chunks which had not started are resubmitted to a new pool
+        started = multiprocessing.Array("b", len(chunks), lock=False)
+        pending = list(range(len(chunks)))
+        while pending:
+            lost = []
+            with pool(self.max_workers, started) as executor:
+                futures = {executor.submit(_run_chunk, chunks[k], self.outputs, self.retries, k): k for k in pending}
+                for future in as_completed(futures):
+                    try:
+                        collect(future.result())
+                    except BrokenProcessPool:
+                        lost.append(futures[future])
+            running = [k for k in lost if started[k]]
+            if not running:  # crash outside of chunks (e.g. in `factory`)
+                running = lost
+            for k in running:
+                suspects.extend(chunks[k])
+            pending = [k for k in lost if k not in running]
+
+        # rerun suspect cases one by one, in a single-worker pool replaced after each crash
+        executor = None
+        try:
+            for case in sorted(suspects):
+                for attempt in range(1, self.retries + 2):
+                    if executor is None:
+                        executor = pool(1)
+                    try:
+                        collect(executor.submit(_run_chunk, [case], self.outputs, self.retries).result())
+                        break
+                    except BrokenProcessPool:
+                        executor.shutdown()
+                        executor = None
+                else:
+                    index, overrides = case
+                    collect([{
+                        "case": index,
+                        **overrides,
+                        **{name: None for name in self.outputs},
+                        "converged": False,
+                        "attempts": attempt,
+                        "error": "worker crashed",
+                        "time": None,
+                        "worker": None,
+                    }])
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        return pd.DataFrame(results, columns=columns).sort_values("case").set_index("case")
@@ -0,0 +1,105 @@
+"""
+Hour-long duty-cycle trace of the CPU with the three-level fan law of
+`Control`, comparing explicit `RungeKutta` with a small fixed step to the
+adaptive `Rosenbrock` driver with larger output steps. Load changes and fan
+switches are events, located by root finding: between events, `Rosenbrock`
+steps grow with the time scales of the system, so that step counts follow
+the number of events rather than the duration. Event times are found by
+interpolation within output steps `dt`, whose size therefore bounds the
+accuracy of event location.
+
+Errors are given with respect to a `Rosenbrock` run with tight tolerances.
+The whole comparison takes several minutes, mostly spent in `RungeKutta`.
+
+Run from `cpu_model` folder: `python benchmark_events.py`
+"""
+import time
+
+import numpy as np
+import pandas as pd
+from cosapp.base import System
+from cosapp.drivers import NonLinearSolver, RungeKutta
+from cosapp.recorders import DataFrameRecorder
+
+from cpu_transient import make_system
+from rosenbrock import Rosenbrock
+
+DURATION = 3600
+
+
+class DutyCycle(System):
+    """Periodic CPU usage: `high` over the first `ratio` of each `period`, `low` otherwise."""
+
+    def setup(self):
+        self.add_inward("period", 600.0, unit="s", desc="Cycle period")
+        self.add_inward("ratio", 0.5, desc="Fraction of period at high usage")
+        self.add_inward("high", 1.0, desc="High usage")
+        self.add_inward("low", 0.3, desc="Low usage")
+
+        self.add_outward_modevar("use", init="high", desc="CPU usage")
+
+        # positive when `t % period < ratio * period`
+        phase = "cos(2 * pi * (t / period - ratio / 2)) - cos(pi * ratio)"
+        self.add_event("busy", trigger=f"{phase} > 0")
+        self.add_event("idle", trigger=f"{phase} < 0")
+
+    def transition(self):
+        if self.busy.present:
+            self.use = self.high
+        if self.idle.present:
+            self.use = self.low
+
+
+class LoadedCPU(System):
+    """`CPUSystem` with "steps" fan law, driven by a `DutyCycle`."""
+
+    def setup(self):
+        self.add_child(DutyCycle("workload"))
+        self.add_child(make_system("cpu", law="steps"))
+        self.connect(self.workload.modevars_out, self.cpu.inwards, ["use"])
+
+
+def simulate(stiff=False, **settings):
+    """Run trace; returns recorded data, event times and run statistics."""
+    system = LoadedCPU("system")
+    if stiff:
+        driver = system.add_driver(Rosenbrock("Rosenbrock", rtol=1e-5, atol=1e-4, dt=0.5))
+    else:
+        driver = system.add_driver(RungeKutta("RungeKutta", dt=0.05))
+    driver.add_child(NonLinearSolver("NLsolver"))
+    driver.time_interval = (0, DURATION)
+    driver.set_scenario(init={"cpu.T_cpu": 20.0})
+    for name, value in settings.items():
+        setattr(driver, name, value)
+    rec = driver.add_recorder(DataFrameRecorder(includes=["cpu.T_cpu", "cpu.hsink.T_metal"]), period=10)
+
+    start = time.perf_counter()
+    system.run_drivers()
+    elapsed = time.perf_counter() - start
+
+    steps = driver.stats["steps"] if stiff else round(DURATION / driver.dt)
+    events = np.array([record.time for record in driver.recorded_events])
+    stats = {"events": len(events), "steps": steps, "compute_calls": system.cpu.cpu.compute_calls, "time": elapsed}
+    return rec.export_data(), events, stats
+
+
+if __name__ == "__main__":
+    reference, ref_events, _ = simulate(stiff=True, rtol=1e-6, atol=1e-5)
+
+    cases = {
+        "RungeKutta dt=0.05": dict(),
+        "Rosenbrock dt=0.5": dict(stiff=True),
+        "Rosenbrock dt=5": dict(stiff=True, dt=5.0),
+        "Rosenbrock dt=5 rtol=1e-4": dict(stiff=True, dt=5.0, rtol=1e-4, atol=1e-3),
+    }
+    rows = {}
+    for name, settings in cases.items():
+        data, events, stats = simulate(**settings)
+        stats["max_T_error"] = max(
+            np.max(np.abs(data[var].to_numpy() - reference[var].to_numpy())) for var in ["cpu.T_cpu", "cpu.hsink.T_metal"]
+        )
+        n = min(len(events), len(ref_events))
+        stats["max_event_time_error"] = np.max(np.abs(events[:n] - ref_events[:n]))
+        rows[name] = stats
+
+    print(pd.DataFrame.from_dict(rows, orient="index").to_string())
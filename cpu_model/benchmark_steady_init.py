@@ -0,0 +1,61 @@
+"""
+Response of the CPU to a load step from 60 % to 100 % usage at t = 300 s,
+from a cold start at 20 degC (simulating the warm-up to equilibrium at
+60 %), or from the steady state at 60 %, computed by `Rosenbrock` with
+`steady_init=True` (simulating the step response only). Errors on
+temperatures after the step are given with respect to a fourth-order
+Runge-Kutta reference with a small time step, from cold start.
+
+Run from `cpu_model` folder: `python benchmark_steady_init.py`
+"""
+import time
+
+import numpy as np
+import pandas as pd
+from cosapp.drivers import NonLinearSolver, RungeKutta
+from cosapp.recorders import DataFrameRecorder
+
+from cpu_transient import make_system
+from rosenbrock import Rosenbrock
+
+VARIABLES = ["T_cpu", "hsink.T_metal"]
+T_STEP, T_END = 300, 450
+
+
+def simulate(driver, start=0):
+    """Run load step with `driver`, from `start`; returns recorded data after step, and run statistics."""
+    sys = make_system()
+    sys.add_driver(driver)
+    driver.add_child(NonLinearSolver("NLsolver"))
+    driver.time_interval = (start, T_END)
+    driver.set_scenario(init={"T_cpu": 20.0}, values={"use": f"0.6 if t <= {T_STEP} else 1.0"})
+    rec = driver.add_recorder(DataFrameRecorder(includes=VARIABLES), period=0.5)
+
+    begin = time.perf_counter()
+    sys.run_drivers()
+    elapsed = time.perf_counter() - begin
+
+    stiff = isinstance(driver, Rosenbrock)
+    steps = driver.stats["steps"] if stiff else round((T_END - start) / driver.dt)
+    data = rec.export_data()
+    return data[data["time"] >= T_STEP], {"steps": steps, "compute_calls": sys.cpu.compute_calls, "time": elapsed}
+
+
+if __name__ == "__main__":
+    reference, _ = simulate(RungeKutta(order=4, dt=0.025))
+
+    cases = {
+        "RungeKutta, cold start": lambda: simulate(RungeKutta(dt=0.05)),
+        "Rosenbrock, cold start": lambda: simulate(Rosenbrock(rtol=1e-5, atol=1e-4, dt=0.5)),
+        "Rosenbrock, steady start": lambda: simulate(Rosenbrock(rtol=1e-5, atol=1e-4, dt=0.5, steady_init=True), start=T_STEP),
+    }
+    rows = {}
+    for name, case in cases.items():
+        data, stats = case()
+        # event records may add rows: compare on reference times
+        stats["max_T_error"] = max(
+            np.max(np.abs(np.interp(reference["time"], data["time"], data[var]) - reference[var].to_numpy())) for var in VARIABLES
+        )
+        rows[name] = stats
+
+    print(pd.DataFrame.from_dict(rows, orient="index").to_string())
@@ -0,0 +1,54 @@
+"""
+Compare explicit `RungeKutta` (fixed step) and implicit adaptive `Rosenbrock`
+drivers on the CPU transient of `cpu_transient.py`: number of steps, calls to
+`cpu.compute`, wall time and maximum temperature error with respect to a
+fourth-order Runge-Kutta reference with a small time step.
+
+Run from `cpu_model` folder: `python benchmark_transient.py`
+"""
+import time
+
+import numpy as np
+import pandas as pd
+from cosapp.recorders import DataFrameRecorder
+
+from cpu_transient import make_system, add_time_driver
+
+VARIABLES = ["T_cpu", "hsink.T_metal"]
+
+
+def simulate(stiff=False, **settings):
+    """Run transient; returns recorded data every 0.5 s, and run statistics."""
+    sys = make_system()
+    driver = add_time_driver(sys, stiff=stiff)
+    for name, value in settings.items():
+        setattr(driver, name, value)
+    rec = driver.add_recorder(DataFrameRecorder(includes=VARIABLES), period=0.5)
+
+    start = time.perf_counter()
+    sys.run_drivers()
+    elapsed = time.perf_counter() - start
+
+    t_begin, t_end = driver.time_interval
+    steps = driver.stats["steps"] if stiff else round((t_end - t_begin) / driver.dt)
+    return rec.export_data(), {"steps": steps, "compute_calls": sys.cpu.compute_calls, "time": elapsed}
+
+
+if __name__ == "__main__":
+    reference, _ = simulate(order=4, dt=0.025)
+
+    cases = {
+        "RungeKutta dt=0.05": dict(),
+        "Rosenbrock rtol=1e-4": dict(stiff=True, rtol=1e-4, atol=1e-3),
+        "Rosenbrock rtol=1e-5": dict(stiff=True),
+        "Rosenbrock rtol=1e-6": dict(stiff=True, rtol=1e-6, atol=1e-5),
+    }
+    rows = {}
+    for name, settings in cases.items():
+        data, stats = simulate(**settings)
+        stats["max_error"] = max(
+            np.max(np.abs(data[var].to_numpy() - reference[var].to_numpy())) for var in VARIABLES
+        )
+        rows[name] = stats
+
+    print(pd.DataFrame.from_dict(rows, orient="index"))
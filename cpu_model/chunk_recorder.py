@@ -0,0 +1,278 @@
+import json
+import os
+
+import numpy
+import pandas
+from cosapp.recorders.recorder import BaseRecorder
+from cosapp.utils.find_variables import make_wishlist
+
+
+class ChunkRecorder(BaseRecorder):
+    """
+    Recorder of time drivers, streaming numerical data to disk, for long transient runs.
+
+    Recorded rows (time, then variable values) are stored in a preallocated
+    array of `chunk_size` rows; each time it is full, it is written as a
+    `.npy` file in directory `path`, and reused. Memory use is therefore
+    bounded, whatever the duration of the run. Array variables (e.g. in
+    `CPUEnsemble`) are flattened, with columns `name[0]`, `name[1]`, ...
+
+    An index file `index.json` lists columns and the time range of each
+    chunk; it is updated after each write, so that results can be read
+    while the run goes on. `ChunkRecorder.read` loads the chunks
+    overlapping a time window only, by memory mapping.
+
+    Rows may be decimated: only one every `every` records is kept, and, if
+    `change_tol` is given, rows whose values all differ by less than
+    `change_tol` from the last kept row are dropped. The last record of a
+    run is always kept.
+
+    Parameters
+    ----------
+    path : str
+        Output directory; created if needed. Chunks of a previous run are
+        removed when recording starts, unless `hold` is True.
+    includes : str or list of str, optional
+        Variables matching these patterns will be included; default `'*'`.
+    excludes : str or list of str or None, optional
+        Variables matching these patterns will be excluded; default `None`.
+    chunk_size : int, optional
+        Number of rows per chunk; default: rows of about 8 MB
+    every : int
+        Keep one record every `every`
+    change_tol : float, optional
+        If given, only keep records with a value change larger than `change_tol`
+    section : str, optional
+        Current section name; default `''`.
+    hold : bool, optional
+        Append the new data or not; default `False`.
+
+    Examples
+    --------
+    >>> rec = driver.add_recorder(ChunkRecorder("run", includes=["T_cpu"], every=10))
+    >>> system.run_drivers()
+    >>> df = ChunkRecorder.read("run", start=3600, stop=7200)
+    """
+
+    INDEX = "index.json"
+
+    def __init__(
+        self,
+        path,
+        includes="*",
+        excludes=None,
+        chunk_size=None,
+        every=1,
+        change_tol=None,
+        section="",
+        hold=False,
+    ):
+        if (chunk_size is not None and chunk_size < 1) or every < 1:
+            raise ValueError("chunk_size and every must be positive")
+        super().__init__(includes, excludes, True, section, 9, hold, True)
+        self.path = path
+        self.chunk_size = chunk_size
+        self.every = every
+        self.change_tol = change_tol
+        self.columns = []
+        self.chunks = []
+        self._buffer = None
+        self._rows = 0
+        self._count = 0
+        self._last = None  # last kept row
+        self._pending = None  # last dropped row, written on exit
+
+    @classmethod
+    def extend(cls, recorder, includes=[], excludes=[]):
+        """New recorder with the settings of `recorder`, and extended `includes` and `excludes`."""
+        new = cls(
+            recorder.path,
+            recorder.includes + make_wishlist(includes, "includes"),
+            recorder.excludes + make_wishlist(excludes, "excludes"),
+            recorder.chunk_size,
+            recorder.every,
+            recorder.change_tol,
+            recorder.section,
+            recorder.hold,
+        )
+        new.watched_object = recorder.watched_object
+        return new
+
+    @property
+    def _raw_data(self):
+        """
+        Not available: records are flattened rows on disk, without the status
+        fields of in-memory records. Base-class callers are `restore`,
+        overridden below, and parallel execution of sets of cases, disabled
+        by `_enable_parallel_execution`.
+        """
+        raise NotImplementedError("ChunkRecorder data are on disk; use `read` or `export_data`")
+
+    def restore(self, index):
+        """Not supported, as array variables are stored as flattened columns; use `read` instead."""
+        raise NotImplementedError("ChunkRecorder cannot restore records; use `read` to get recorded values")
+
+    def export_data(self) -> pandas.DataFrame:
+        """Export all recorded data into a pandas.DataFrame object, with time as index."""
+        return self.read(self.path)
+
+    def start(self):
+        """Initialize recording support."""
+        super().start()
+        os.makedirs(self.path, exist_ok=True)
+        index = os.path.join(self.path, self.INDEX)
+        if not self.hold:
+            self.clear()
+        elif not self.chunks and os.path.exists(index):
+            with open(index) as f:
+                index = json.load(f)
+            self.columns, self.chunks = index["columns"][1:], index["chunks"]
+        self._buffer = None
+        self._count = 0
+        self._last = self._pending = None
+
+    def formatted_data(self):
+        """Collect recorded data from watched object into a flat list of floats, starting with time."""
+        fields = dict(zip(self.field_names(), map(numpy.ravel, self.collected_data())))
+        try:
+            time = fields.pop("time")
+        except KeyError:
+            raise RuntimeError("ChunkRecorder must be added to a time driver")
+        if not self.columns:
+            for name, value in fields.items():
+                self.columns.extend([name] if value.size == 1 else [f"{name}[{i}]" for i in range(value.size)])
+        return numpy.concatenate([time, *fields.values()]).astype(float).tolist()
+
+    def _record(self, line):
+        row = numpy.array(line[4:])
+        self._count += 1
+        if (self._count - 1) % self.every == 0 and (
+            self.change_tol is None
+            or self._last is None
+            or numpy.any(abs(row[1:] - self._last[1:]) > self.change_tol)
+        ):
+            self._append(row)
+        else:
+            self._pending = row
+
+    def _batch_record(self, lines):
+        for line in lines:
+            self._record(line)
+
+    def _append(self, row):
+        if self._buffer is None:
+            size = self.chunk_size or max(1, 2**20 // row.size)
+            self._buffer = numpy.empty((size, row.size))
+        self._buffer[self._rows] = row
+        self._rows += 1
+        self._last = row
+        self._pending = None
+        if self._rows == len(self._buffer):
+            self.flush()
+
+    def flush(self):
+        """Write buffered rows as a new chunk, and update index file."""
+        if self._rows == 0:
+            return
+        rows = self._buffer[: self._rows]
+        name = f"chunk_{len(self.chunks):05d}.npy"
+        numpy.save(os.path.join(self.path, name), rows)
+        self.chunks.append({"file": name, "start": rows[0, 0], "stop": rows[-1, 0], "rows": self._rows})
+        self._rows = 0
+        with open(os.path.join(self.path, self.INDEX), "w") as f:
+            json.dump({"columns": ["time"] + self.columns, "chunks": self.chunks}, f, indent=1)
+
+    def _enable_parallel_execution(self, exec_type, chunk_id):
+        raise NotImplementedError("ChunkRecorder does not support parallel execution")
+
+    def _disable_parallel_execution(self, exec_type, chunk_id):
+        pass
+
+    def exit(self):
+        """Write last record and buffered rows."""
+        if self._pending is not None:
+            self._append(self._pending)
+        self.flush()
+
+    def clear(self):
+        """Clear all previously stored data, in memory and on disk."""
+        if os.path.isdir(self.path):
+            for name in os.listdir(self.path):
+                if name == self.INDEX or (name.startswith("chunk_") and name.endswith(".npy")):
+                    os.remove(os.path.join(self.path, name))
+        self.chunks = []
+        self.columns = []
+        self._rows = 0
+        super().clear()
+
+    @classmethod
+    def read(cls, path, start=None, stop=None, columns=None):
+        """
+        Read recorded data in time window `[start, stop]`, from directory `path`.
+
+        Only chunks overlapping the window are opened, as memory maps: rows and
+        `columns` (list of names; default all) outside the selection are not loaded.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Selected data, with time as index
+        """
+        with open(os.path.join(path, cls.INDEX)) as f:
+            index = json.load(f)
+        names = index["columns"]
+        selected = names[1:] if columns is None else list(columns)
+        icols = [0] + [names.index(name) for name in selected]
+        start = -numpy.inf if start is None else start
+        stop = numpy.inf if stop is None else stop
+
+        parts = []
+        for chunk in index["chunks"]:
+            if chunk["stop"] < start or chunk["start"] > stop:
+                continue
+            data = numpy.load(os.path.join(path, chunk["file"]), mmap_mode="r")
+            time = data[:, 0]
+            i, j = numpy.searchsorted(time, start, side="left"), numpy.searchsorted(time, stop, side="right")
+            parts.append(data[i:j, icols])
+
+        data = numpy.concatenate(parts) if parts else numpy.empty((0, len(icols)))
+        return pandas.DataFrame(data[:, 1:], columns=selected, index=pandas.Index(data[:, 0], name="time"))
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    from cpu_ensemble import make_ensemble
+    from rosenbrock import Rosenbrock
+
+    # one hour of a 1000-CPU fleet, recorded every 0.5 s
+    size = 1000
+    use = numpy.random.default_rng(0).uniform(0.2, 1.0, size)
+
+    def make_fleet():
+        fleet = make_ensemble(size)
+        fleet.use = use
+        driver = fleet.add_driver(Rosenbrock("Rosenbrock", rtol=1e-5, atol=1e-4, ensemble=True))
+        driver.time_interval = (0, 3600)
+        driver.dt = 0.5
+        driver.set_scenario(init={"T_cpu": numpy.full(size, 20.0), "T_metal": numpy.full(size, 20.0)})
+        return fleet, driver
+
+    with tempfile.TemporaryDirectory() as root:
+        # one system, driver and output directory per recorder
+        for change_tol in [None, 1e-3]:
+            folder = os.path.join(root, f"change_tol={change_tol}")
+            fleet, driver = make_fleet()
+            rec = driver.add_recorder(ChunkRecorder(folder, includes=["T_cpu", "T_metal"], change_tol=change_tol))
+            start = time.perf_counter()
+            fleet.run_drivers()
+            elapsed = time.perf_counter() - start
+            disk = sum(os.path.getsize(os.path.join(folder, chunk["file"])) for chunk in rec.chunks)
+            rows = sum(chunk["rows"] for chunk in rec.chunks)
+            print(f"change_tol={change_tol}: {elapsed:.1f} s, {rows} rows in {len(rec.chunks)} chunks ({disk / 2**20:.1f} MB)")
+
+        start = time.perf_counter()
+        window = ChunkRecorder.read(folder, start=100, stop=200, columns=["T_cpu[0]", "T_metal[0]"])
+        elapsed = time.perf_counter() - start
+        print(f"Read {len(window)} rows of 2 columns in {elapsed * 1e3:.1f} ms")
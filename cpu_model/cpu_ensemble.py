@@ -0,0 +1,94 @@
+import time
+
+import numpy
+from cosapp.base import System
+from cosapp.recorders import DataFrameRecorder
+
+from cpu_transient import CPU, Control, Fan, Heatsink, make_system, add_time_driver
+from rosenbrock import Rosenbrock
+
+
+class CPUEnsemble(System):
+    """
+    Fleet of `size` independent CPU/heatsink/fan assemblies, modelled as in
+    `CPUSystem`, with every inward and transient variable (`T_cpu`, `T_metal`)
+    stored as an array with one entry per CPU.
+
+    Members may differ by any inward (`use`, `max_power`, `cpu.heat_cap`,
+    `cpu.contact_cond`, ...). They are integrated together by a single time
+    driver, on contiguous state arrays.
+
+    The heatsink contact temperature is its metal temperature, so `cpu.T_contact`
+    is directly linked to the `T_metal` state, rather than connected to the
+    heatsink output. The data flow `cpu -> controller -> fan -> hsink` is
+    then free of loops, and needs no `NonLinearSolver` at each time step.
+
+    Options
+    -------
+    size : int
+        Number of CPUs
+    """
+
+    def setup(self, size=1):
+        self.add_child(
+            CPU("cpu", size=size),
+            pulling={"use": "use", "max_power": "max_power", "T_cpu": "T_cpu", "T_contact": "T_metal"},
+        )
+        self.add_child(Control("controller", size=size))
+        self.add_child(Fan("fan", size=size))
+        self.add_child(Heatsink("hsink", size=size), pulling=["T_amb", "T_metal"])
+
+        self.connect(self.cpu.outwards, self.controller.inwards, ["T_control"])
+        self.connect(self.controller.outwards, self.fan.inwards, ["V_fan"])
+        self.connect(self.fan.outwards, self.hsink.inwards, ["h_air"])
+        self.connect(self.cpu.outwards, self.hsink.inwards, {"Q_out": "Q_in"})
+
+    def compute(self):
+        pass
+
+
+def make_ensemble(size, name="fleet"):
+    """`CPUEnsemble` of `size` CPUs, with the properties of `cpu_transient.make_system`."""
+    fleet = CPUEnsemble(name, size=size)
+    single = make_system()
+    for var in ["max_power", "cpu.heat_cap", "hsink.heat_cap", "hsink.emissivity", "cpu.contact_cond", "T_cpu", "T_amb"]:
+        fleet[var] = numpy.full(size, single[var], dtype=float)
+    fleet.T_metal = numpy.full(size, single.hsink.T_metal, dtype=float)
+    return fleet
+
+
+if __name__ == "__main__":
+    # random rack of CPUs, compared to single-CPU runs
+    size = 1000
+    rng = numpy.random.default_rng(0)
+    fleet = make_ensemble(size)
+    fleet.use = rng.uniform(0.2, 1.0, size)
+    fleet.max_power = rng.uniform(300, 600, size)
+    fleet.cpu.heat_cap = rng.uniform(50, 90, size)
+    fleet.cpu.contact_cond = rng.uniform(50, 150, size)
+
+    driver = fleet.add_driver(Rosenbrock("Rosenbrock", rtol=1e-5, atol=1e-4, ensemble=True))
+    driver.time_interval = (0, 150)
+    driver.dt = 0.5
+    rec = driver.add_recorder(DataFrameRecorder(includes=["T_cpu", "T_metal"]))
+
+    start = time.perf_counter()
+    fleet.run_drivers()
+    elapsed = time.perf_counter() - start
+    print(f"{size} CPUs: {elapsed:.2f} s ({driver.stats['steps']} steps)")
+
+    # check a few members against single runs
+    data = rec.export_data()
+    for i in range(3):
+        single = make_system()
+        single.max_power = fleet.max_power[i]
+        single.cpu.heat_cap = fleet.cpu.heat_cap[i]
+        single.cpu.contact_cond = fleet.cpu.contact_cond[i]
+        solver = add_time_driver(single, stiff=True)
+        solver.set_scenario(init={"T_cpu": 20.0}, values={"use": fleet.use[i]})
+
+        start = time.perf_counter()
+        single.run_drivers()
+        elapsed = time.perf_counter() - start
+        error = abs(single.T_cpu - data["T_cpu"].iloc[-1][i])
+        print(f"CPU #{i}: {elapsed:.2f} s, final T_cpu = {single.T_cpu:.3f} (fleet error {error:.1e})")
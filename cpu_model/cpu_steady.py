@@ -1,7 +1,31 @@
+import argparse
+import json
+import time
+from functools import lru_cache
+
+import numpy
 from cosapp.base import System, Port
 from cosapp.drivers import NonLinearSolver
 
 
+def fan_voltage(T, law="linear"):
+    """
+    Fan voltage set by `Control` at CPU temperature `T`: `T * 12 / 40` for law
+    "linear"; 0, 6 or 12 V below 20, between 20 and 40, or above 40 degC for
+    law "steps". Vectorized over `T`.
+    """
+    if law == "linear":
+        return T * 12 / 40
+    if law == "steps":
+        return 6.0 * (T >= 20) + 6.0 * (T > 40)
+    raise ValueError(f"Unknown control law {law!r}; must be 'linear' or 'steps'")
+
+
+def heat_transfer(V):
+    """Heat transfer coefficient of `Fan` air at voltage `V`."""
+    return V / 10
+
+
 class Fluid(Port):
     def setup(self):
         self.add_variable("T", unit="degC")
@@ -19,19 +43,15 @@ class Temperature(Port):
 
 
 class Control(System):
-    def setup(self):
+    def setup(self, law="linear"):
+        fan_voltage(0.0, law)  # check law
+        self.add_property("law", law)
+
         self.add_input(Temperature, "T_cpu")
         self.add_output(Voltage, "V_fan")
 
     def compute(self):
-        # if self.T_cpu.T < 20:
-        #     self.V_fan.V = 0.
-        # elif self.T_cpu.T > 40:
-        #     self.V_fan.V = 12.
-        # else:
-        #     self.V_fan.V = 6.
-
-        self.V_fan.V = self.T_cpu.T * 12 / 40
+        self.V_fan.V = fan_voltage(self.T_cpu.T, self.law)
 
 
 class Heatsink(System):
@@ -55,7 +75,7 @@ class Fan(System):
 
     def compute(self):
         self.air.T = self.T_amb
-        self.air.h = self.V_fan.V / 10
+        self.air.h = heat_transfer(self.V_fan.V)
 
 
 class CPU(System):
@@ -74,11 +94,11 @@ class CPU(System):
 
 
 class CPUSystem(System):
-    def setup(self):
+    def setup(self, law="linear"):
         self.add_child(CPU("cpu"), pulling=["use", "max_power", "T_cpu"])
         self.add_child(Fan("fan"), pulling=["T_amb"])
         self.add_child(Heatsink("hsink"), pulling=["T_cpu"])
-        self.add_child(Control("controller"), pulling=["T_cpu"])
+        self.add_child(Control("controller", law=law), pulling=["T_cpu"])
 
         self.connect(self.controller.V_fan, self.fan.V_fan)
         self.connect(self.fan.air, self.hsink.air)
@@ -90,17 +110,173 @@ class CPUSystem(System):
         pass
 
 
-sys = CPUSystem("sys")
-
-# cpu properties
-sys.use = 1
-sys.max_power = 20
-
-# ambient temperature
-sys.T_amb = 20
-
-solver = sys.add_driver(NonLinearSolver("solver"))
-
-sys.run_drivers()
-
-print(solver.problem)
+class SteadyState:
+    """
+    Steady CPU temperature of `CPUSystem`, computed without `NonLinearSolver`,
+    for arrays of operating points.
+
+    The heatsink heat flow is `Q = h(V(T)) * (T - T_amb)`, with `V` and `h`
+    the laws of `Control` and `Fan`. With control law "linear", `h` is
+    proportional to `T`, and the balance `Q = use * max_power` is a
+    quadratic in `T`, solved in closed form (root above `T_amb`). Other laws
+    are solved by Newton iterations, safeguarded by bisection, on all points
+    at once. As the fan voltage may jump (law "steps"), the balance may have
+    no root: points where the heat flow does not match the power at the end
+    of iterations (discontinuity in the bracket, or `max_iter` reached) are
+    set to NaN.
+
+    Inputs are broadcast together; scalar solutions are memoized, so that
+    repeated evaluations at the same point cost a dictionary access.
+
+    Parameters
+    ----------
+    law : str
+        Control law of the system (see `fan_voltage`)
+    memo_size : int
+        Number of scalar solutions kept in cache
+    tol : float
+        Relative tolerance on temperature, for Newton iterations
+    max_iter : int
+        Maximum number of Newton iterations
+
+    Examples
+    --------
+    >>> steady = SteadyState()
+    >>> T_cpu = steady(use=numpy.linspace(0, 1, 101), max_power=20, T_amb=20)
+    """
+
+    def __init__(self, law="linear", memo_size=4096, tol=1e-10, max_iter=100):
+        fan_voltage(0.0, law)  # check law
+        self.law = law
+        self.tol = tol
+        self.max_iter = max_iter
+        self._lookup = lru_cache(maxsize=memo_size)(self._solve)
+
+    def heat_flow(self, T, T_amb):
+        """Heat flow (W) from heatsink at temperature `T` to ambient air at `T_amb`."""
+        return heat_transfer(fan_voltage(T, self.law)) * (T - T_amb)
+
+    def __call__(self, use, max_power, T_amb=20.0):
+        """Steady CPU temperature (degC)."""
+        if numpy.ndim(use) == numpy.ndim(max_power) == numpy.ndim(T_amb) == 0:
+            return self._lookup(float(use * max_power), float(T_amb))
+        power, T_amb = numpy.broadcast_arrays(numpy.multiply(use, max_power, dtype=float), numpy.asarray(T_amb, dtype=float))
+        return self._solve(power, T_amb)
+
+    def _solve(self, power, T_amb):
+        if self.law == "linear":
+            a = heat_transfer(fan_voltage(1.0))  # Q = a * T * (T - T_amb)
+            return 0.5 * T_amb + numpy.sqrt(0.25 * T_amb**2 + power / a)
+        return self._newton(power, T_amb)
+
+    def _newton(self, power, T_amb):
+        scalar = numpy.ndim(power) == 0
+        power, T_amb = numpy.atleast_1d(power, T_amb)
+
+        # bracket: heat flow - power is <= 0 at lo, >= 0 at hi
+        lo = T_amb.copy()
+        hi = T_amb + 1.0
+        for _ in range(self.max_iter):
+            low = self.heat_flow(hi, T_amb) < power
+            if not low.any():
+                break
+            lo = numpy.where(low, hi, lo)
+            hi = numpy.where(low, T_amb + 2 * (hi - T_amb), hi)
+
+        T = 0.5 * (lo + hi)
+        active = numpy.arange(T.size)  # points not converged yet
+        for _ in range(self.max_iter):
+            t, p, t_amb, t_lo, t_hi = T[active], power[active], T_amb[active], lo[active], hi[active]
+            r = self.heat_flow(t, t_amb) - p
+            t_lo = numpy.where(r < 0, t, t_lo)
+            t_hi = numpy.where(r < 0, t_hi, t)
+            dT = 1e-7 * (1 + abs(t))
+            slope = (self.heat_flow(t + dT, t_amb) - p - r) / dT
+            with numpy.errstate(divide="ignore", invalid="ignore"):
+                step = t - r / slope
+            # bisect where Newton step leaves bracket
+            t_new = numpy.where((step > t_lo) & (step < t_hi), step, 0.5 * (t_lo + t_hi))
+            T[active], lo[active], hi[active] = t_new, t_lo, t_hi
+            active = active[abs(t_new - t) > self.tol * (1 + abs(t))]
+            if active.size == 0:
+                break
+        # no root where bracket shrank onto a jump of heat flow, or not converged
+        residual = self.heat_flow(T, T_amb) - power
+        T[abs(residual) > numpy.sqrt(self.tol) * (1 + abs(power))] = numpy.nan
+        T[active] = numpy.nan
+        return T[0] if scalar else T
+
+    def apply(self, system):
+        """Set steady state of `system`, a `CPUSystem` with the same control law, and update its outputs."""
+        if system.controller.law != self.law:
+            raise ValueError(f"System control law is {system.controller.law!r}, not {self.law!r}")
+        system.T_cpu.T = self(system.use, system.max_power, system.T_amb)
+        system.run_once()
+
+
+def solve(use=1.0, max_power=20.0, T_amb=20.0, law="linear"):
+    """`CPUSystem` at steady state for the given load and ambient temperature, solved by `NonLinearSolver` "solver"."""
+    sys = CPUSystem("sys", law=law)
+
+    # cpu properties
+    sys.use = use
+    sys.max_power = max_power
+
+    # ambient temperature
+    sys.T_amb = T_amb
+
+    sys.add_driver(NonLinearSolver("solver"))
+
+    sys.run_drivers()
+
+    return sys
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve CPU steady-state temperature.")
+    parser.add_argument("--use", type=float, default=1.0, help="CPU usage (default: 1)")
+    parser.add_argument("--max-power", type=float, default=20.0, help="maximum CPU power in W (default: 20)")
+    parser.add_argument("--T-amb", type=float, default=20.0, help="ambient temperature in degC (default: 20)")
+    parser.add_argument("--law", default="linear", choices=["linear", "steps"], help="fan control law (default: linear)")
+    parser.add_argument("--points", type=int, default=100_000, help="load points of `SteadyState` timing; 0 to skip (default: 100000)")
+    parser.add_argument("-o", "--output", help="save steady state as JSON file OUTPUT")
+    args = parser.parse_args(argv)
+
+    sys = solve(args.use, args.max_power, args.T_amb, args.law)
+    print(sys.drivers["solver"].problem)
+
+    if args.output:
+        result = {
+            "use": args.use,
+            "max_power": args.max_power,
+            "T_amb": args.T_amb,
+            "law": args.law,
+            "T_cpu": float(sys.T_cpu.T),
+            "Q_out": float(sys.cpu.Q_out),
+            "converged": bool(sys.drivers["solver"].results.success),
+        }
+        with open(args.output, "w") as file:
+            json.dump(result, file, indent=2)
+
+    # closed form and Newton fallback, over load points
+    n = args.points
+    if n > 0:
+        rng = numpy.random.default_rng(0)
+        use, max_power, T_amb = rng.uniform(0, 1, n), rng.uniform(10, 40, n), rng.uniform(10, 30, n)
+        for law in ["linear", "steps"]:
+            steady = SteadyState(law)
+            start = time.perf_counter()
+            steady(use, max_power, T_amb)
+            elapsed = time.perf_counter() - start
+            print(f"{law!r} law: {n} points in {elapsed * 1e3:.1f} ms")
+
+    steady = SteadyState(args.law)
+    if args.law == "linear":
+        steady.apply(sys)
+        print(f"Closed form: T_cpu = {sys.T_cpu.T:.6f}, balance error = {sys.cpu.Q_out - sys.hsink.Q_out:.1e} W")
+    else:
+        print(f"SteadyState: T_cpu = {steady(args.use, args.max_power, args.T_amb):.6f}")
+
+
+if __name__ == "__main__":
+    main()
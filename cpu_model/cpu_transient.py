@@ -1,69 +1,143 @@
+import argparse
+
+import numpy
 from cosapp.base import System
 from cosapp.drivers import NonLinearSolver, RungeKutta
 from cosapp.recorders import DataFrameRecorder
 
-import matplotlib.pyplot as plt
 from scipy.constants import Stefan_Boltzmann
 
+from rosenbrock import Rosenbrock
+
+
+def _value(value, size):
+    """Default value of a variable: `value`, or an array of `size` copies (for ensembles)."""
+    return value if size is None else numpy.full(size, value, dtype=float)
+
 
 class Control(System):
-    def setup(self):
-        self.add_inward("T_control", value=10, unit="K", desc="CPU temperature")
-        self.add_outward("V_fan", value=0, unit="V", desc="Fan activation voltage.")
+    """
+    Fan controller, setting fan voltage from CPU temperature.
+
+    Inwards
+    -------
+    T_control : float
+        CPU temperature
+    hysteresis : float
+        Temperature drop below a threshold needed to switch down (law "steps")
+
+    Outwards
+    --------
+    V_fan : float
+        Fan activation voltage
+
+    Options
+    -------
+    size : int, optional
+        Number of members, for ensembles (see `CPUEnsemble`)
+    law : str
+        "linear" (default): `V_fan = T_control * 12 / 40`, saturated at 12 V.
+        "steps": 0, 6 or 12 V below 20, between 20 and 40, or above 40 degrees.
+
+    For single systems, the fan regime is a mode variable, changed by events on
+    threshold crossings. Time drivers locate crossings by root finding, and
+    `compute` is smooth between events, so that large time steps can be used.
+    Ensembles evaluate the linear law directly (events are scalar).
+    """
+
+    def setup(self, size=None, law="linear"):
+        if law not in ("linear", "steps"):
+            raise ValueError(f"Unknown control law {law!r}; must be 'linear' or 'steps'")
+        if size is not None and law != "linear":
+            raise ValueError("Ensembles only support control law 'linear'")
+        self.add_property("law", law)
+        self.add_property("size", size)
+
+        self.add_inward("T_control", value=_value(10.0, size), unit="K", desc="CPU temperature")
+        self.add_outward("V_fan", value=_value(0.0, size), unit="V", desc="Fan activation voltage.")
+
+        if size is not None:
+            return
+
+        if law == "linear":
+            self.add_outward_modevar("regime", init="1 if T_control > 40 else 0", dtype=int, desc="0: proportional, 1: saturated")
+            self.add_event("saturate", trigger="T_control > 40")
+            self.add_event("desaturate", trigger="T_control < 40")
+        else:
+            self.add_inward("hysteresis", value=1.0, unit="K", desc="Switch-down temperature offset")
+            self.add_outward_modevar(
+                "regime", init="(1 if T_control > 20 else 0) + (1 if T_control > 40 else 0)", dtype=int, desc="0: off, 1: 6 V, 2: 12 V"
+            )
+            self.add_event("up_20", trigger="T_control > 20")
+            self.add_event("up_40", trigger="T_control > 40")
+            self.add_event("down_40", trigger="T_control < 40 - hysteresis")
+            self.add_event("down_20", trigger="T_control < 20 - hysteresis")
+
+    def transition(self):
+        if self.law == "linear":
+            if self.saturate.present:
+                self.regime = 1
+            if self.desaturate.present:
+                self.regime = 0
+        else:
+            if self.up_20.present:
+                self.regime = max(self.regime, 1)
+            if self.up_40.present:
+                self.regime = 2
+            if self.down_40.present:
+                self.regime = min(self.regime, 1)
+            if self.down_20.present:
+                self.regime = 0
 
     def compute(self):
-        # if self.T_control < 20:
-        #     self.V_fan = 0.0
-        # elif self.T_control > 40:
-        #     self.V_fan = 12.0
-        # else:
-        #     self.V_fan = 6.0
-
-        self.V_fan = min(max(0, self.T_control * 12 / 40), 12)
+        if self.size is not None:
+            self.V_fan = numpy.clip(self.T_control * 12 / 40, 0, 12)
+        elif self.law == "linear":
+            self.V_fan = 12.0 if self.regime == 1 else max(0, self.T_control * 12 / 40)
+        else:
+            self.V_fan = 6.0 * self.regime
 
 
 class Heatsink(System):
-    def setup(self):
+    def setup(self, size=None):
 
         self.add_inward(
-            "h_air", value=0, unit="W/m**2/K", desc="total heat transfer coefficient"
+            "h_air", value=_value(0, size), unit="W/m**2/K", desc="total heat transfer coefficient"
         )
-        self.add_inward("T_amb", value=20, unit="K", desc="ambient temperature")
+        self.add_inward("T_amb", value=_value(20, size), unit="K", desc="ambient temperature")
         self.add_inward(
-            "Q_in", value=0, unit="W", desc="heat comming from the cpu to the heatsink"
+            "Q_in", value=_value(0, size), unit="W", desc="heat comming from the cpu to the heatsink"
         )
         self.add_inward(
             "emissivity",
-            value=0.8,
+            value=_value(0.8, size),
             unit="",
             desc="surface thermal emissivity (grey surface)",
         )
         self.add_inward(
             "convection_area",
-            value=0.1,
+            value=_value(0.1, size),
             unit="m**2",
             desc="effective convection surface area",
         )
         self.add_inward(
             "radiation_area",
-            value=0.5,
+            value=_value(0.5, size),
             unit="m**2",
             desc="effective radiation surface area",
         )
-        self.add_inward("heat_cap", value=10, unit="J/K", desc="heatsink heat capacity")
+        self.add_inward("heat_cap", value=_value(10, size), unit="J/K", desc="heatsink heat capacity")
 
-        self.add_inward("T_metal", value=10, unit="K", desc="CPU temperature")
+        self.add_inward("T_metal", value=_value(10, size), unit="K", desc="CPU temperature")
 
-        self.add_outward("T_contact", value=10, unit="K", desc="CPU temperature")
+        self.add_outward("T_contact", value=_value(10, size), unit="K", desc="CPU temperature")
         self.add_outward(
-            "Q_out", value=0, unit="W", desc="heat leaving heatsink to the environment"
+            "Q_out", value=_value(0, size), unit="W", desc="heat leaving heatsink to the environment"
         )
-        self.add_outward("dT", value=0, unit="K/s", desc="temperature variation")
+        self.add_outward("dT", value=_value(0, size), unit="K/s", desc="temperature variation")
 
         self.add_transient("T_metal", der="dT")
 
-        self.add_unknown("T_metal")
-
     def compute(self):
 
         self.Q_out = self.h_air * self.convection_area * (
@@ -78,10 +152,10 @@ class Heatsink(System):
 
 
 class Fan(System):
-    def setup(self):
-        self.add_inward("V_fan", value=0, unit="V", desc="Fan activation voltage.")
+    def setup(self, size=None):
+        self.add_inward("V_fan", value=_value(0, size), unit="V", desc="Fan activation voltage.")
         self.add_outward(
-            "h_air", value=0, unit="W/m**2/K", desc="total heat transfer coefficient"
+            "h_air", value=_value(0, size), unit="W/m**2/K", desc="total heat transfer coefficient"
         )
 
     def compute(self):
@@ -89,27 +163,27 @@ class Fan(System):
 
 
 class CPU(System):
-    def setup(self):
-        self.add_inward("use", value=0, desc="cpu usage")
+    def setup(self, size=None):
+        self.add_inward("use", value=_value(0, size), desc="cpu usage")
         self.add_inward(
-            "max_power", value=20, unit="W", desc="Maximum power dissipated"
+            "max_power", value=_value(20, size), unit="W", desc="Maximum power dissipated"
         )
-        self.add_inward("heat_cap", value=10, unit="J/K", desc="heat capacity")
-        self.add_inward("T_cpu", value=10, unit="K", desc="CPU temperature")
+        self.add_inward("heat_cap", value=_value(10, size), unit="J/K", desc="heat capacity")
+        self.add_inward("T_cpu", value=_value(10, size), unit="K", desc="CPU temperature")
         self.add_inward(
             "contact_cond",
-            value=10,
+            value=_value(10, size),
             unit="W/K",
             desc="effective conductivity of contact",
         )
-        self.add_inward("T_contact", value=10, unit="K", desc="metal temperature")
+        self.add_inward("T_contact", value=_value(10, size), unit="K", desc="metal temperature")
 
-        self.add_outward("dT", value=0, unit="K/s", desc="temperature variation")
+        self.add_outward("dT", value=_value(0, size), unit="K/s", desc="temperature variation")
         self.add_outward(
-            "T_control", value=10, unit="K", desc="temperature sent to the controller"
+            "T_control", value=_value(10, size), unit="K", desc="temperature sent to the controller"
         )
         self.add_outward(
-            "Q_out", value=0, unit="W", desc="heat leaving cpu to heatsink"
+            "Q_out", value=_value(0, size), unit="W", desc="heat leaving cpu to heatsink"
         )
 
         self.add_transient("T_cpu", der="dT")
@@ -123,11 +197,11 @@ class CPU(System):
 
 
 class CPUSystem(System):
-    def setup(self):
+    def setup(self, law="linear"):
         self.add_child(CPU("cpu"), pulling=["use", "max_power", "T_cpu"])
         self.add_child(Fan("fan"))
         self.add_child(Heatsink("hsink"), pulling=["T_amb"])
-        self.add_child(Control("controller"))
+        self.add_child(Control("controller", law=law))
 
         self.connect(
             self.cpu.outwards, self.controller.inwards, ["T_control"]
@@ -149,66 +223,115 @@ class CPUSystem(System):
         pass
 
 
-sys = CPUSystem("sys")
+def make_system(name="sys", law="linear"):
+    """`CPUSystem` with the properties of the study, and fan control `law` (see `Control`)."""
+    sys = CPUSystem(name, law=law)
 
-# cpu properties
-sys.max_power = 500
-sys.cpu.heat_cap = 710 * 0.1
-sys.hsink.heat_cap = 900 * 0.2
-sys.hsink.emissivity = 0.8
+    # cpu properties
+    sys.max_power = 500
+    sys.cpu.heat_cap = 710 * 0.1
+    sys.hsink.heat_cap = 900 * 0.2
+    sys.hsink.emissivity = 0.8
 
-sys.cpu.contact_cond = 100
+    sys.cpu.contact_cond = 100
 
-sys.T_cpu = 20
-sys.hsink.T_metal = 20
+    sys.T_cpu = 20
+    sys.hsink.T_metal = 20
 
-# ambient temperature
-sys.T_amb = 20
+    # ambient temperature
+    sys.T_amb = 20
 
-sys.drivers.clear()
+    return sys
 
-solver = sys.add_driver(RungeKutta("RungeKutta"))
-solver.add_child(NonLinearSolver("NLsolver"))
 
+def add_time_driver(sys, stiff=False, steady_init=False):
+    """
+    Add time driver simulating 150 s at full CPU usage: explicit `RungeKutta`
+    with fixed step, or adaptive implicit `Rosenbrock` if `stiff` is True.
+    With `steady_init`, the run starts from steady state (see `Rosenbrock`);
+    only available with `stiff`.
+    """
+    if steady_init and not stiff:
+        raise ValueError("steady_init is only supported by the Rosenbrock driver (stiff=True)")
+    sys.drivers.clear()
 
-solver.time_interval = (0, 150)
-solver.dt = 0.05
+    if stiff:
+        solver = sys.add_driver(Rosenbrock("Rosenbrock", rtol=1e-5, atol=1e-4, steady_init=steady_init))
+        solver.dt = 0.5  # output step; internal steps are adaptive
+    else:
+        solver = sys.add_driver(RungeKutta("RungeKutta"))
+        solver.dt = 0.05
+    solver.add_child(NonLinearSolver("NLsolver"))
 
-solver.set_scenario(
-    init={"T_cpu": 20.0},
-    values={"use": 1.0},
-)
+    solver.time_interval = (0, 150)
 
-rec = solver.add_recorder(
-    DataFrameRecorder(
-        includes=[
-            "use",
-            "T_cpu",
-            "hsink.T_metal",
-            "cpu.Q_out",
-            "hsink.Q_out",
-            "fan.V_fan",
-        ]
+    solver.set_scenario(
+        init={"T_cpu": 20.0},
+        values={"use": 1.0},
     )
-)
+    return solver
+
+
+# variables recorded by `simulate`
+RECORDED = ["use", "T_cpu", "hsink.T_metal", "cpu.Q_out", "hsink.Q_out", "fan.V_fan"]
+
+
+def simulate(law="linear", stiff=False, steady_init=False):
+    """
+    Run the transient of `add_time_driver` on `make_system(law=law)`;
+    returns `RECORDED` variables at each time step, as a DataFrame.
+    """
+    sys = make_system(law=law)
+    solver = add_time_driver(sys, stiff=stiff, steady_init=steady_init)
+
+    rec = solver.add_recorder(DataFrameRecorder(includes=RECORDED))
+
+    sys.run_drivers()
+
+    return rec.export_data()
+
+
+def plot(df):
+    """Plot temperatures, heat flows, CPU usage and fan voltage of `simulate` results `df`."""
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(nrows=1, ncols=3)
+    # ax.plot(df["time"].to_numpy(), df["use"].to_numpy(), label="use")
+    ax[0].plot(df["time"].to_numpy(), df["T_cpu"].to_numpy(), label="T cpu")
+    ax[0].plot(df["time"].to_numpy(), df["hsink.T_metal"].to_numpy(), label="T metal")
+    ax[1].plot(df["time"].to_numpy(), df["cpu.Q_out"].to_numpy(), label="Q cpu")
+    ax[1].plot(df["time"].to_numpy(), df["hsink.Q_out"].to_numpy(), label="Q hsink")
+    ax[2].plot(df["time"].to_numpy(), df["use"].to_numpy(), label="cpu usage")
+    ax[2].plot(df["time"].to_numpy(), df["fan.V_fan"].to_numpy(), label="V fan")
+
+    for a in ax:
+        a.legend()
+
+    plt.tight_layout()
+    plt.show(block=True)
+
 
-sys.run_drivers()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate CPU temperature over 150 s at full load.")
+    parser.add_argument("--law", default="linear", choices=["linear", "steps"], help="fan control law (default: linear)")
+    parser.add_argument("--stiff", action="store_true", help="use adaptive implicit Rosenbrock driver")
+    parser.add_argument("--steady-init", action="store_true", help="start from steady state (requires --stiff)")
+    parser.add_argument("-o", "--output", help="save results as CSV file OUTPUT")
+    parser.add_argument("--headless", action="store_true", help="do not plot (matplotlib is not imported)")
+    args = parser.parse_args(argv)
+    if args.steady_init and not args.stiff:
+        parser.error("--steady-init requires --stiff")
 
-df = rec.data
+    df = simulate(args.law, args.stiff, args.steady_init)
 
-print(df.head(10))
+    if args.output:
+        df.to_csv(args.output, index=False)
+    else:
+        print(df.head(10))
 
-fig, ax = plt.subplots(nrows=1, ncols=3)
-# ax.plot(df["time"].to_numpy(), df["use"].to_numpy(), label="use")
-ax[0].plot(df["time"].to_numpy(), df["T_cpu"].to_numpy(), label="T cpu")
-ax[0].plot(df["time"].to_numpy(), df["hsink.T_metal"].to_numpy(), label="T metal")
-ax[1].plot(df["time"].to_numpy(), df["cpu.Q_out"].to_numpy(), label="Q cpu")
-ax[1].plot(df["time"].to_numpy(), df["hsink.Q_out"].to_numpy(), label="Q hsink")
-ax[2].plot(df["time"].to_numpy(), df["use"].to_numpy(), label="cpu usage")
-ax[2].plot(df["time"].to_numpy(), df["fan.V_fan"].to_numpy(), label="V fan")
+    if not args.headless:
+        plot(df)
 
-for a in ax:
-    a.legend()
 
-plt.tight_layout()
-plt.show(block=True)
+if __name__ == "__main__":
+    main()
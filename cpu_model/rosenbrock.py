@@ -0,0 +1,236 @@
+import numpy
+from cosapp.drivers.time.base import AbstractTimeDriver
+
+
+class Rosenbrock(AbstractTimeDriver):
+    """
+    Linearly implicit, L-stable Rosenbrock-W time integrator (ROS2, Verwer et al., 1999),
+    with adaptive step size, for stiff systems.
+
+    Drop-in replacement for `RungeKutta`: `dt` is the output step, at which the
+    system is recorded and events are checked. Transients are integrated by
+    internal steps `h`, adapted to keep the local error estimate within
+    `atol + rtol * |x|` on all transient variables, independently of `dt`:
+    a step may cover many output steps, whose states are interpolated by
+    dense output (cubic Hermite polynomial of values and time derivatives at
+    both ends of the step), at the cost of one evaluation each. Events are
+    checked at output steps, and located by root finding on the dense output
+    of the internal steps covering the output step; after an event,
+    integration restarts from the event time, with a new Jacobian. Each
+    internal step solves two linear systems with matrix `I - gamma h J`, where the Jacobian `J` of
+    time derivatives w.r.t. transients is computed by finite differences. Being
+    a W-method, the scheme keeps its order with an approximate Jacobian, which
+    is therefore only updated after rejected steps.
+
+    With `ensemble=True`, transient variables are arrays of the same size,
+    gathering independent members (e.g. a fleet of identical systems with
+    different parameters). The Jacobian is then block-diagonal, with one
+    block per member: it is computed with one evaluation per transient
+    variable, whatever the number of members, and linear systems are solved
+    member-wise. All members share the same internal steps, controlled by
+    the largest member error.
+
+    With `steady_init=True`, transients are set to the steady state (zero
+    time derivatives) at start time, found by Newton iterations from their
+    initial values (scenario `init`), with boundary conditions at start
+    time. Mode variables are then re-initialized from the steady state, and
+    the solve repeated until modes are consistent. The run then starts from
+    equilibrium, e.g. to simulate the response to a load step only. This
+    option is specific to `Rosenbrock`, which computes the Jacobian needed
+    by Newton iterations: `RungeKutta` drivers start from scenario `init`.
+
+    Parameters
+    ----------
+    name : str
+        Driver name
+    owner : System, optional
+        System to which driver belongs
+    rtol, atol : float
+        Relative and absolute tolerances on local error
+    ensemble : bool
+        If True, transients are ensembles of independent members (see above)
+    steady_init : bool
+        If True, start from steady state (see above)
+    **options
+        Time step `dt` and `time_interval`, as for other time drivers
+    """
+
+    __slots__ = ("rtol", "atol", "ensemble", "steady_init", "stats", "_h", "_jac", "_steps", "_locating")
+
+    gamma = 1 + 1 / numpy.sqrt(2)
+
+    def __init__(self, name="Rosenbrock", owner=None, rtol=1e-4, atol=1e-6, ensemble=False, steady_init=False, **options):
+        super().__init__(name, owner, **options)
+        self.rtol = rtol
+        self.atol = atol
+        self.ensemble = ensemble
+        self.steady_init = steady_init
+        self.stats = {}
+        self._h = None
+        self._jac = None
+        self._steps = []  # internal steps covering last output step, as (t0, y0, f0, t1, y1, f1)
+        self._locating = False  # True while events of last output step are located
+
+    def _precompute(self) -> None:
+        super()._precompute()
+        self._h = None
+        self._jac = None
+        self._steps = []
+        self.stats = dict(steps=0, rejected=0, jacobians=0, evaluations=0, newton=0)
+
+    def _initialize(self):
+        super()._initialize()
+        self._steps = []
+        if self.steady_init:
+            self._steady_state()
+
+    def _pre_update_system(self) -> None:
+        """While locating events, set transients at current time from dense output."""
+        if self._locating:
+            y = self._dense(self.time)
+            if y is not None:
+                self._set_state(y)
+
+    def _pre_transition(self) -> None:
+        """Stop using dense output once events are located, as transitions may reset transients."""
+        self._locating = False
+
+    def _post_transition(self, dt: float) -> None:
+        """Discard Jacobian and internal steps after events, as the system may have changed mode."""
+        self._jac = None
+        self._steps = []
+
+    def _state(self):
+        return numpy.concatenate([numpy.ravel(x.value) for x in self._transients.values()])
+
+    def _derivatives(self):
+        return numpy.concatenate([numpy.ravel(x.d_dt) for x in self._transients.values()])
+
+    def _set_state(self, y):
+        i = 0
+        for x in self._transients.values():
+            size = numpy.size(x.value)
+            x.value = y[i] if numpy.ndim(x.value) == 0 else y[i: i + size].reshape(numpy.shape(x.value))
+            i += size
+
+    def _rhs(self, y, t):
+        """Time derivatives of transients at state `y` and time `t`."""
+        self._set_state(y)
+        self._set_time(t)
+        self.stats["evaluations"] += 1
+        return self._derivatives()
+
+    def _blocks(self, y):
+        """View of state-like vector `y` as a (variables, members) array."""
+        return y.reshape(len(self._transients), -1) if self.ensemble else y.reshape(-1, 1)
+
+    def _jacobian(self, y, t, f):
+        """Jacobian blocks of time derivatives, as a (members, variables, variables) array."""
+        self.stats["jacobians"] += 1
+        y_blocks, f_blocks = self._blocks(y), self._blocks(f)
+        n_vars, n_members = y_blocks.shape
+        jac = numpy.empty((n_members, n_vars, n_vars))
+        for j in range(n_vars):
+            delta = numpy.sqrt(numpy.finfo(float).eps) * numpy.maximum(abs(y_blocks[j]), 1.0)
+            y_j = y_blocks.copy()
+            y_j[j] += delta
+            jac[:, :, j] = ((self._blocks(self._rhs(y_j.ravel(), t)) - f_blocks) / delta).T
+        return jac
+
+    def _solve(self, matrix, rhs):
+        """Solve block-diagonal system `matrix @ x = rhs`."""
+        x = numpy.linalg.solve(matrix, self._blocks(rhs).T[..., None])
+        return x[..., 0].T.ravel()
+
+    def _steady_state(self, max_iter=50, max_modes=5):
+        """Set transients to steady state at current time, with consistent modes."""
+        t = self.time
+        y = self._state()
+        for _ in range(max_modes):
+            for iteration in range(max_iter):
+                f = self._rhs(y, t)
+                dy = self._solve(self._jacobian(y, t, f), -f)
+                y = y + dy
+                self.stats["newton"] += 1
+                if numpy.all(abs(dy) <= self.atol + self.rtol * abs(y)):
+                    break
+            else:
+                raise RuntimeError(f"Steady state not found at t = {t} in {max_iter} Newton iterations")
+            self._rhs(y, t)
+            self.owner.tree_init_mode()
+            if iteration == 0:
+                return
+        raise RuntimeError(f"Steady state at t = {t}: modes not consistent after {max_modes} solves")
+
+    @staticmethod
+    def _interpolate(step, t):
+        """State at time `t` within internal `step`, by cubic Hermite interpolation."""
+        t0, y0, f0, t1, y1, f1 = step
+        h = t1 - t0
+        s = (t - t0) / h
+        return (
+            (1 - s) ** 2 * ((1 + 2 * s) * y0 + s * h * f0)
+            + s**2 * ((3 - 2 * s) * y1 - (1 - s) * h * f1)
+        )
+
+    def _dense(self, t):
+        """State at time `t` interpolated within internal steps of last output step, or None."""
+        for step in self._steps:
+            if step[0] <= t <= step[3] and step[3] > step[0]:
+                return self._interpolate(step, t)
+        return None
+
+    def _update_transients(self, dt: float) -> None:
+        """
+        Time integration of transient variables over output step `dt`: internal
+        steps are taken until one covers the end of the output step, where the
+        state is interpolated.
+        """
+        if len(self._transients) == 0:
+            return
+        self._locating = False
+        t_end = self.time + dt
+        step = self._steps[-1] if self._steps else None
+        if step is None or not step[0] <= self.time <= step[3]:
+            y, f = self._state(), self._derivatives()
+            step = (self.time, y, f, self.time, y, f)
+        steps = [step]
+        t, y, f = step[3:]
+        t_stop = self.time_interval[1]
+        if self._jac is None or self._jac.shape[0] * self._jac.shape[1] != y.size:
+            self._jac = self._jacobian(y, t, f)
+        jac = self._jac
+        h_try = self._h or dt
+        identity = numpy.eye(self._jac.shape[1])
+
+        while t < t_end - 1e-12 * dt:
+            h = min(h_try, t_stop - t)
+            last = t + h >= t_stop - 1e-12 * dt
+            t_new = t_stop if last else t + h
+            matrix = identity - self.gamma * h * jac
+            k1 = self._solve(matrix, f)
+            f1 = self._rhs(y + h * k1, t_new)
+            k2 = self._solve(matrix, f1 - 2 * k1)
+            y_new = y + h * (1.5 * k1 + 0.5 * k2)
+
+            scale = self.atol + self.rtol * numpy.maximum(abs(y), abs(y_new))
+            error = numpy.max(numpy.sqrt(numpy.mean(self._blocks(0.5 * h * (k1 + k2) / scale) ** 2, axis=0)))
+            factor = min(5.0, max(0.2, 0.9 / numpy.sqrt(max(error, 1e-10))))
+
+            if error > 1:
+                self.stats["rejected"] += 1
+                h_try = h * factor
+                jac = self._jac = self._jacobian(y, t, f)
+                continue
+
+            self.stats["steps"] += 1
+            h_try = max(h_try, h * factor) if h < h_try else h * factor
+            f_new = self._rhs(y_new, t_new)
+            steps.append((t, y, f, t_new, y_new, f_new))
+            t, y, f = t_new, y_new, f_new
+
+        self._h = h_try
+        self._steps = steps
+        self._locating = True
+        # state at t_end is computed by the calling time loop
+        self._set_state(y if abs(t - t_end) <= 1e-12 * dt else self._interpolate(steps[-1], t_end))
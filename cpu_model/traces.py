@@ -0,0 +1,170 @@
+import time
+
+import numpy
+from cosapp.base import System
+
+from cpu_transient import make_system
+
+
+class Trace:
+    """
+    Time series, linearly interpolated in time, for replaying recorded
+    telemetry (CPU usage, ambient temperature...) in transient simulations.
+
+    Values are either sampled at a constant `step` from `start` (e.g. 1 s
+    telemetry), or at given `times`, in increasing order. Arrays read from
+    `.npy` files are memory mapped: only the pages around the current time
+    are loaded, and traces of millions of samples are never copied.
+
+    Samples bracketing the last evaluated time are kept as a cursor: time
+    steps moving forward or backward by less than a sample interval need no
+    search, and the index is only searched for when time jumps. Outside
+    the trace, end values are held.
+
+    Parameters
+    ----------
+    values : str or array_like
+        Samples, or path to a `.npy` file
+    times : str or array_like, optional
+        Sample times, or path to a `.npy` file; if None (default),
+        samples are evenly spaced by `step`
+    start, step : float
+        Time of first sample, and sampling interval (without `times`)
+    column : int, optional
+        Column of 2D `values` to use (e.g. one CPU out of a fleet)
+
+    Examples
+    --------
+    >>> use = Trace("use.npy", step=1.0)
+    >>> use(3600.5)
+    """
+
+    def __init__(self, values, times=None, start=0.0, step=1.0, column=None):
+        self.values = self._load(values)
+        if column is not None:
+            self.values = self.values[:, column]
+        self.times = None if times is None else self._load(times)
+        if self.times is not None and len(self.times) != len(self.values):
+            raise ValueError("Trace times and values must have the same length")
+        if len(self.values) < 2:
+            raise ValueError("Trace must have at least two samples")
+        self.start = float(start if self.times is None else self.times[0])
+        self.step = step
+        self._i = 0
+        self._t = (self.start, self.start if self.times is None else float(self.times[1]))
+
+    @staticmethod
+    def _load(data):
+        if isinstance(data, str):
+            return numpy.load(data, mmap_mode="r")
+        return numpy.asarray(data, dtype=float)
+
+    @classmethod
+    def from_parquet(cls, path, column, time_column=None, **kwargs):
+        """Trace of `column` in Parquet file `path`, with times in `time_column` if given (requires `pyarrow`)."""
+        import pyarrow.parquet as pq
+
+        columns = [column] if time_column is None else [column, time_column]
+        table = pq.read_table(path, columns=columns, memory_map=True)
+        times = None if time_column is None else table.column(time_column).to_numpy()
+        return cls(table.column(column).to_numpy(), times=times, **kwargs)
+
+    @property
+    def end(self):
+        """Time of last sample."""
+        if self.times is None:
+            return self.start + (len(self.values) - 1) * self.step
+        return float(self.times[-1])
+
+    def _locate(self, t):
+        """Index `i` of the sample interval `[t_i, t_i+1)` containing `t`."""
+        t_i, t_next = self._t
+        i = self._i
+        if t_i <= t < t_next:
+            return i
+        n = len(self.values)
+        if self.times is None:
+            i = min(max(int((t - self.start) / self.step), 0), n - 2)
+            self._t = (self.start + i * self.step, self.start + (i + 1) * self.step)
+        else:
+            times = self.times
+            if i + 2 < n and t_next <= t < times[i + 2]:
+                i += 1
+            elif 0 < i and times[i - 1] <= t < t_i:
+                i -= 1
+            else:
+                i = min(max(int(numpy.searchsorted(times, t, side="right")) - 1, 0), n - 2)
+            self._t = (float(times[i]), float(times[i + 1]))
+        self._i = i
+        return i
+
+    def __call__(self, t):
+        """Value at time `t`."""
+        i = self._locate(t)
+        t_i, t_next = self._t
+        w = min(max((t - t_i) / (t_next - t_i), 0.0), 1.0)
+        v_i = float(self.values[i])
+        return v_i + w * (float(self.values[i + 1]) - v_i)
+
+
+class TracedCPU(System):
+    """
+    `CPUSystem` (see `cpu_transient.make_system`) with inwards replayed from
+    traces, typically usage `use` and ambient temperature `T_amb`.
+
+    Traces are applied as time boundary conditions of the time driver, with
+    `driver.set_scenario(values=system.trace_values())`: they are then
+    evaluated at each time set by the driver, including intermediate stages.
+
+    Options
+    -------
+    traces : dict[str, Trace]
+        Traces, by name of `CPUSystem` inward
+    law : str
+        Fan control law (see `Control`)
+    """
+
+    def setup(self, traces, law="linear"):
+        self.add_property("traces", dict(traces))
+        self.add_child(make_system("cpu", law=law))
+
+    def trace_values(self):
+        """Scenario values setting `cpu` inwards from traces."""
+        return {f"cpu.{name}": f"traces[{name!r}](t)" for name in self.traces}
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    from cosapp.drivers import NonLinearSolver
+    from cosapp.recorders import DataFrameRecorder
+
+    from rosenbrock import Rosenbrock
+
+    # one day of synthetic 1 s telemetry: noisy daily usage pattern and ambient temperature
+    rng = numpy.random.default_rng(0)
+    t = numpy.arange(86400.0)
+    use = numpy.clip(0.5 - 0.3 * numpy.cos(2 * numpy.pi * t / 86400) + 0.1 * rng.standard_normal(t.size), 0, 1)
+    T_amb = 20 + 5 * numpy.sin(2 * numpy.pi * (t / 86400 - 0.25))
+
+    with tempfile.TemporaryDirectory() as folder:
+        numpy.save(os.path.join(folder, "use.npy"), use)
+        numpy.save(os.path.join(folder, "T_amb.npy"), T_amb)
+
+        system = TracedCPU(
+            "system",
+            traces={name: Trace(os.path.join(folder, f"{name}.npy"), step=1.0) for name in ("use", "T_amb")},
+        )
+        driver = system.add_driver(Rosenbrock("Rosenbrock", rtol=1e-4, atol=1e-2, dt=60.0))
+        driver.add_child(NonLinearSolver("NLsolver"))
+        driver.time_interval = (36000, 36600)
+        driver.set_scenario(init={"cpu.T_cpu": 40.0, "cpu.hsink.T_metal": 35.0}, values=system.trace_values())
+        rec = driver.add_recorder(DataFrameRecorder(includes=["cpu.use", "cpu.T_amb", "cpu.T_cpu"]))
+
+        start = time.perf_counter()
+        system.run_drivers()
+        elapsed = time.perf_counter() - start
+
+    print(rec.export_data()[["time", "cpu.use", "cpu.T_amb", "cpu.T_cpu"]].iloc[::2])
+    print(f"10 minutes of 1 s trace: {elapsed:.2f} s ({driver.stats['steps']} steps)")
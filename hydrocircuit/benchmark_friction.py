@@ -0,0 +1,70 @@
+"""
+Accuracy and cost of friction models.
+
+1. Relative error of each explicit/internal friction law against Colebrook
+   correlation (solved to machine precision), over the turbulent part of
+   the Moody chart.
+2. Wall time and `PipeFluid.compute` calls per `HydroCircuit` solve, for
+   each `friction_model` option, with speedup relative to the nested
+   `friction_solver` ("solver").
+
+Run from `hydrocircuit` folder: `python benchmark_friction.py`
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from circuit import HydroCircuit
+from components.friction import FRICTION_MODELS, colebrook_newton
+from components.frictiontable import shared_table
+
+
+def accuracy_table():
+    Re, eps = np.meshgrid(np.logspace(np.log10(4e3), 8, 200), np.r_[0, np.logspace(-6, np.log10(0.05), 49)])
+    fd_ref = colebrook_newton(eps, Re, tol=1e-15)
+
+    rows = []
+    for name, law in {**FRICTION_MODELS, "table": shared_table()}.items():
+        error = np.abs(law(eps, Re) / fd_ref - 1)
+        rows.append({"model": name, "max_rel_error": error.max(), "mean_rel_error": error.mean()})
+
+    return pd.DataFrame(rows).set_index("model")
+
+
+def solve_circuit(friction_model, repeat=5):
+    elapsed = []
+    for _ in range(repeat):
+        s = HydroCircuit("system", friction_model=friction_model)
+        s.water.density = 1e3
+        s.water.kin_viscosity = 1e-6
+        s.piping.res_in.level = 10
+        s.piping.pipe_2.diameter = 0.5
+
+        start = time.perf_counter()
+        s.run_drivers()
+        elapsed.append(time.perf_counter() - start)
+
+    return {
+        "model": friction_model,
+        "time_per_solve": min(elapsed),
+        "pipe_computes": s.piping.pipe_1.fluid.compute_calls,
+        "mass_flow": s.piping.mass_flow,
+        "fd_pipe_1": s.piping.pipe_1.fluid.fd,
+    }
+
+
+def speed_table():
+    df = pd.DataFrame([solve_circuit(name) for name in ["solver", *FRICTION_MODELS, "table"]]).set_index("model")
+    df["speedup"] = df.loc["solver", "time_per_solve"] / df["time_per_solve"]
+    df["mass_flow_rel_error"] = np.abs(df["mass_flow"] / df.loc["solver", "mass_flow"] - 1)
+    return df
+
+
+if __name__ == "__main__":
+    with pd.option_context("display.width", 200, "display.max_columns", 20):
+        print("Accuracy against Colebrook correlation")
+        print(accuracy_table())
+        print()
+        print("Cost per HydroCircuit solve")
+        print(speed_table())
@@ -0,0 +1,55 @@
+"""
+Cost of `Network` solves for square grids of pipes fed by a single reservoir,
+showing that the time per iteration grows linearly with the number of pipes.
+
+Run from `hydrocircuit` folder: `python benchmark_network.py`
+"""
+import time
+
+import pandas as pd
+
+from components.pipe import Pipe
+from network import Network
+
+
+def grid_network(n, demand=2.0):
+    """n x n grid of 100 m pipes, with `demand` (kg/s) at each junction."""
+    net = Network()
+    net.add_reservoir("R", level=50)
+    for i in range(n):
+        for j in range(n):
+            net.add_junction(f"{i},{j}", demand=demand)
+
+    net.add_edge("R", "0,0", Pipe("feed"))
+    for i in range(n):
+        for j in range(n):
+            for end in [(i + 1, j), (i, j + 1)]:
+                if max(end) < n:
+                    pipe = Pipe(f"pipe_{i}_{j}_{end[0]}_{end[1]}", friction_model="colebrook")
+                    pipe.diameter = 0.3
+                    pipe.length = 100
+                    pipe.roughness = 1e-4
+                    net.add_edge(f"{i},{j}", "{},{}".format(*end), pipe)
+    return net
+
+
+if __name__ == "__main__":
+    rows = []
+    for n in [5, 10, 20, 30]:
+        start = time.perf_counter()
+        net = grid_network(n)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        iterations = net.solve()
+        elapsed = time.perf_counter() - start
+
+        rows.append({
+            "pipes": len(net.edges),
+            "build_time": build,
+            "iterations": iterations,
+            "time_per_iteration": elapsed / iterations,
+            "time_per_iteration_per_pipe": elapsed / iterations / len(net.edges),
+        })
+
+    print(pd.DataFrame(rows).set_index("pipes"))
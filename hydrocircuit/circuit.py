@@ -0,0 +1,92 @@
+from cosapp.base import System
+from cosapp.drivers import NonLinearSolver
+
+from components.jacobian import AnalyticJacobian
+from components.pipe import Pipe
+from components.reservoir import IntakeReservoir, DischargeReservoir
+from components.pump import Pump
+from components.curvepump import CurvePump
+from components.fluid import Fluid
+
+
+class Circuit(System):
+    """
+    Hydraulic chain `IntakeReservoir -> Pipe -> Pump -> Pipe -> DischargeReservoir`,
+    solving for the `mass_flow` balancing the discharge reservoir pressure.
+
+    Options
+    -------
+    friction_model : str
+        Friction law used by both pipes (see `PipeFluid`); default "solver".
+    analytic_jacobian : bool
+        If True (default), `circuit_solver` uses the analytic Jacobian given by
+        `jacobian`, instead of finite differences.
+    pump_curve : str or PumpCurve, optional
+        If given, the constant-power `Pump` is replaced by a variable-speed
+        `CurvePump` with this curve (CSV file path or `PumpCurve` object).
+    """
+
+    def setup(self, friction_model="solver", analytic_jacobian=True, pump_curve=None):
+        # setting systems
+        self.add_child(IntakeReservoir("res_in"), pulling=["density", "gravity", "atmosphere"])
+        self.add_child(Pipe("pipe_1", friction_model=friction_model), pulling=["kin_viscosity", "density", "mass_flow"])
+        if pump_curve is None:
+            self.add_child(Pump("pump"), pulling=["density", "mass_flow"])
+        else:
+            self.add_child(CurvePump("pump", curve=pump_curve), pulling=["density", "mass_flow", "gravity"])
+        self.add_child(Pipe("pipe_2", friction_model=friction_model), pulling=["kin_viscosity", "density", "mass_flow"])
+        self.add_child(DischargeReservoir("res_out"), pulling=["density", "gravity", "atmosphere"])
+
+        # connecting
+        self.connect(self.res_in.outwards, self.pipe_1.inwards, {"pressure_out": "pressure_in"})
+        self.connect(self.pipe_1.outwards, self.pump.inwards, {"pressure_out": "pressure_in"})
+        self.connect(self.pump.outwards, self.pipe_2.inwards, {"pressure_out": "pressure_in"})
+        self.connect(self.pipe_2.outwards, self.res_out.inwards, {"pressure_out": "pressure_in"})
+
+        self.add_unknown("mass_flow")
+        if analytic_jacobian:
+            self.add_driver(NonLinearSolver("circuit_solver", jac=AnalyticJacobian(self.jacobian)))
+        else:
+            self.add_driver(NonLinearSolver("circuit_solver"))
+
+    def compute(self):
+        pass
+
+    def jacobian(self):
+        """
+        Derivative of `res_out.p_diff` w.r.t. `mass_flow`, by chain rule
+        along the pipes and pump (intake pressure is independent of mass flow).
+        """
+        dp_dm = 0.0
+        for component in (self.pipe_1, self.pump, self.pipe_2):
+            partials = component.partials()
+            dp_dm = partials[("pressure_out", "pressure_in")] * dp_dm + partials[("pressure_out", "mass_flow")]
+
+        return [[self.res_out.partials()[("p_diff", "pressure_in")] * dp_dm]]
+
+
+class HydroCircuit(System):
+    """
+    `Circuit` filled with a `Fluid`.
+
+    Options
+    -------
+    friction_model : str
+        Friction law used by all pipes (see `PipeFluid`); default "solver".
+    analytic_jacobian : bool
+        Use analytic Jacobian in `circuit_solver` (see `Circuit`); default True.
+    pump_curve : str or PumpCurve, optional
+        Curve of a variable-speed `CurvePump` (see `Circuit`).
+    fluid : str or FluidTable, optional
+        Property table of `water` sub-system, making its properties depend
+        on its `temperature` inward (see `Fluid`).
+    """
+
+    def setup(self, friction_model="solver", analytic_jacobian=True, pump_curve=None, fluid=None):
+        self.add_child(Fluid('water', table=fluid))  # computed before `piping`
+        self.add_child(Circuit('piping', friction_model=friction_model, analytic_jacobian=analytic_jacobian, pump_curve=pump_curve))
+
+        self.connect(self.piping.inwards, self.water.outwards, ['density', 'kin_viscosity'])
+
+    def compute(self):
+        pass
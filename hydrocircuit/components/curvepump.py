@@ -0,0 +1,213 @@
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from cosapp.base import System
+from scipy.interpolate import PchipInterpolator
+
+# efficiency floor used for shaft power, near shut-off
+MIN_EFFICIENCY = 0.01
+
+
+class PumpCurve:
+    """
+    Head and efficiency curves of a pump at rated speed, as functions of
+    volume flow, interpolated by monotone (PCHIP) cubic splines.
+
+    Splines and the best efficiency point (BEP) are computed once at
+    construction. Other speeds are obtained by affinity laws, with the
+    speed ratio `n = N / N_rated`:
+
+        Q(n) = n Q0,  H(n) = n^2 H0(Q / n),  eta(n) = eta0(Q / n)
+
+    All methods accept arrays of flows and speed ratios (broadcast together).
+    Outside of the tabulated flow range, splines are extrapolated.
+
+    Parameters
+    ----------
+    flow : array_like
+        Volume flows in m**3/s, in increasing order
+    head : array_like
+        Pump head in metres
+    efficiency : array_like
+        Pump efficiency (hydraulic power / shaft power)
+    """
+
+    def __init__(self, flow, head, efficiency):
+        flow = np.asarray(flow, dtype=float)
+        if np.any(np.diff(flow) <= 0):
+            raise ValueError("Pump curve flows must be strictly increasing")
+        self.flow = flow
+        self._head = PchipInterpolator(flow, np.asarray(head, dtype=float))
+        self._head_slope = self._head.derivative()
+        self._efficiency = PchipInterpolator(flow, np.asarray(efficiency, dtype=float))
+
+        # BEP: maximum of efficiency spline, among its stationary points and curve ends
+        candidates = np.r_[flow[[0, -1]], self._efficiency.derivative().roots(extrapolate=False)]
+        self.bep_flow = float(candidates[np.argmax(self._efficiency(candidates))])
+        self.bep_head = float(self._head(self.bep_flow))
+        self.bep_efficiency = float(self._efficiency(self.bep_flow))
+
+    @classmethod
+    def from_csv(cls, path):
+        """Read curve from CSV file `path`, with columns `flow`, `head` and `efficiency`."""
+        data = pd.read_csv(path).sort_values("flow")
+        return cls(data["flow"], data["head"], data["efficiency"])
+
+    def head(self, flow, speed_ratio=1.0):
+        """Pump head (m) at volume flow `flow` (m**3/s) and speed ratio `speed_ratio`."""
+        n = np.asarray(speed_ratio, dtype=float)
+        return n**2 * self._head(np.asarray(flow, dtype=float) / n)
+
+    def head_slope(self, flow, speed_ratio=1.0):
+        """Derivative `dH/dQ` of pump head w.r.t. volume flow."""
+        n = np.asarray(speed_ratio, dtype=float)
+        return n * self._head_slope(np.asarray(flow, dtype=float) / n)
+
+    def efficiency(self, flow, speed_ratio=1.0):
+        """Pump efficiency at volume flow `flow` (m**3/s) and speed ratio `speed_ratio`."""
+        return self._efficiency(np.asarray(flow, dtype=float) / np.asarray(speed_ratio, dtype=float))
+
+
+@lru_cache(maxsize=32)
+def _read_curve(path, mtime):
+    return PumpCurve.from_csv(path)
+
+
+def load_curve(path):
+    """
+    `PumpCurve` read from CSV file `path`. Curves are cached by file, so that
+    splines are fitted once for all pumps sharing a curve; a file is read
+    again if it has been modified.
+    """
+    path = os.path.realpath(path)
+    return _read_curve(path, os.stat(path).st_mtime_ns)
+
+
+class CurvePump(System):
+    """
+    Pump defined by manufacturer head and efficiency curves (see `PumpCurve`),
+    running at variable speed.
+
+    Inwards
+    -------
+    speed_ratio : float
+        Pump speed relative to the rated speed of the curves
+    pressure_in : float
+        Inlet pressure
+    mass_flow : float
+        Fluid mass flow
+    density : float
+        Fluid density
+    gravity : float
+        Gravity acceleration
+
+    Outwards
+    --------
+    volume_flow : float
+        Fluid volume flow
+    head : float
+        Pump head, from the curve scaled by affinity laws
+    pressure_out : float
+        Outlet pressure, `pressure_in + density * gravity * head`
+    efficiency : float
+        Pump efficiency
+    hydraulic_power : float
+        Power transmitted to the fluid
+    shaft_power : float
+        Power absorbed by the pump, `hydraulic_power / efficiency`; efficiency
+        is floored at `MIN_EFFICIENCY` near shut-off.
+    bep_flow : float
+        Volume flow at best efficiency point, at current speed
+    bep_ratio : float
+        Ratio of volume flow to BEP flow
+
+    Options
+    -------
+    curve : str or PumpCurve
+        Path of a CSV curve file (see `PumpCurve.from_csv`), or curve object.
+    """
+
+    def setup(self, curve):
+        self.add_property("curve", curve if isinstance(curve, PumpCurve) else load_curve(curve))
+
+        self.add_inward("speed_ratio", 1.0, unit="", desc="Pump speed relative to rated speed")
+        self.add_inward("pressure_in", 0.0, unit="Pa", desc="Inlet pressure")
+        self.add_inward("mass_flow", 1.0, unit="kg/s", desc="Fluid mass flow")
+        self.add_inward("density", 1e3, unit="kg/m**3", desc="Fluid density")
+        self.add_inward("gravity", 9.81, unit="m/s**2", desc="Gravity acceleration")
+
+        self.add_outward("volume_flow", 0.0, unit="m**3/s", desc="Fluid volume flow")
+        self.add_outward("head", 0.0, unit="m", desc="Pump head")
+        self.add_outward("pressure_out", 0.0, unit="Pa", desc="Outlet pressure")
+        self.add_outward("efficiency", 0.0, unit="", desc="Pump efficiency")
+        self.add_outward("hydraulic_power", 0.0, unit="W", desc="Power transmitted to fluid")
+        self.add_outward("shaft_power", 0.0, unit="W", desc="Power absorbed by pump")
+        self.add_outward("bep_flow", 0.0, unit="m**3/s", desc="Best efficiency flow at current speed")
+        self.add_outward("bep_ratio", 0.0, unit="", desc="Volume flow relative to best efficiency flow")
+
+    def compute(self):
+        results = self.compute_batch(
+            self.curve, self.mass_flow, self.speed_ratio, self.pressure_in, self.density, self.gravity
+        )
+        for name, value in results.items():
+            setattr(self, name, float(value))
+
+    def partials(self):
+        """
+        Analytic partial derivatives of `pressure_out` w.r.t. inwards at current state,
+        as a dictionary `{(outward, inward): derivative}`.
+        """
+        n, q = self.speed_ratio, self.volume_flow
+        slope = float(self.curve.head_slope(q, n))
+        rho_g = self.density * self.gravity
+
+        return {
+            ("pressure_out", "pressure_in"): 1.0,
+            ("pressure_out", "mass_flow"): self.gravity * slope,
+            ("pressure_out", "speed_ratio"): rho_g * (2 * self.head - q * slope) / n,
+            ("pressure_out", "density"): self.gravity * (self.head - q * slope),
+            ("pressure_out", "gravity"): self.density * self.head,
+        }
+
+    @staticmethod
+    def compute_batch(curve, mass_flow, speed_ratio=1.0, pressure_in=0.0, density=1e3, gravity=9.81):
+        """
+        Vectorized counterpart of `compute`, for arrays of operating points.
+
+        Parameters
+        ----------
+        curve : str or PumpCurve
+            Pump curve, or path of its CSV file
+        mass_flow, speed_ratio, pressure_in, density, gravity : array_like
+            Same meaning and units as the inwards of the component,
+            broadcast together
+
+        Returns
+        -------
+        dict[str, ndarray]
+            Arrays of all outwards of the component
+        """
+        if not isinstance(curve, PumpCurve):
+            curve = load_curve(curve)
+        n = np.asarray(speed_ratio, dtype=float)
+        density = np.asarray(density, dtype=float)
+        gravity = np.asarray(gravity, dtype=float)
+
+        volume_flow = np.asarray(mass_flow, dtype=float) / density
+        head = curve.head(volume_flow, n)
+        efficiency = curve.efficiency(volume_flow, n)
+        hydraulic_power = density * gravity * volume_flow * head
+        bep_flow = n * curve.bep_flow
+
+        return {
+            "volume_flow": volume_flow,
+            "head": head,
+            "pressure_out": pressure_in + density * gravity * head,
+            "efficiency": efficiency,
+            "hydraulic_power": hydraulic_power,
+            "shaft_power": hydraulic_power / np.maximum(efficiency, MIN_EFFICIENCY),
+            "bep_flow": bep_flow,
+            "bep_ratio": volume_flow / bep_flow,
+        }
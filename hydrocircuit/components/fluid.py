@@ -1,9 +1,45 @@
 from cosapp.base import System
 
+from .fluidtables import get_fluid
+
 
 class Fluid(System):
-    def setup(self):
+    """
+    Fluid properties, either set directly, or interpolated against
+    `temperature` in a `FluidTable`.
+
+    Inwards
+    -------
+    temperature : float
+        Fluid temperature, in degC (only with a `table`)
+
+    Outwards
+    --------
+    density : float
+        Fluid density
+    kin_viscosity : float
+        Fluid kinematic viscosity
+
+    Options
+    -------
+    table : str or FluidTable, optional
+        Property table: one of `fluidtables.FLUIDS` ("water",
+        "ethylene_glycol_30", "ethylene_glycol_50", "propylene_glycol_30",
+        "propylene_glycol_50") or a `FluidTable` instance. If None (default),
+        outwards keep the values they are given.
+    """
+
+    def setup(self, table=None):
+        self.add_property("table", None if table is None else get_fluid(table))
+
         self.add_outward("density", value=1e3, unit="kg/m**3", desc="fluid density")
         self.add_outward(
             "kin_viscosity", value=1e-6, unit="m**2/s", desc="fluid kinematic viscosity"
         )
+
+        if table is not None:
+            self.add_inward("temperature", 20.0, unit="degC", desc="Fluid temperature")
+
+    def compute(self):
+        if self.table is not None:
+            self.density, self.kin_viscosity = self.table(self.temperature)
@@ -0,0 +1,117 @@
+from functools import lru_cache
+
+import numpy as np
+
+
+class FluidTable:
+    """
+    Temperature-dependent fluid properties, interpolated in tabulated data.
+
+    Density is interpolated linearly in temperature, and kinematic viscosity
+    log-linearly, which follows its near-exponential decrease with
+    temperature. Instances are called as `table(temperature)`, returning
+    `(density, kin_viscosity)`: arrays are interpolated at once, and scalar
+    lookups are memoized, so that repeated evaluations at the same
+    temperature cost a dictionary access.
+
+    Parameters
+    ----------
+    temperature : array_like
+        Temperatures in degC, in increasing order
+    density : array_like
+        Density in kg/m**3
+    kin_viscosity : array_like
+        Kinematic viscosity in m**2/s
+    memo_size : int
+        Number of scalar lookups kept in cache
+    """
+
+    def __init__(self, temperature, density, kin_viscosity, memo_size=256):
+        self.temperature = np.asarray(temperature, dtype=float)
+        if np.any(np.diff(self.temperature) <= 0):
+            raise ValueError("Table temperatures must be strictly increasing")
+        self._density = np.asarray(density, dtype=float)
+        self._log_viscosity = np.log(np.asarray(kin_viscosity, dtype=float))
+        self._lookup = lru_cache(maxsize=memo_size)(self._interpolate)
+
+    @classmethod
+    def from_dynamic_viscosity(cls, temperature, density, viscosity, **kwargs):
+        """Table from dynamic viscosity `viscosity` in Pa.s."""
+        return cls(temperature, density, np.asarray(viscosity) / np.asarray(density), **kwargs)
+
+    @property
+    def range(self):
+        """Temperature range of the table, in degC."""
+        return self.temperature[0], self.temperature[-1]
+
+    def _interpolate(self, temperature):
+        t_min, t_max = self.range
+        if np.any((temperature < t_min) | (temperature > t_max)):
+            raise ValueError(f"Temperature out of table range [{t_min}, {t_max}] degC")
+        density = np.interp(temperature, self.temperature, self._density)
+        kin_viscosity = np.exp(np.interp(temperature, self.temperature, self._log_viscosity))
+        return density, kin_viscosity
+
+    def __call__(self, temperature):
+        """Density (kg/m**3) and kinematic viscosity (m**2/s) at `temperature` (degC)."""
+        if np.ndim(temperature) == 0:
+            return self._lookup(float(temperature))
+        return self._interpolate(np.asarray(temperature, dtype=float))
+
+    def density(self, temperature):
+        """Density (kg/m**3) at `temperature` (degC)."""
+        return self(temperature)[0]
+
+    def kin_viscosity(self, temperature):
+        """Kinematic viscosity (m**2/s) at `temperature` (degC)."""
+        return self(temperature)[1]
+
+
+# Built-in tables: temperature (degC), density (kg/m**3), dynamic viscosity (mPa.s).
+# Water from IAPWS reference values; glycol mixtures (concentration by mass)
+# are rounded representative values, to be replaced by vendor data for design.
+_DATA = {
+    "water": (
+        [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100],
+        [999.8, 999.7, 998.2, 995.7, 992.2, 988.0, 983.2, 977.8, 971.8, 965.3, 958.4],
+        [1.792, 1.306, 1.002, 0.797, 0.653, 0.547, 0.466, 0.404, 0.354, 0.315, 0.282],
+    ),
+    "ethylene_glycol_30": (
+        [-10, 0, 20, 40, 60, 80, 100],
+        [1052, 1050, 1043, 1034, 1023, 1010, 996],
+        [5.1, 3.6, 2.1, 1.4, 0.97, 0.72, 0.56],
+    ),
+    "ethylene_glycol_50": (
+        [-30, -20, -10, 0, 20, 40, 60, 80, 100],
+        [1092, 1089, 1086, 1082, 1073, 1062, 1050, 1036, 1020],
+        [29, 16, 9.9, 6.8, 3.5, 2.1, 1.4, 1.0, 0.78],
+    ),
+    "propylene_glycol_30": (
+        [-10, 0, 20, 40, 60, 80, 100],
+        [1036, 1033, 1026, 1016, 1004, 990, 975],
+        [8.9, 5.6, 2.6, 1.5, 0.96, 0.67, 0.50],
+    ),
+    "propylene_glycol_50": (
+        [-30, -20, -10, 0, 20, 40, 60, 80, 100],
+        [1058, 1055, 1051, 1047, 1038, 1026, 1013, 998, 982],
+        [110, 52, 26, 14, 5.9, 2.9, 1.7, 1.1, 0.78],
+    ),
+}
+
+FLUIDS = {
+    name: FluidTable.from_dynamic_viscosity(temperature, density, np.asarray(viscosity) * 1e-3)
+    for name, (temperature, density, viscosity) in _DATA.items()
+}
+
+
+def get_fluid(name):
+    """
+    Returns built-in fluid table `name`, among `FLUIDS`;
+    `FluidTable` instances are returned as is.
+    """
+    if isinstance(name, FluidTable):
+        return name
+    try:
+        return FLUIDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown fluid {name!r}; must be one of {sorted(FLUIDS)}")
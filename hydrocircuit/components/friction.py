@@ -0,0 +1,223 @@
+import numpy as np
+
+
+def colebrook_newton(rel_roughness, reynolds, tol=1e-12, max_iter=50):
+    """
+    Solve Colebrook correlation for arrays of operating points at once.
+
+    The implicit equation is written in terms of `x = 1/sqrt(f)`:
+
+        g(x) = x + 2 log10(A + B x) = 0,  A = (e/D)/3.7,  B = 2.51/Re
+
+    and solved by a vectorized Newton iteration, started from Swamee-Jain
+    explicit approximation. All points are iterated together; points that
+    have converged are simply left unchanged by the following iterations.
+
+    Parameters
+    ----------
+    rel_roughness : array_like
+        Relative wall roughness `e/D`
+    reynolds : array_like
+        Flow Reynolds number (turbulent, strictly positive)
+    tol : float
+        Tolerance on the relative Newton update of `x`
+    max_iter : int
+        Maximum number of Newton iterations
+
+    Returns
+    -------
+    fd : ndarray
+        Darcy friction factor, broadcast to the shape of inputs
+    """
+    eps, Re = np.broadcast_arrays(
+        np.asarray(rel_roughness, dtype=float), np.asarray(reynolds, dtype=float)
+    )
+    A = eps / 3.7
+    B = 2.51 / Re
+
+    # Swamee-Jain first guess
+    x = -2 * np.log10(A + 5.74 / Re**0.9)
+
+    for _ in range(max_iter):
+        AB = A + B * x
+        g = x + 2 * np.log10(AB)
+        dg = 1 + 2 * B / (AB * np.log(10))
+        dx = g / dg
+        x = x - dx
+        if np.all(np.abs(dx) <= tol * np.abs(x)):
+            break
+
+    return 1 / x**2
+
+
+def colebrook_fixed_point(rel_roughness, reynolds, tol=1e-12, max_iter=100):
+    """
+    Solve Colebrook correlation by fixed-point iteration on `x = 1/sqrt(f)`:
+
+        x <- -2 log10(A + B x),  A = (e/D)/3.7,  B = 2.51/Re
+
+    The iteration is a contraction for turbulent flows, and converges
+    linearly from Swamee-Jain first guess. Same arguments as `colebrook_newton`.
+    """
+    eps, Re = np.broadcast_arrays(
+        np.asarray(rel_roughness, dtype=float), np.asarray(reynolds, dtype=float)
+    )
+    A = eps / 3.7
+    B = 2.51 / Re
+
+    x = -2 * np.log10(A + 5.74 / Re**0.9)
+
+    for _ in range(max_iter):
+        x_new = -2 * np.log10(A + B * x)
+        converged = np.all(np.abs(x_new - x) <= tol * np.abs(x_new))
+        x = x_new
+        if converged:
+            break
+
+    return 1 / x**2
+
+
+def haaland(rel_roughness, reynolds):
+    """Haaland explicit approximation of Colebrook correlation."""
+    x = -1.8 * np.log10((rel_roughness / 3.7) ** 1.11 + 6.9 / reynolds)
+    return 1 / x**2
+
+
+def swamee_jain(rel_roughness, reynolds):
+    """Swamee-Jain explicit approximation of Colebrook correlation."""
+    x = -2 * np.log10(rel_roughness / 3.7 + 5.74 / reynolds**0.9)
+    return 1 / x**2
+
+
+def serghides(rel_roughness, reynolds):
+    """Serghides explicit approximation of Colebrook correlation
+    (Steffensen acceleration of three fixed-point iterations)."""
+    A = -2 * np.log10(rel_roughness / 3.7 + 12 / reynolds)
+    B = -2 * np.log10(rel_roughness / 3.7 + 2.51 * A / reynolds)
+    C = -2 * np.log10(rel_roughness / 3.7 + 2.51 * B / reynolds)
+    x = A - (B - A) ** 2 / (C - 2 * B + A)
+    return 1 / x**2
+
+
+# turbulent friction laws, with signature `law(rel_roughness, reynolds)`
+FRICTION_MODELS = {
+    "colebrook": colebrook_newton,
+    "colebrook_fixed_point": colebrook_fixed_point,
+    "haaland": haaland,
+    "swamee_jain": swamee_jain,
+    "serghides": serghides,
+}
+
+
+def get_friction_model(name):
+    """
+    Returns turbulent friction law `name`, among `FRICTION_MODELS`.
+    Name "table" refers to the process-wide `FrictionTable`; callables
+    (such as `FrictionTable` instances) are returned as is.
+    """
+    if callable(name):
+        return name
+    if name == "table":
+        from .frictiontable import shared_table
+
+        return shared_table()
+    try:
+        return FRICTION_MODELS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown friction model {name!r}; must be one of {sorted(FRICTION_MODELS) + ['table']}"
+        )
+
+
+def darcy_friction(reynolds, roughness, diameter, laminar_limit=3000, model="colebrook"):
+    """
+    Darcy friction factor for arrays of operating points.
+
+    Same law as `FrictionFactor` and `PipeFluid`: `fd = 64/Re` when
+    `Re < laminar_limit`, turbulent friction law `model` otherwise.
+
+    Parameters
+    ----------
+    reynolds : array_like
+        Flow Reynolds number
+    roughness : array_like
+        Pipe wall roughness in metres
+    diameter : array_like
+        Pipe diameter in metres
+    laminar_limit : float
+        Reynolds number below which the flow is considered laminar
+    model : str or callable
+        Turbulent friction law (see `get_friction_model`)
+
+    Returns
+    -------
+    fd : ndarray
+        Darcy friction factor
+    """
+    law = get_friction_model(model)
+    Re, e, D = np.broadcast_arrays(
+        np.asarray(reynolds, dtype=float),
+        np.asarray(roughness, dtype=float),
+        np.asarray(diameter, dtype=float),
+    )
+    fd = np.empty_like(Re)
+
+    laminar = Re < laminar_limit
+    fd[laminar] = 64 / Re[laminar]
+
+    turbulent = ~laminar
+    if np.any(turbulent):
+        fd[turbulent] = law(e[turbulent] / D[turbulent], Re[turbulent])
+
+    return fd
+
+
+def colebrook_derivative(rel_roughness, reynolds, fd):
+    """
+    Derivative `dfd/dRe` of Colebrook friction factor `fd`, obtained by
+    implicit differentiation of `g(x, Re) = x + 2 log10(A + B x) = 0`,
+    with `x = 1/sqrt(fd)`, `A = (e/D)/3.7` and `B = 2.51/Re`.
+    """
+    x = 1 / np.sqrt(fd)
+    B = 2.51 / reynolds
+    AB = rel_roughness / 3.7 + B * x
+    dg_dx = 1 + 2 * B / (AB * np.log(10))
+    dg_dRe = -2 * x * B / (reynolds * AB * np.log(10))
+    dx_dRe = -dg_dRe / dg_dx
+    return -2 * dx_dRe / x**3
+
+
+def friction_derivative(model, rel_roughness, reynolds, fd):
+    """
+    Derivative `dfd/dRe` of turbulent friction law `model` (see `get_friction_model`)
+    at friction factor `fd`. Colebrook solvers and tables use the implicit derivative
+    of Colebrook correlation; explicit laws are differentiated by complex step.
+    """
+    if model in ("solver", "table", "colebrook", "colebrook_fixed_point") or not isinstance(model, str):
+        return colebrook_derivative(rel_roughness, reynolds, fd)
+    law = get_friction_model(model)
+    h = 1e-20 * reynolds
+    return np.imag(law(rel_roughness, reynolds + 1j * h)) / h
+
+
+def darcy_partials(model, reynolds, rel_roughness, fd, f_guess, laminar_limit=3000):
+    """
+    Partial derivatives `(dfd/dRe, dfd/df_guess)` of the friction factor computed
+    by `FrictionFactor` and `PipeFluid` with option `friction_model=model`.
+
+    With "solver", `fd = colebrook(f_guess, ...)` is differentiated at fixed
+    `f_guess`; the dependency on `f_guess` is then eliminated by the solver
+    enforcing `fd == f_guess`. Other models do not depend on `f_guess`.
+    """
+    if reynolds < laminar_limit:
+        return -64 / reynolds**2, 0.0
+
+    if model == "solver":
+        y = rel_roughness / 3.7 + 2.51 / (reynolds * np.sqrt(f_guess))
+        c = -2 * np.log10(y)
+        dfd_dy = 4 / (c**3 * y * np.log(10))
+        dy_dRe = -2.51 / (reynolds**2 * np.sqrt(f_guess))
+        dy_df = -1.255 / (reynolds * f_guess**1.5)
+        return dfd_dy * dy_dRe, dfd_dy * dy_df
+
+    return friction_derivative(model, rel_roughness, reynolds, fd), 0.0
@@ -2,6 +2,9 @@ from cosapp.base import System
 from cosapp.drivers import NonLinearSolver
 from numpy import log10, sqrt
 
+from .friction import darcy_partials, get_friction_model
+from .jacobian import AnalyticJacobian
+
 
 class FrictionFactor(System):
     '''
@@ -21,10 +24,25 @@ class FrictionFactor(System):
     fd : float
         Friction factor calculating according to `reynolds`. When Re < 3000,
         the flow is considered laminar and `fd = 64/Re`. Otherwise it is considered
-        turbulent, and `f` is calculated according to Colebrook correlation.
+        turbulent, and `f` is calculated according to `friction_model`.
+
+    Options
+    -------
+    friction_model : str or FrictionTable
+        Turbulent friction law. With "solver" (default), Colebrook correlation
+        is solved by the nested `friction_solver` on `f_guess`. Otherwise, one
+        of `friction.FRICTION_MODELS`, evaluated directly in `compute`:
+        "colebrook" (internal Newton), "colebrook_fixed_point", "haaland",
+        "swamee_jain" or "serghides". "table" interpolates Colebrook
+        correlation in the shared `FrictionTable`; a `FrictionTable`
+        instance may also be given.
     '''
 
-    def setup(self):
+    def setup(self, friction_model="solver"):
+        if friction_model != "solver":
+            get_friction_model(friction_model)  # check model name
+        self.add_property("friction_model", friction_model)
+
         # free parameters
         self.add_inward(
             "f_guess", value=1, unit="", desc="approximation of friction factor"
@@ -39,18 +57,39 @@ class FrictionFactor(System):
         )
 
         # presetting solver
-        self.add_driver(NonLinearSolver('friction_solver'))
-        self.add_unknown("f_guess")
-        self.add_equation("fd == f_guess")
+        if friction_model == "solver":
+            self.add_driver(NonLinearSolver('friction_solver', jac=AnalyticJacobian(self.friction_jacobian)))
+            self.add_unknown("f_guess")
+            self.add_equation("fd == f_guess")
 
     def compute(self):
         # apply objective function
         if self.reynolds < 3000:
             self.fd = 64 / self.reynolds
-        else:
+        elif self.friction_model == "solver":
             self.fd = self.colebrook(
                 self.f_guess, self.roughness, self.diameter, self.reynolds
             )
+        else:
+            law = get_friction_model(self.friction_model)
+            self.fd = float(law(self.roughness / self.diameter, self.reynolds))
+
+    def partials(self):
+        '''
+        Analytic partial derivatives of `fd` w.r.t. inwards at current state,
+        as a dictionary `{(outward, inward): derivative}`.
+        '''
+        dfd_dRe, dfd_df = darcy_partials(
+            self.friction_model, self.reynolds, self.roughness / self.diameter, self.fd, self.f_guess
+        )
+        return {
+            ("fd", "reynolds"): dfd_dRe,
+            ("fd", "f_guess"): dfd_df,
+        }
+
+    def friction_jacobian(self):
+        '''Jacobian of `friction_solver` residue `fd - f_guess` w.r.t. `f_guess`.'''
+        return [[self.partials()[("fd", "f_guess")] - 1]]
 
     @staticmethod
     def colebrook(f_guess, e, D, Re):
@@ -0,0 +1,185 @@
+from collections import OrderedDict
+
+import numpy as np
+from scipy.interpolate import PchipInterpolator
+
+from .friction import colebrook_newton
+
+
+class FrictionTable:
+    """
+    Precomputed Moody chart, used as a cache for turbulent friction factor.
+
+    For each relative roughness `e/D`, Colebrook correlation is solved once
+    on a log-spaced Reynolds grid. Friction factors are then obtained by
+    monotone (PCHIP) cubic interpolation of `log(fd)` against `log10(Re)`.
+    Since the grid is uniform, interpolation is done without any search.
+
+    Tables are kept in a LRU cache over relative roughness keys, and can be
+    saved to/loaded from a `.npz` file, to be shared by worker processes.
+
+    Instances are callable as `table(rel_roughness, reynolds)`, like the
+    laws of `friction.FRICTION_MODELS`, and can therefore be passed as
+    `friction_model` option of `FrictionFactor` and `PipeFluid`.
+
+    Parameters
+    ----------
+    re_min, re_max : float
+        Reynolds number range of tables; Colebrook correlation is solved
+        directly outside of this range.
+    points_per_decade : int
+        Number of grid intervals per decade of Reynolds number
+    max_tables : int
+        Maximum number of relative roughness tables kept in cache
+    rtol : float
+        Error bound on the relative interpolation error; checked at build
+        time at interval midpoints, where interpolation error is maximal.
+    """
+
+    def __init__(self, re_min=3000, re_max=1e9, points_per_decade=32, max_tables=64, rtol=1e-6):
+        self.log_re_min = np.log10(re_min)
+        self.log_re_max = np.log10(re_max)
+        n = int(np.ceil((self.log_re_max - self.log_re_min) * points_per_decade))
+        self.log_re = np.linspace(self.log_re_min, self.log_re_max, n + 1)
+        self.step = self.log_re[1] - self.log_re[0]
+        self.max_tables = max_tables
+        self.rtol = rtol
+        self._tables = OrderedDict()
+
+    def __len__(self):
+        return len(self._tables)
+
+    def __contains__(self, rel_roughness):
+        return self.key(rel_roughness) in self._tables
+
+    @staticmethod
+    def key(rel_roughness):
+        """Cache key of relative roughness `rel_roughness`."""
+        return float(f"{float(rel_roughness):.10g}")
+
+    def table(self, rel_roughness):
+        """
+        Returns nodal values and slopes of `log(fd)` for `rel_roughness`,
+        building the table if needed.
+        """
+        key = self.key(rel_roughness)
+        try:
+            self._tables.move_to_end(key)
+            return self._tables[key]
+        except KeyError:
+            return self._insert(key, self._build(key))
+
+    def _insert(self, key, table):
+        self._tables[key] = table
+        while len(self._tables) > self.max_tables:
+            self._tables.popitem(last=False)
+        return table
+
+    def _build(self, key):
+        reynolds = 10**self.log_re
+        log_fd = np.log(colebrook_newton(key, reynolds, tol=1e-15))
+        slopes = PchipInterpolator(self.log_re, log_fd).derivative()(self.log_re)
+        table = np.vstack([log_fd, slopes])
+
+        # check error bound at interval midpoints
+        log_mid = 0.5 * (self.log_re[1:] + self.log_re[:-1])
+        exact = colebrook_newton(key, 10**log_mid, tol=1e-15)
+        error = np.max(np.abs(np.exp(self._interpolate(table, log_mid)) / exact - 1))
+        if error > self.rtol:
+            raise ValueError(
+                f"Interpolation error {error:.2e} exceeds rtol={self.rtol:.2e}"
+                f" for e/D={key}; increase `points_per_decade`"
+            )
+        return table
+
+    def _interpolate(self, table, log_re):
+        """Cubic Hermite interpolation of `log(fd)` on uniform grid."""
+        log_fd, slopes = table
+        s = (log_re - self.log_re_min) / self.step
+        i = np.clip(s.astype(int), 0, len(self.log_re) - 2)
+        t = s - i
+        h00 = (1 + 2 * t) * (1 - t) ** 2
+        h10 = t * (1 - t) ** 2
+        h01 = t**2 * (3 - 2 * t)
+        h11 = t**2 * (t - 1)
+        return (
+            h00 * log_fd[i] + h10 * self.step * slopes[i]
+            + h01 * log_fd[i + 1] + h11 * self.step * slopes[i + 1]
+        )
+
+    def __call__(self, rel_roughness, reynolds):
+        """
+        Turbulent friction factor, for arrays of relative roughness and
+        Reynolds numbers (broadcast together).
+        """
+        eps, Re = np.broadcast_arrays(
+            np.asarray(rel_roughness, dtype=float), np.asarray(reynolds, dtype=float)
+        )
+        if eps.size == 0:
+            return np.empty(eps.shape)
+        log_re = np.log10(Re)
+        fd = np.empty_like(log_re)
+
+        inside = (log_re >= self.log_re_min) & (log_re <= self.log_re_max)
+        if not np.all(inside):
+            outside = ~inside
+            fd[outside] = colebrook_newton(eps[outside], Re[outside])
+
+        if eps.ndim == 0 or np.all(eps == eps.flat[0]):
+            table = self.table(eps.flat[0])
+            fd[inside] = np.exp(self._interpolate(table, log_re[inside]))
+        else:
+            for value in np.unique(eps[inside]):
+                mask = inside & (eps == value)
+                fd[mask] = np.exp(self._interpolate(self.table(value), log_re[mask]))
+
+        return fd
+
+    def save(self, path):
+        """Save cached tables to `.npz` file `path`."""
+        keys = list(self._tables)
+        tables = np.array([self._tables[key] for key in keys]).reshape(len(keys), 2, len(self.log_re))
+        np.savez(
+            path,
+            log_re=self.log_re,
+            rel_roughness=np.array(keys, dtype=float),
+            tables=tables,
+            settings=np.array([self.max_tables, self.rtol]),
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Create table from a `.npz` file written by `save`."""
+        with np.load(path) as data:
+            log_re = data["log_re"]
+            max_tables, rtol = data["settings"]
+            points_per_decade = round((len(log_re) - 1) / (log_re[-1] - log_re[0]))
+            table = cls(
+                re_min=10 ** log_re[0],
+                re_max=10 ** log_re[-1],
+                points_per_decade=points_per_decade,
+                max_tables=int(max_tables),
+                rtol=rtol,
+            )
+            table.log_re = log_re
+            table.step = log_re[1] - log_re[0]
+            for key, values in zip(data["rel_roughness"], data["tables"]):
+                table._insert(float(key), values)
+        return table
+
+
+_shared_table = None
+
+
+def shared_table():
+    """Process-wide `FrictionTable` used by friction model "table"."""
+    global _shared_table
+    if _shared_table is None:
+        _shared_table = FrictionTable()
+    return _shared_table
+
+
+def set_shared_table(table):
+    """Replace process-wide table, e.g. by one loaded from disk in a worker process."""
+    global _shared_table
+    _shared_table = table
@@ -0,0 +1,43 @@
+import numpy as np
+from cosapp.core.numerics.solve.jacobian import AbstractJacobianEvaluation, JacobianStats
+
+
+class AnalyticJacobian(AbstractJacobianEvaluation):
+    """
+    Jacobian evaluation for `NonLinearSolver` drivers, computed from analytic
+    partial derivatives instead of forward finite differences.
+
+    Parameters
+    ----------
+    jacobian : callable
+        Function with no argument returning the Jacobian matrix of the solver
+        residues w.r.t. its unknowns (in problem order), evaluated at the
+        current state of the system. Residues are assumed to have a unit reference.
+
+    Examples
+    --------
+    >>> self.add_driver(NonLinearSolver("solver", jac=AnalyticJacobian(self.jacobian)))
+    """
+
+    def __init__(self, jacobian):
+        super().__init__()
+        self._jacobian = jacobian
+        self._calls = 0
+
+    def setup(self, size):
+        # called at the start of each resolution: statistics are per resolution
+        super().setup(size)
+        self.reset_stats()
+
+    def __call__(self, x, *, r0=None, **kwargs):
+        if r0 is None:
+            # bring system to state `x`
+            self._fresidues(x)
+        self._calls += 1
+        return np.array(self._jacobian(), dtype=float).reshape(x.size, x.size)
+
+    def get_stats(self):
+        return JacobianStats(partial_updates=0, broyden_updates=0, full_updates=self._calls)
+
+    def reset_stats(self):
+        self._calls = 0
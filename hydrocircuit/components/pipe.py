@@ -4,10 +4,24 @@ from .pipefluid import PipeFluid
 
 
 class Pipe(System):
-    def setup(self):
+    def setup(self, friction_model="solver"):
         self.add_child(PipeGeometry("geo"), pulling=["diameter", "length", "elevation_in", "elevation_out"])
         self.add_child(
-            PipeFluid("fluid"), pulling=["diameter", "length", "roughness", "pressure_in", "pressure_out", "density", "kin_viscosity", "mass_flow", "gravity"]
+            PipeFluid("fluid", friction_model=friction_model), pulling=["diameter", "length", "roughness", "pressure_in", "pressure_out", "density", "kin_viscosity", "mass_flow", "gravity"]
         )
 
         self.connect(self.geo.outwards, self.fluid.inwards, ["area", "elevation_change"])
+
+    def partials(self):
+        """
+        Analytic derivatives of `pressure_out` w.r.t. `pressure_in` and `mass_flow`.
+        When `fluid` has a nested `friction_solver`, `f_guess` is eliminated
+        by implicit differentiation of its equation `fd == f_guess`.
+        """
+        partials = self.fluid.partials()
+        df_dm = partials[("fd", "mass_flow")] / (1 - partials[("fd", "f_guess")])
+
+        return {
+            ("pressure_out", "pressure_in"): partials[("pressure_out", "pressure_in")],
+            ("pressure_out", "mass_flow"): partials[("pressure_out", "mass_flow")] + partials[("pressure_out", "f_guess")] * df_dm,
+        }
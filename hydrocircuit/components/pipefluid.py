@@ -1,6 +1,9 @@
 from cosapp.base import System
 from cosapp.drivers import NonLinearSolver
-from numpy import sign, sqrt, log10
+from numpy import sign, sqrt, log10, asarray, pi
+
+from .friction import darcy_friction, darcy_partials, get_friction_model
+from .jacobian import AnalyticJacobian
 
 
 class PipeFluid(System):
@@ -28,10 +31,25 @@ class PipeFluid(System):
     f_out : float
         Friction factor calculating according to `reynolds`. When Re < 3000,
         the flow is considered laminar and `f_out = 64/Re`. Otherwise it is considered
-        turbulent, and `f` is calculated according to Colebrook correlation.
+        turbulent, and `f` is calculated according to `friction_model`.
+
+    Options
+    -------
+    friction_model : str or FrictionTable
+        Turbulent friction law. With "solver" (default), Colebrook correlation
+        is solved by the nested `friction_solver` on `f_guess`. Otherwise, one
+        of `friction.FRICTION_MODELS`, evaluated directly in `compute`:
+        "colebrook" (internal Newton), "colebrook_fixed_point", "haaland",
+        "swamee_jain" or "serghides". "table" interpolates Colebrook
+        correlation in the shared `FrictionTable`; a `FrictionTable`
+        instance may also be given.
     """
 
-    def setup(self):
+    def setup(self, friction_model="solver"):
+        if friction_model != "solver":
+            get_friction_model(friction_model)  # check model name
+        self.add_property("friction_model", friction_model)
+
         # inwards geom
         self.add_inward("diameter", 1.0, unit="m", desc="Pipe diameter")
         self.add_inward("area", 0.0, unit="m**2", desc="Pipe cross section")
@@ -58,9 +76,10 @@ class PipeFluid(System):
         self.add_outward("velocity", 1.0, unit="Pa", desc="Outlet pressure")
 
         # driver to solve friction
-        self.add_driver(NonLinearSolver('friction_solver'))
-        self.add_unknown("f_guess")
-        self.add_equation("fd == f_guess")
+        if friction_model == "solver":
+            self.add_driver(NonLinearSolver('friction_solver', jac=AnalyticJacobian(self.friction_jacobian)))
+            self.add_unknown("f_guess")
+            self.add_equation("fd == f_guess")
 
     def compute(self):
         self.velocity = self.mass_flow / (self.area * self.density)
@@ -68,13 +87,100 @@ class PipeFluid(System):
 
         if self.reynolds < 3000:
             self.fd = 64 / self.reynolds
-        else:
+        elif self.friction_model == "solver":
             self.fd = self.colebrook(
                 self.f_guess, self.roughness, self.diameter, self.reynolds
             )
+        else:
+            law = get_friction_model(self.friction_model)
+            self.fd = float(law(self.roughness / self.diameter, self.reynolds))
 
         self.pressure_out = self.pressure_in - sign(self.velocity) * self.fd * self.density * self.length * self.velocity**2 / (2 * self.diameter) - self.elevation_change * self.density * self.gravity
 
+    def partials(self):
+        """
+        Analytic partial derivatives of outwards w.r.t. inwards at current state,
+        as a dictionary `{(outward, inward): derivative}`.
+        """
+        dv_dm = 1 / (self.area * self.density)
+        dRe_dm = dv_dm * self.diameter / self.kin_viscosity
+        dfd_dRe, dfd_df = darcy_partials(
+            self.friction_model, self.reynolds, self.roughness / self.diameter, self.fd, self.f_guess
+        )
+        dfd_dm = dfd_dRe * dRe_dm
+        k = sign(self.velocity) * self.density * self.length / (2 * self.diameter)
+
+        return {
+            ("velocity", "mass_flow"): dv_dm,
+            ("reynolds", "mass_flow"): dRe_dm,
+            ("fd", "reynolds"): dfd_dRe,
+            ("fd", "mass_flow"): dfd_dm,
+            ("fd", "f_guess"): dfd_df,
+            ("pressure_out", "pressure_in"): 1.0,
+            ("pressure_out", "mass_flow"): -k * (dfd_dm * self.velocity**2 + 2 * self.fd * self.velocity * dv_dm),
+            ("pressure_out", "f_guess"): -k * dfd_df * self.velocity**2,
+        }
+
+    def friction_jacobian(self):
+        """Jacobian of `friction_solver` residue `fd - f_guess` w.r.t. `f_guess`."""
+        return [[self.partials()[("fd", "f_guess")] - 1]]
+
+    @staticmethod
+    def compute_batch(
+        mass_flow,
+        diameter,
+        roughness=0.0,
+        length=1.0,
+        pressure_in=1.0,
+        density=1e3,
+        kin_viscosity=1e-6,
+        elevation_change=0.0,
+        gravity=9.81,
+        area=None,
+        friction_model="colebrook",
+    ):
+        """
+        Vectorized counterpart of `compute`, for arrays of operating points.
+
+        All arguments are broadcast together, so that sweeps can be given as
+        meshgrids or as flat arrays of combinations. Colebrook correlation is
+        solved for the whole batch by a vectorized Newton iteration, instead
+        of running `friction_solver` point by point.
+
+        Parameters
+        ----------
+        mass_flow, diameter, roughness, length, pressure_in, density,
+        kin_viscosity, elevation_change, gravity : array_like
+            Same meaning and units as the inwards of the component
+        area : array_like, optional
+            Pipe cross section; computed from `diameter` if not given,
+            as done by `PipeGeometry`.
+        friction_model : str
+            Turbulent friction law, among `friction.FRICTION_MODELS`
+
+        Returns
+        -------
+        dict[str, ndarray]
+            Arrays of `velocity`, `reynolds`, `fd` and `pressure_out`
+        """
+        diameter = asarray(diameter, dtype=float)
+        density = asarray(density, dtype=float)
+        if area is None:
+            area = pi * diameter**2 / 4
+
+        velocity = asarray(mass_flow, dtype=float) / (area * density)
+        reynolds = velocity * diameter / asarray(kin_viscosity, dtype=float)
+        fd = darcy_friction(reynolds, roughness, diameter, model=friction_model)
+
+        pressure_out = pressure_in - sign(velocity) * fd * density * asarray(length) * velocity**2 / (2 * diameter) - asarray(elevation_change) * density * asarray(gravity)
+
+        return {
+            "velocity": velocity,
+            "reynolds": reynolds,
+            "fd": fd,
+            "pressure_out": pressure_out,
+        }
+
     @staticmethod
     def colebrook(f_guess, e, D, Re):
         A = (e / D) / 3.7
@@ -14,3 +14,15 @@ class Pump(System):
         self.pressure_out = (
             self.pressure_in + self.power * self.density / self.mass_flow
         )
+
+    def partials(self):
+        """
+        Analytic partial derivatives of `pressure_out` w.r.t. inwards at current state,
+        as a dictionary `{(outward, inward): derivative}`.
+        """
+        return {
+            ("pressure_out", "pressure_in"): 1.0,
+            ("pressure_out", "mass_flow"): -self.power * self.density / self.mass_flow**2,
+            ("pressure_out", "power"): self.density / self.mass_flow,
+            ("pressure_out", "density"): self.power / self.mass_flow,
+        }
@@ -18,6 +18,18 @@ class IntakeReservoir(System):
     def compute(self):
         self.pressure_out = self.atmosphere + self.level * self.gravity * self.density
 
+    def partials(self):
+        """
+        Analytic partial derivatives of `pressure_out` w.r.t. inwards,
+        as a dictionary `{(outward, inward): derivative}`.
+        """
+        return {
+            ("pressure_out", "atmosphere"): 1.0,
+            ("pressure_out", "level"): self.gravity * self.density,
+            ("pressure_out", "gravity"): self.level * self.density,
+            ("pressure_out", "density"): self.level * self.gravity,
+        }
+
 
 class DischargeReservoir(System):
     def setup(self):
@@ -50,3 +62,16 @@ class DischargeReservoir(System):
         self.p_diff = self.pressure_in - (
             self.atmosphere + self.level * self.gravity * self.density
         )
+
+    def partials(self):
+        """
+        Analytic partial derivatives of `p_diff` w.r.t. inwards,
+        as a dictionary `{(outward, inward): derivative}`.
+        """
+        return {
+            ("p_diff", "pressure_in"): 1.0,
+            ("p_diff", "atmosphere"): -1.0,
+            ("p_diff", "level"): -self.gravity * self.density,
+            ("p_diff", "gravity"): -self.level * self.density,
+            ("p_diff", "density"): -self.level * self.gravity,
+        }
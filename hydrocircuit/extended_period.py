@@ -0,0 +1,188 @@
+import numpy as np
+import pandas as pd
+
+from sweep import solver_drivers
+
+
+class ExtendedPeriod:
+    """
+    Extended-period simulation of a `HydroCircuit`: a sequence of steady
+    states, with reservoir levels evolving with the net inflow of each
+    reservoir, and scheduled inputs (e.g. pump power or speed).
+
+    Levels are integrated by explicit Euler steps of size `dt`:
+
+        level_in  += dt * (inflow - Q) / area_in
+        level_out += dt * (Q - outflow) / area_out
+
+    with `Q` the circuit volume flow. Solving the circuit at every step is
+    avoided: it is re-solved only when a scheduled input changes, or when
+    levels have drifted by more than `level_tol` since the last solve. In
+    between, the mass flow is updated to first order from the level drift,
+    using the analytic derivatives of the circuit residue. Each solve is
+    warm-started from the unknowns of the last one (`mass_flow`, pipe
+    `f_guess`), which are left in place by the previous solve.
+
+    Parameters
+    ----------
+    system : HydroCircuit
+        System to simulate; solved with `system.run_drivers()`.
+    area_in, area_out : float
+        Free-surface areas of intake and discharge reservoirs (m**2);
+        `np.inf` for constant levels.
+    inflow, outflow : float or pandas.Series
+        Volume flows (m**3/s) entering the intake reservoir and leaving
+        the discharge reservoir, constant or scheduled against time (s).
+    schedules : pandas.DataFrame, optional
+        Scheduled inputs, with time (s) as index and variable names
+        (relative to `system`) as columns. Values are held constant
+        until the next scheduled time.
+    outputs : list[str]
+        Additional variables recorded at each step. They are updated when
+        the circuit is solved, and held in between.
+    level_tol : float
+        Level drift (m) triggering a new solve.
+    circuit : str
+        Name of the `Circuit` sub-system of `system`.
+
+    Examples
+    --------
+    >>> eps = ExtendedPeriod(s, area_in=500, area_out=500, schedules=pump_schedule)
+    >>> df = eps.run(duration=86400, dt=60)
+    """
+
+    def __init__(
+        self,
+        system,
+        area_in=np.inf,
+        area_out=np.inf,
+        inflow=0.0,
+        outflow=0.0,
+        schedules=None,
+        outputs=(),
+        level_tol=0.05,
+        circuit="piping",
+    ):
+        self.system = system
+        self.circuit = system[circuit]
+        self.area_in = area_in
+        self.area_out = area_out
+        frames = [pd.DataFrame(schedules)] if schedules is not None else []
+        for name, flow in (("inflow", inflow), ("outflow", outflow)):
+            frames.append(flow.rename(name) if isinstance(flow, pd.Series) else pd.Series([flow], index=[0.0], name=name))
+        schedules = pd.concat(frames, axis=1)
+        self.schedules = schedules.reindex(schedules.index.union([0.0])).ffill()
+        self.schedules[["inflow", "outflow"]] = self.schedules[["inflow", "outflow"]].fillna(0.0)
+        self.outputs = list(outputs)
+        self.level_tol = level_tol
+        self.solves = 0
+
+    def _scheduled_values(self, times):
+        """Scheduled values at `times`, as a (len(times), n_columns) array."""
+        schedules = self.schedules
+        index = np.searchsorted(schedules.index.to_numpy(dtype=float), times, side="right") - 1
+        values = schedules.to_numpy(dtype=float)[np.maximum(index, 0)]
+        values[index < 0] = np.nan  # before first scheduled time: keep current value
+        return schedules.columns, values
+
+    def _solve(self, time):
+        self.system.run_drivers()
+        self.solves += 1
+        for _, driver in solver_drivers(self.system, nested=False):
+            if driver.results is None or not driver.results.success:
+                raise RuntimeError(f"Circuit solve failed at t = {time} s")
+
+    def _level_sensitivity(self):
+        """Derivatives `(dm/dlevel_in, dm/dlevel_out)` of the mass flow solution."""
+        c = self.circuit
+        dp_dp = 1.0
+        for component in (c.pipe_1, c.pump, c.pipe_2):
+            dp_dp *= component.partials()[("pressure_out", "pressure_in")]
+        dr_dp = c.res_out.partials()[("p_diff", "pressure_in")]
+        dr_dlin = dr_dp * dp_dp * c.res_in.partials()[("pressure_out", "level")]
+        dr_dlout = c.res_out.partials()[("p_diff", "level")]
+        dr_dm = c.jacobian()[0][0]
+        return -dr_dlin / dr_dm, -dr_dlout / dr_dm
+
+    def run(self, duration, dt, path=None, chunk_size=10000, keep=None):
+        """
+        Simulate from current state over `duration` seconds, with time step `dt`.
+
+        Steps are processed by chunks of `chunk_size`: with `path` and
+        `keep=False`, memory use is bounded by one chunk, whatever the
+        duration.
+
+        Parameters
+        ----------
+        duration, dt : float
+            Simulated time and time step, in seconds
+        path : str, optional
+            CSV file where results are written, by chunks of `chunk_size` steps
+        chunk_size : int
+            Number of steps per chunk
+        keep : bool, optional
+            Keep all results in memory, to return them; by default, only if
+            `path` is None. Written chunks are dropped otherwise.
+
+        Returns
+        -------
+        pandas.DataFrame or None
+            Levels, mass flow, outputs and solve flag at each time step, if
+            `keep` is True
+        """
+        keep = path is None if keep is None else keep
+        c = self.circuit
+        steps = int(np.ceil((duration + 0.5 * dt) / dt))  # as `np.arange(0, duration + dt / 2, dt)`
+        columns = self.schedules.columns
+        inputs = [name for name in columns if name not in ("inflow", "outflow")]
+        i_inputs = [columns.get_loc(name) for name in inputs]
+        i_inflow, i_outflow = columns.get_loc("inflow"), columns.get_loc("outflow")
+
+        names = ["level_in", "level_out", "mass_flow", "solved"] + self.outputs
+        current = {name: self.system[name] for name in inputs}
+        self.solves = 0
+        frames = []
+
+        level_in, level_out = c.res_in.level, c.res_out.level
+        solved_levels = None  # levels at last solve
+        outputs = None
+
+        for first in range(0, steps, chunk_size):
+            times = np.arange(first, min(first + chunk_size, steps)) * dt
+            _, scheduled = self._scheduled_values(times)
+            records = np.empty((len(times), len(names)))
+
+            for j, time in enumerate(times):
+                changed = False
+                for name, value in zip(inputs, scheduled[j, i_inputs]):
+                    if not np.isnan(value) and value != current[name]:
+                        self.system[name] = current[name] = value
+                        changed = True
+
+                if changed or solved_levels is None or max(abs(level_in - solved_levels[0]), abs(level_out - solved_levels[1])) > self.level_tol:
+                    c.res_in.level, c.res_out.level = level_in, level_out
+                    self._solve(time)
+                    solved_levels = (level_in, level_out)
+                    solved_flow = c.mass_flow
+                    dm_dlin, dm_dlout = self._level_sensitivity()
+                    outputs = [self.system[name] for name in self.outputs]
+                    mass_flow, solved = solved_flow, True
+                else:
+                    mass_flow = solved_flow + dm_dlin * (level_in - solved_levels[0]) + dm_dlout * (level_out - solved_levels[1])
+                    solved = False
+
+                records[j] = [level_in, level_out, mass_flow, solved] + outputs
+
+                if first + j + 1 < steps:
+                    flow = mass_flow / c.density
+                    level_in += dt * (scheduled[j, i_inflow] - flow) / self.area_in
+                    level_out += dt * (flow - scheduled[j, i_outflow]) / self.area_out
+
+            chunk = pd.DataFrame(records, columns=names, index=pd.Index(times, name="time")).astype({"solved": bool})
+            if path is not None:
+                chunk.to_csv(path, mode="w" if first == 0 else "a", header=first == 0)
+            if keep:
+                frames.append(chunk)
+
+        c.res_in.level, c.res_out.level = level_in, level_out
+        return pd.concat(frames) if keep else None
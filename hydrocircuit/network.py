@@ -0,0 +1,268 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.constants import pi
+from scipy.sparse.linalg import spsolve
+
+from components.friction import darcy_friction
+from components.pipe import Pipe
+from components.pump import Pump
+
+
+class Network:
+    """
+    Hydraulic network of `Pipe` and `Pump` components, with branches and loops,
+    solved by the global gradient algorithm (Todini & Pilati, 1988).
+
+    Nodes are either reservoirs, with fixed piezometric head `elevation + level`,
+    or junctions, with unknown head and a prescribed mass flow `demand` leaving
+    the network. Each edge is a component connecting a `start` node to an `end`
+    node, with positive mass flow from `start` to `end`:
+
+    - `Pipe`: head loss `fd L v|v| / (2 g D)`, with Darcy friction factor from
+      `friction.darcy_friction` (parameters `diameter`, `length`, `roughness`
+      and `fluid.friction_model` are read from the component; pipes solving
+      Colebrook with a nested solver, model "solver", use Colebrook);
+    - `Pump`: constant hydraulic power, i.e. head gain `power / (g mass_flow)`.
+
+    At each iteration, edge energy equations are linearized and flows are
+    eliminated, leaving a sparse symmetric system on junction heads:
+
+        (A21 D^-1 A12) H = -q - A21 m - A21 D^-1 (A10 H0 - h(m))
+
+    so that the cost per iteration grows linearly with the number of edges.
+    Pipe derivatives use the usual exponents (1 laminar, 2 turbulent); since
+    the friction law is discontinuous at Re = 3000, a pipe whose flow sits at
+    the switch can make iterations cycle, in which case `solve` fails.
+
+    Parameters
+    ----------
+    nodes : dict[str, dict], optional
+        Node definitions, as `{name: {"level": ..., "elevation": ...}}` for
+        reservoirs and `{name: {"demand": ..., "elevation": ...}}` for junctions.
+    edges : iterable of (str, str, Pipe | Pump), optional
+        Edge list, as `(start, end, component)` tuples.
+    density, kin_viscosity, gravity, atmosphere : float
+        Fluid and environment properties, in SI units.
+    friction_model : str, optional
+        Turbulent friction law used for all pipes (see
+        `friction.get_friction_model`); by default, that of each pipe.
+    """
+
+    def __init__(
+        self,
+        nodes=None,
+        edges=(),
+        density=1e3,
+        kin_viscosity=1e-6,
+        gravity=9.81,
+        atmosphere=1e5,
+        friction_model=None,
+    ):
+        self.density = density
+        self.kin_viscosity = kin_viscosity
+        self.gravity = gravity
+        self.atmosphere = atmosphere
+        self.friction_model = friction_model
+
+        self.node_names = []
+        self.node_index = {}
+        self.node_level = []  # NaN for junctions
+        self.node_elevation = []
+        self.node_demand = []
+        self.edges = []
+
+        self.mass_flow = None
+        self.head = None
+        self.iterations = 0
+
+        for name, options in (nodes or {}).items():
+            if "level" in options:
+                self.add_reservoir(name, **options)
+            else:
+                self.add_junction(name, **options)
+        for start, end, component in edges:
+            self.add_edge(start, end, component)
+
+    def _add_node(self, name, level, elevation, demand):
+        if name in self.node_index:
+            raise ValueError(f"Node {name!r} already exists")
+        self.node_index[name] = len(self.node_names)
+        self.node_names.append(name)
+        self.node_level.append(level)
+        self.node_elevation.append(elevation)
+        self.node_demand.append(demand)
+
+    def add_reservoir(self, name, level, elevation=0.0):
+        """Add a fixed-head node, with free surface `level` above `elevation`."""
+        self._add_node(name, level, elevation, 0.0)
+
+    def add_junction(self, name, elevation=0.0, demand=0.0):
+        """Add a junction node, with mass flow `demand` (kg/s) leaving the network."""
+        self._add_node(name, np.nan, elevation, demand)
+
+    def add_edge(self, start, end, component):
+        """Connect nodes `start` and `end` with a `Pipe` or `Pump` component."""
+        if not isinstance(component, (Pipe, Pump)):
+            raise TypeError(f"Edges must be Pipe or Pump systems; got {type(component).__name__}")
+        for node in (start, end):
+            if node not in self.node_index:
+                raise KeyError(f"Unknown node {node!r}")
+        self.edges.append((self.node_index[start], self.node_index[end], component))
+
+    def _assemble(self):
+        """Build incidence matrices and edge parameter arrays."""
+        n_edges = len(self.edges)
+        level = np.asarray(self.node_level, dtype=float)
+        elevation = np.asarray(self.node_elevation, dtype=float)
+        fixed = ~np.isnan(level)
+        free = ~fixed
+        if not np.any(fixed):
+            raise ValueError("Network must contain at least one reservoir")
+
+        start = np.array([edge[0] for edge in self.edges])
+        end = np.array([edge[1] for edge in self.edges])
+        rows = np.r_[np.arange(n_edges), np.arange(n_edges)]
+        cols = np.r_[start, end]
+        signs = np.r_[np.ones(n_edges), -np.ones(n_edges)]
+        incidence = sp.csr_matrix((signs, (rows, cols)), shape=(n_edges, len(self.node_names)))
+
+        pipes = [c if isinstance(c, Pipe) else None for _, _, c in self.edges]
+        pumps = [c if isinstance(c, Pump) else None for _, _, c in self.edges]
+
+        def gather(systems, attr, default):
+            return np.array([default if s is None else getattr(s, attr) for s in systems], dtype=float)
+
+        self._is_pipe = np.array([pipe is not None for pipe in pipes])
+        self._diameter = gather(pipes, "diameter", 1.0)
+        self._length = gather(pipes, "length", 0.0)
+        self._roughness = gather(pipes, "roughness", 0.0)
+        self._power = gather(pumps, "power", 0.0)
+
+        # edges of each turbulent friction law
+        models = {}
+        for k, pipe in enumerate(pipes):
+            if pipe is not None:
+                model = self.friction_model or pipe.fluid.friction_model
+                models.setdefault("colebrook" if model == "solver" else model, []).append(k)
+        self._friction_models = [(model, np.array(edges)) for model, edges in models.items()]
+
+        self._A12 = incidence[:, free].tocsc()
+        self._A10 = incidence[:, fixed].tocsc()
+        self._H0 = (elevation + level)[fixed]
+        self._demand = np.asarray(self.node_demand, dtype=float)[free]
+        self._free = free
+        self._fixed = fixed
+
+    def edge_losses(self, mass_flow):
+        """
+        Head loss `h` (m) across each edge and its derivative `dh/dm`,
+        for edge mass flows `mass_flow` (kg/s).
+        """
+        m = np.where(np.abs(mass_flow) < 1e-12, 1e-12, mass_flow)
+        g, rho = self.gravity, self.density
+
+        # pipes
+        area = pi * self._diameter**2 / 4
+        velocity = m / (rho * area)
+        reynolds = np.abs(velocity) * self._diameter / self.kin_viscosity
+        fd = np.ones_like(reynolds)
+        for model, edges in self._friction_models:
+            fd[edges] = darcy_friction(reynolds[edges], self._roughness[edges], self._diameter[edges], model=model)
+        h_pipe = fd * self._length * velocity * np.abs(velocity) / (2 * g * self._diameter)
+        exponent = np.where(reynolds < 3000, 1.0, 2.0)
+
+        # pumps: constant hydraulic power
+        h_pump = -self._power / (g * m)
+
+        h = np.where(self._is_pipe, h_pipe, h_pump)
+        dh = np.where(self._is_pipe, exponent * h_pipe / m, self._power / (g * m**2))
+        return h, np.maximum(dh, 1e-10)
+
+    def solve(self, tol=1e-8, max_iter=100, mass_flow=None):
+        """
+        Solve the network for edge mass flows and junction heads.
+
+        Parameters
+        ----------
+        tol : float
+            Convergence tolerance on the relative mass flow update
+        max_iter : int
+            Maximum number of iterations
+        mass_flow : array_like, optional
+            Initial edge mass flows; defaults to the previous solution, if any,
+            or to 1 kg/s in all edges.
+
+        Returns
+        -------
+        int
+            Number of iterations
+        """
+        self._assemble()
+        A12, A21, A10, H0, q = self._A12, self._A12.T.tocsr(), self._A10, self._H0, self._demand
+        n_edges = len(self.edges)
+
+        if mass_flow is None:
+            mass_flow = self.mass_flow if self.mass_flow is not None and len(self.mass_flow) == n_edges else np.ones(n_edges)
+        m = np.array(mass_flow, dtype=float)
+
+        for iteration in range(1, max_iter + 1):
+            h, dh = self.edge_losses(m)
+            D_inv = sp.diags(1 / dh)
+            rhs_edges = A10 @ H0 - h
+            lhs = (A21 @ D_inv @ A12).tocsc()
+            rhs = -q - A21 @ m - A21 @ (rhs_edges / dh)
+            H = np.atleast_1d(spsolve(lhs, rhs))
+            dm = (A12 @ H + rhs_edges) / dh
+            m += dm
+            if np.max(np.abs(dm)) <= tol * max(1.0, np.max(np.abs(m))):
+                break
+        else:
+            raise RuntimeError(f"Network solver did not converge in {max_iter} iterations")
+
+        head = np.empty(len(self.node_names))
+        head[self._fixed] = H0
+        head[self._free] = H
+        self.mass_flow = m
+        self.head = head
+        self.iterations = iteration
+        return iteration
+
+    def node_results(self):
+        """DataFrame of node heads (m) and pressures (Pa)."""
+        elevation = np.asarray(self.node_elevation, dtype=float)
+        return pd.DataFrame(
+            {
+                "head": self.head,
+                "pressure": self.atmosphere + self.density * self.gravity * (self.head - elevation),
+                "reservoir": self._fixed,
+            },
+            index=pd.Index(self.node_names, name="node"),
+        )
+
+    def edge_results(self):
+        """DataFrame of edge mass flows (kg/s) and head losses (m)."""
+        h, _ = self.edge_losses(self.mass_flow)
+        return pd.DataFrame(
+            {
+                "start": [self.node_names[i] for i, _, _ in self.edges],
+                "end": [self.node_names[j] for _, j, _ in self.edges],
+                "mass_flow": self.mass_flow,
+                "head_loss": h,
+            },
+            index=pd.Index([c.name for _, _, c in self.edges], name="edge"),
+        )
+
+    def apply(self):
+        """Write solution (fluid properties, mass flow and inlet pressure) into edge components."""
+        pressure = self.node_results()["pressure"].to_numpy()
+        elevation = self.node_elevation
+        for (start, end, component), m in zip(self.edges, self.mass_flow):
+            component.density = self.density
+            component.mass_flow = m
+            component.pressure_in = pressure[start]
+            if isinstance(component, Pipe):
+                component.kin_viscosity = self.kin_viscosity
+                component.gravity = self.gravity
+                component.elevation_in = elevation[start]
+                component.elevation_out = elevation[end]
@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+from cosapp.drivers import NonLinearSolver
+
+
+def solver_drivers(system, nested=True):
+    """
+    `NonLinearSolver` drivers of `system` tree, as `(owner_path, driver)` pairs.
+    If `nested` is False, only drivers executed by `system.run_drivers()` are
+    returned, i.e. not those of sub-systems of a solved system.
+    """
+    found = []
+
+    def walk(sub, path):
+        drivers = [d for d in sub.drivers.values() if isinstance(d, NonLinearSolver)]
+        found.extend((path, driver) for driver in drivers)
+        if nested or not drivers:
+            for name, child in sub.children.items():
+                walk(child, f"{path}{name}.")
+
+    walk(system, "")
+    return found
+
+
+def grid_points(parameters):
+    """
+    Points of the grid spanned by `parameters` (dict of value lists), ordered
+    in a serpentine way, so that consecutive points differ by one grid step.
+    """
+    names = list(parameters)
+    points = [()]
+    for name in names:
+        values = list(parameters[name])
+        ordered = []
+        for i, point in enumerate(points):
+            for value in values if i % 2 == 0 else values[::-1]:
+                ordered.append(point + (value,))
+        points = ordered
+    return pd.DataFrame(points, columns=names)
+
+
+class ContinuationSweep:
+    """
+    Operating-point sweep of a system solved by `NonLinearSolver` drivers
+    (e.g. `HydroCircuit`), using natural-parameter continuation.
+
+    Each point is warm-started from the neighbouring converged points: the
+    unknowns of all solvers in the system tree (including nested ones, such
+    as pipe `f_guess`) are predicted by secant extrapolation along the sweep
+    direction when the two previous points are aligned with the current one,
+    or copied from the previous point otherwise. If the solve fails from the
+    prediction, it is retried from the previous converged point.
+
+    Parameters
+    ----------
+    system : System
+        System to sweep; it is run with `system.run_drivers()`.
+    outputs : list[str]
+        Variables (relative to `system`) collected at each point.
+
+    Examples
+    --------
+    >>> s = HydroCircuit("system")
+    >>> sweep = ContinuationSweep(s, outputs=["piping.mass_flow"])
+    >>> df = sweep.run({"piping.res_in.level": np.linspace(1, 20, 40)})
+    """
+
+    def __init__(self, system, outputs=()):
+        self.system = system
+        self.outputs = list(outputs)
+
+    def _unknown_names(self):
+        names = []
+        for path, driver in solver_drivers(self.system):
+            for unknown in driver.problem.unknowns.values():
+                names.append(f"{path}{unknown.name}")
+        return list(dict.fromkeys(names))
+
+    def _get_state(self, names):
+        return np.array([self.system[name] for name in names], dtype=float)
+
+    def _set_state(self, names, values):
+        for name, value in zip(names, values):
+            self.system[name] = value
+
+    def _solve(self):
+        """Run system drivers; returns (converged, residue evaluations of top-level solvers)."""
+        try:
+            self.system.run_drivers()
+        except Exception:
+            return False, 0
+        results = [driver.results for _, driver in solver_drivers(self.system, nested=False)]
+        converged = all(r is not None and r.success for r in results)
+        evaluations = sum(r.fres_calls for r in results if r is not None)
+        return converged, evaluations
+
+    def run(self, parameters):
+        """
+        Solve all operating points.
+
+        Parameters
+        ----------
+        parameters : dict[str, array_like] or pandas.DataFrame
+            Either a dict of values per parameter, swept as a grid (in
+            serpentine order), or a DataFrame of points, solved in row order.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Parameters, outputs, residue evaluations of top-level solvers
+            (`fres_calls`, including retries) and convergence status of each
+            point.
+        """
+        points = parameters if isinstance(parameters, pd.DataFrame) else grid_points(parameters)
+        names = list(points.columns)
+        unknowns = None
+        history = []  # (parameters, state) of last converged points
+        rows = []
+
+        for values in points.itertuples(index=False):
+            p = np.array(values, dtype=float)
+            for name, value in zip(names, values):
+                self.system[name] = value
+
+            if unknowns is not None and history:
+                self._set_state(unknowns, self._predict(history, p))
+
+            converged, evaluations = self._solve()
+
+            if not converged and history:
+                self._set_state(unknowns, history[-1][1])
+                converged, extra = self._solve()
+                evaluations += extra
+
+            if unknowns is None:
+                unknowns = self._unknown_names()
+            if converged:
+                history = (history + [(p, self._get_state(unknowns))])[-2:]
+
+            row = dict(zip(names, values))
+            row.update({name: self.system[name] for name in self.outputs})
+            row["residue_evaluations"] = evaluations
+            row["converged"] = converged
+            rows.append(row)
+
+        return pd.DataFrame(rows)
+
+    @staticmethod
+    def _predict(history, p):
+        """Secant predictor if last two points are aligned with `p`, zero-order otherwise."""
+        p1, x1 = history[-1]
+        if len(history) == 2:
+            p0, x0 = history[0]
+            step, last_step = p - p1, p1 - p0
+            norm = np.dot(last_step, last_step)
+            if norm > 0:
+                t = np.dot(step, last_step) / norm
+                if np.allclose(step, t * last_step):
+                    return x1 + t * (x1 - x0)
+        return x1
+
+
+def sweep(system, parameters, outputs=()):
+    """Shortcut for `ContinuationSweep(system, outputs).run(parameters)`."""
+    return ContinuationSweep(system, outputs).run(parameters)
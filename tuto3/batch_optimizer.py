@@ -0,0 +1,163 @@
+import numpy as np
+import scipy.optimize
+from cosapp.core.eval_str import EvalString
+from cosapp.drivers.driver import Driver
+
+
+class BatchOptimizer(Driver):
+    """
+    Optimizer evaluating candidate points by batches, for systems whose
+    `compute` is vectorized (as `Function`): unknowns of the owner system
+    are set to arrays of candidate values, and the objective of all
+    candidates is obtained by a single execution of the system.
+
+    With method "differential_evolution", each generation of the population
+    is one batch, and all unknowns need finite bounds. Other methods are those of `scipy.optimize.minimize`,
+    with forward finite-difference gradients: the current point and its
+    `n` perturbations are one batch of `n + 1` points.
+
+    At the end, unknowns are set to the best point found (scalar values),
+    and the system is executed once more.
+
+    Parameters
+    ----------
+    name : str
+        Driver name
+    owner : System, optional
+        System to which driver belongs
+    method : str
+        "differential_evolution", or a method of `scipy.optimize.minimize`
+        using gradients ("L-BFGS-B" by default, "BFGS", "CG", "SLSQP"...)
+    max_iter : int
+        Maximum number of iterations (generations for differential evolution)
+    tol : float
+        Convergence tolerance, passed to scipy
+    eps : float
+        Relative finite-difference step for gradients
+    popsize : int
+        Population size multiplier, for differential evolution
+    polish : bool
+        If True (default), polish differential evolution result with "L-BFGS-B"
+    seed : int, optional
+        Random seed, for differential evolution
+
+    Examples
+    --------
+    >>> optim = s.add_driver(BatchOptimizer("optim", method="differential_evolution"))
+    >>> optim.add_unknown("x", lower_bound=-5, upper_bound=5)
+    >>> optim.add_unknown("y", lower_bound=-5, upper_bound=5)
+    >>> optim.set_minimum("f")
+    >>> s.run_drivers()
+    """
+
+    __slots__ = ("method", "max_iter", "tol", "eps", "popsize", "polish", "seed", "unknowns", "stats", "result", "_objective")
+
+    def __init__(
+        self,
+        name="optimizer",
+        owner=None,
+        method="L-BFGS-B",
+        max_iter=1000,
+        tol=1e-8,
+        eps=1e-8,
+        popsize=15,
+        polish=True,
+        seed=None,
+        **options,
+    ):
+        super().__init__(name, owner, **options)
+        self.method = method
+        self.max_iter = max_iter
+        self.tol = tol
+        self.eps = eps
+        self.popsize = popsize
+        self.polish = polish
+        self.seed = seed
+        self.unknowns = {}
+        self.stats = {}
+        self.result = None
+        self._objective = None
+
+    def add_unknown(self, name, lower_bound=-np.inf, upper_bound=np.inf):
+        """Add scalar unknown `name` of owner system, with optional bounds."""
+        self.check_owner_attr(name)
+        self.unknowns[name] = (lower_bound, upper_bound)
+
+    def set_minimum(self, expression):
+        """Set objective `expression` to minimize, evaluated in owner system."""
+        self._objective = expression
+
+    def evaluate(self, points):
+        """
+        Objective at candidate `points`, a (n_points, n_unknowns) array,
+        computed in one execution of the owner system.
+        """
+        points = np.atleast_2d(points)
+        for i, name in enumerate(self.unknowns):
+            self.owner[name] = points[:, i].copy()
+        self.owner.run_once()
+        self.stats["batches"] += 1
+        self.stats["evaluations"] += len(points)
+        value = EvalString(self._objective, self.owner).eval()
+        return np.broadcast_to(np.asarray(value, dtype=float), (len(points),))
+
+    def _objective_and_gradient(self, x):
+        """Objective and forward finite-difference gradient at `x`, in one batch."""
+        h = self.eps * np.maximum(np.abs(x), 1.0)
+        lower, upper = np.array(list(self.unknowns.values()), dtype=float).T
+        h = np.where(x + h > upper, -h, h)  # stay within bounds
+        h = np.clip(x + h, lower, upper) - x  # reversed steps may cross lower bound
+        points = np.vstack([x, x + np.diag(h)])
+        values = self.evaluate(points)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            gradient = np.where(h != 0, (values[1:] - values[0]) / h, 0.0)  # 0 for fixed unknowns
+        return values[0], gradient
+
+    def _minimize(self, x0, method):
+        bounds = list(self.unknowns.values())
+        return scipy.optimize.minimize(
+            self._objective_and_gradient,
+            x0,
+            jac=True,
+            method=method,
+            bounds=None if method not in ("L-BFGS-B", "TNC", "SLSQP", "trust-constr") else bounds,
+            tol=self.tol,
+            options={"maxiter": self.max_iter},
+        )
+
+    def compute(self):
+        if self._objective is None:
+            raise ArithmeticError("Optimization objective was not specified.")
+        if not self.unknowns:
+            raise ValueError("No unknown was specified for the optimization.")
+        self.stats = dict(batches=0, evaluations=0)
+        x0 = np.array([float(self.owner[name]) for name in self.unknowns])
+
+        if self.method == "differential_evolution":
+            for name, (lower, upper) in self.unknowns.items():
+                if not (np.isfinite(lower) and np.isfinite(upper) and lower < upper):
+                    raise ValueError(f"Unknown {name!r} needs finite bounds, with lower_bound < upper_bound, for differential evolution")
+            result = scipy.optimize.differential_evolution(
+                lambda x: self.evaluate(x.T),
+                list(self.unknowns.values()),
+                maxiter=self.max_iter,
+                popsize=self.popsize,
+                tol=self.tol,
+                seed=self.seed,
+                polish=False,
+                vectorized=True,
+                updating="deferred",
+            )
+            if self.polish:
+                polished = self._minimize(result.x, "L-BFGS-B")
+                if polished.fun < result.fun:
+                    result.x, result.fun = polished.x, polished.fun
+        else:
+            result = self._minimize(x0, self.method)
+
+        self.result = result
+        self.status = "" if result.success else "ERROR"
+        self.error_code = "0" if result.success else "9"
+        for name, value in zip(self.unknowns, result.x):
+            self.owner[name] = float(value)
+        self.owner.run_once()
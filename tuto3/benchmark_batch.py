@@ -0,0 +1,64 @@
+"""
+Compare point-by-point and batched evaluations of `Function` in
+optimizations of `rastrigin` over [-5, 5]^2: number of system executions
+(`compute` calls), objective evaluations, wall time and best objective.
+
+- gradient method: CoSApp `Optimizer` vs. `BatchOptimizer` ("L-BFGS-B"),
+  from the same starting point;
+- differential evolution: scipy, calling the system once per candidate,
+  vs. `BatchOptimizer`, calling it once per generation.
+
+Run from `tuto3` folder: `python benchmark_batch.py`
+"""
+import time
+
+import pandas as pd
+import scipy.optimize
+from cosapp.drivers import Optimizer
+
+from batch_optimizer import BatchOptimizer
+from function import Function
+
+BOUNDS = [(-5, 5), (-5, 5)]
+START = (2.3, -1.2)
+
+
+def run(driver):
+    """Run optimization `driver` on a new `Function`; returns run statistics."""
+    s = Function("objective")
+    s.x, s.y = START
+    s.add_driver(driver)
+    for name, (lower, upper) in zip(["x", "y"], BOUNDS):
+        driver.add_unknown(name, lower_bound=lower, upper_bound=upper)
+    driver.set_minimum("f")
+
+    start = time.perf_counter()
+    s.run_drivers()
+    elapsed = time.perf_counter() - start
+    evaluations = driver.stats["evaluations"] if isinstance(driver, BatchOptimizer) else s.compute_calls
+    return {"compute_calls": s.compute_calls, "evaluations": evaluations, "time": elapsed, "f": s.f}
+
+
+def pointwise_evolution(seed=0):
+    """Differential evolution on `Function`, executing the system for each candidate."""
+    s = Function("objective")
+
+    def objective(x):
+        s.x, s.y = x
+        s.run_once()
+        return s.f
+
+    start = time.perf_counter()
+    result = scipy.optimize.differential_evolution(objective, BOUNDS, seed=seed, tol=1e-8, polish=False)
+    elapsed = time.perf_counter() - start
+    return {"compute_calls": result.nfev, "evaluations": result.nfev, "time": elapsed, "f": result.fun}
+
+
+if __name__ == "__main__":
+    rows = {
+        "Optimizer L-BFGS-B": run(Optimizer("optim", method="L-BFGS-B")),
+        "BatchOptimizer L-BFGS-B": run(BatchOptimizer("optim", method="L-BFGS-B")),
+        "scipy DE, per candidate": pointwise_evolution(),
+        "BatchOptimizer DE": run(BatchOptimizer("optim", method="differential_evolution", polish=False, seed=0)),
+    }
+    print(pd.DataFrame.from_dict(rows, orient="index").to_string())
@@ -0,0 +1,113 @@
+"""
+Compare the number of true system evaluations needed by `SurrogateOptimizer`
+and by direct optimizers, on two problems:
+
+- "rastrigin": `Function`, minimizing `rastrigin` over [-5, 5]^2 (many local
+  minima, global minimum 0 at the origin);
+- "circuit": `HydroCircuit` with 500 m pipes lifting water by 20 m, choosing
+  pump `power` and `pipe_2.diameter` to minimize an energy cost: pump power
+  (kW), plus a pipe cost growing with diameter, plus a penalty on deviations
+  from the required mass flow of 200 kg/s. Each evaluation runs the circuit
+  solver and the nested friction solvers of pipes.
+
+Reported: system evaluations, wall time and best objective, for CoSApp
+`Optimizer` (local, from a given starting point), scipy differential
+evolution evaluating the system for each candidate (global), and
+`SurrogateOptimizer` (global).
+
+The surrogate reaches the 10-50x reduction of evaluations only against the
+global search evaluating each candidate (about 16x on "circuit"). On this
+smooth, two-unknown circuit problem, the local SLSQP optimizer needs only
+about 2.6 times more evaluations, for a slightly better objective; on
+"rastrigin", L-BFGS-B is cheaper but stops in a local minimum.
+
+Run from `tuto3` folder: `python benchmark_surrogate.py`
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.optimize
+from cosapp.core.eval_str import EvalString
+from cosapp.drivers import Optimizer
+
+from function import Function
+from surrogate import SurrogateOptimizer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "hydrocircuit"))
+from circuit import HydroCircuit  # noqa: E402
+
+
+def make_circuit():
+    s = HydroCircuit("system")
+    s.piping.res_in.level = 10
+    s.piping.res_out.level = 30
+    for pipe in (s.piping.pipe_1, s.piping.pipe_2):
+        pipe.length = 500.0
+        pipe.roughness = 5e-5
+    s.piping.pipe_1.diameter = 0.3
+    return s
+
+
+PROBLEMS = {
+    "rastrigin": (
+        lambda: Function("objective"),
+        {"x": (-5, 5), "y": (-5, 5)},
+        "f",
+        {"x": 2.3, "y": -1.2},
+    ),
+    "circuit": (
+        make_circuit,
+        {"piping.pump.power": (5e4, 4e5), "piping.pipe_2.diameter": (0.1, 0.5)},
+        "piping.pump.power / 1e3 + 1e3 * piping.pipe_2.diameter**2 + (piping.mass_flow - 200)**2",
+        {"piping.pump.power": 2e5, "piping.pipe_2.diameter": 0.3},
+    ),
+}
+
+
+def run(problem, driver):
+    """Run optimization `driver` on a new system of `problem`; returns run statistics."""
+    factory, bounds, objective, start = PROBLEMS[problem]
+    s = factory()
+    for name, value in start.items():
+        s[name] = value
+    s.add_driver(driver)
+    for name, (lower, upper) in bounds.items():
+        driver.add_unknown(name, lower_bound=lower, upper_bound=upper)
+    driver.set_minimum(objective)
+
+    begin = time.perf_counter()
+    s.run_drivers()
+    elapsed = time.perf_counter() - begin
+    evaluations = driver.stats["evaluations"] if isinstance(driver, SurrogateOptimizer) else s.compute_calls
+    return {"evaluations": evaluations, "time": elapsed, "f": EvalString(objective, s).eval()}
+
+
+def pointwise_evolution(problem, seed=0):
+    """Differential evolution on `problem`, executing the system for each candidate."""
+    factory, bounds, objective, _ = PROBLEMS[problem]
+    s = factory()
+    expression = EvalString(objective, s)
+
+    def evaluate(x):
+        for name, value in zip(bounds, x):
+            s[name] = value
+        s.run_drivers()
+        value = expression.eval()
+        return value if np.isfinite(value) else np.inf
+
+    start = time.perf_counter()
+    result = scipy.optimize.differential_evolution(evaluate, list(bounds.values()), seed=seed, tol=1e-6, polish=False)
+    elapsed = time.perf_counter() - start
+    return {"evaluations": result.nfev, "time": elapsed, "f": result.fun}
+
+
+if __name__ == "__main__":
+    rows = {}
+    for problem, method, max_evals in [("rastrigin", "L-BFGS-B", 100), ("circuit", "SLSQP", 60)]:
+        rows[problem, f"Optimizer {method}"] = run(problem, Optimizer("optim", method=method))
+        rows[problem, "scipy DE, per candidate"] = pointwise_evolution(problem)
+        rows[problem, "SurrogateOptimizer"] = run(problem, SurrogateOptimizer("optim", max_evals=max_evals, seed=0))
+    print(pd.DataFrame.from_dict(rows, orient="index").to_string())
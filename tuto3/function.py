@@ -0,0 +1,35 @@
+from cosapp.base import System
+from cosapp.drivers import Optimizer
+
+import numpy as np
+
+
+# objective function definition
+def rastrigin(x, y):
+    return 20 + x**2 + y**2 - 10 * np.cos(np.pi * x) - 10 * np.cos(np.pi * y)
+
+
+# small system to test
+class Function(System):
+    def setup(self):
+        # free parameters
+        self.add_inward("x", value=0)
+        self.add_inward("y", value=0)
+
+        # objective variable
+        self.add_outward("f", value=0)
+
+    def compute(self):
+        # apply objective function
+        self.f = rastrigin(self.x, self.y)
+
+
+def make_problem(method="CG", max_iter=100):
+    """`Function` with an `Optimizer` driver "optim", minimizing `f` w.r.t. `x` and `y`."""
+    s = Function("objective")
+
+    optim = s.add_driver(Optimizer("optim", method=method, max_iter=max_iter))
+    optim.add_unknown(["x", "y"])
+    optim.set_minimum("f")
+
+    return s
@@ -0,0 +1,195 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from cosapp.drivers import Optimizer
+from cosapp.recorders import DataFrameRecorder
+from scipy.stats import qmc
+
+# per-worker state, set by `_init_worker`
+_system = None
+_optimizer = None
+_recorder = None
+
+
+def _find_optimizer(system):
+    """First `Optimizer` driver of `system`."""
+    for driver in system.drivers.values():
+        if isinstance(driver, Optimizer):
+            return driver
+    raise ValueError(f"System {system.name!r} has no Optimizer driver")
+
+
+def _init_worker(factory, variables):
+    global _system, _optimizer, _recorder
+    _system = factory()
+    _optimizer = _find_optimizer(_system)
+    _optimizer.force_init = True  # start from set values, not from last solution
+    _recorder = DataFrameRecorder(includes=variables + [_optimizer.objective_expr])
+    _optimizer.add_recorder(_recorder, history=True)
+
+
+def _optimize(start):
+    """Local optimization from `start` (dict of variable values) on worker system."""
+    for name, value in start.items():
+        _system[name] = value
+    begin = time.perf_counter()
+    try:
+        _system.run_drivers()
+        success, error = _optimizer.status != "ERROR", ""
+    except Exception as exc:
+        success, error = False, repr(exc)
+    row = {
+        **{name: _system[name] for name in start},
+        "objective": _optimizer.objective,
+        "success": success,
+        "evaluations": _system.compute_calls,  # reset by each run
+        "error": error,
+        "time": time.perf_counter() - begin,
+        "worker": os.getpid(),
+    }
+    columns = list(start) + [_optimizer.objective_expr]
+    trace = _recorder.export_data()[columns].rename(columns={_optimizer.objective_expr: "objective"})
+    return row, trace
+
+
+class MultiStart:
+    """
+    Global minimization by local optimizations from multiple starting
+    points, run in parallel over a process pool.
+
+    Each worker process builds the problem once with `factory`: a system
+    with an `Optimizer` driver, whose unknowns and objective are set.
+    Starting points are spread over `bounds` by a scrambled Sobol sequence
+    or a Latin hypercube, which cover the domain more evenly than random
+    draws. End points closer than `tol` (relative to bounds) are merged
+    into a single minimum. End points of unsuccessful optimizations are
+    kept, as gradient-based methods with finite-difference gradients often
+    stop on precision loss at a minimum; only starts raising an exception
+    are discarded.
+
+    Parameters
+    ----------
+    factory : callable
+        Picklable function with no arguments, returning the problem system
+    bounds : dict[str, tuple[float, float]]
+        Ranges of optimization variables for starting points
+    starts : int
+        Number of starting points
+    sampling : str
+        "sobol" (default) or "lhs" (Latin hypercube)
+    workers : int, optional
+        Number of worker processes; defaults to CPU count
+    seed : int, optional
+        Seed of starting point sampling
+    tol : float
+        Relative distance under which converged points are merged
+
+    Examples
+    --------
+    >>> study = MultiStart(make_problem, bounds={"x": (-5, 5), "y": (-5, 5)}, starts=64)
+    >>> results = study.run()
+    >>> study.best
+    """
+
+    def __init__(self, factory, bounds, starts=16, sampling="sobol", workers=None, seed=None, tol=1e-3):
+        if sampling not in ("sobol", "lhs"):
+            raise ValueError(f"Unknown sampling {sampling!r}; must be 'sobol' or 'lhs'")
+        self.factory = factory
+        self.bounds = dict(bounds)
+        self.starts = starts
+        self.sampling = sampling
+        self.workers = workers or os.cpu_count()
+        self.seed = seed
+        self.tol = tol
+        self.traces = []
+        self.minima = None
+
+    def starting_points(self):
+        """Starting points, as a (starts, variables) array."""
+        dim = len(self.bounds)
+        if self.sampling == "sobol":
+            sampler = qmc.Sobol(dim, seed=self.seed)
+            m = int(np.ceil(np.log2(self.starts)))
+            sample = sampler.random_base2(m)[: self.starts]  # balanced for powers of 2
+        else:
+            sample = qmc.LatinHypercube(dim, seed=self.seed).random(self.starts)
+        lower, upper = np.array(list(self.bounds.values()), dtype=float).T
+        return qmc.scale(sample, lower, upper)
+
+    def run(self):
+        """
+        Run local optimizations from all starting points.
+
+        Returns
+        -------
+        pandas.DataFrame
+            One row per start: starting and end variables, objective,
+            success flag, number of evaluations, error message, minimum index
+            (-1 for starts raising an error), wall time and worker pid. Iteration traces are stored in
+            `traces` (one DataFrame per start), and distinct minima in
+            `minima`, sorted by objective.
+        """
+        names = list(self.bounds)
+        points = self.starting_points()
+        starts = [dict(zip(names, point)) for point in points]
+        chunksize = max(1, len(starts) // (4 * self.workers))
+
+        with ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.factory, names)) as pool:
+            outcomes = list(pool.map(_optimize, starts, chunksize=chunksize))
+
+        results = pd.DataFrame([row for row, _ in outcomes])
+        results.insert(0, "start", range(len(starts)))
+        for i, name in enumerate(names):
+            results.insert(1 + i, f"{name}_0", points[:, i])
+        self.traces = [trace for _, trace in outcomes]
+        results["minimum"] = self._merge(results, names)
+        return results
+
+    def _merge(self, results, names):
+        """Index of distinct minimum reached by each start, and `minima` table."""
+        scale = np.array([upper - lower for lower, upper in self.bounds.values()], dtype=float)
+        found = (results["error"] == "") & results["objective"].notna()
+        order = results[found].sort_values("objective").index
+        centers, labels = [], np.full(len(results), -1)
+        for i in order:
+            x = results.loc[i, names].to_numpy(dtype=float) / scale
+            for k, center in enumerate(centers):
+                if np.max(np.abs(x - center)) < self.tol:
+                    labels[i] = k
+                    break
+            else:
+                labels[i] = len(centers)
+                centers.append(x)
+        first = results.loc[order].groupby(labels[order]).head(1)
+        self.minima = first[names + ["objective"]].reset_index(drop=True)
+        self.minima["count"] = np.bincount(labels[order], minlength=len(centers))
+        return labels
+
+    @property
+    def best(self):
+        """Best minimum found, as a pandas.Series."""
+        if self.minima is None or self.minima.empty:
+            return None
+        return self.minima.iloc[0]
+
+
+if __name__ == "__main__":
+    from function import make_problem
+
+    bounds = {"x": (-5, 5), "y": (-5, 5)}
+
+    # single start, as in optimisation.py
+    s = make_problem()
+    s.x, s.y = np.random.default_rng(0).uniform(-5, 5, 2)
+    s.run_drivers()
+    print(f"Single start: f = {s.f:.6f} at ({s.x:.4f}, {s.y:.4f})")
+
+    study = MultiStart(make_problem, bounds, starts=64, seed=0)
+    start = time.perf_counter()
+    results = study.run()
+    elapsed = time.perf_counter() - start
+    print(f"{study.starts} starts on {study.workers} workers: {elapsed:.2f} s, {len(study.minima)} distinct minima")
+    print(study.minima.head(10))
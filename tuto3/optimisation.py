@@ -1,77 +1,96 @@
-from cosapp.base import System
-from cosapp.drivers import Optimizer
-from cosapp.recorders import DataFrameRecorder
+"""
+Minimization of `rastrigin` (see `function.py`) by CoSApp `Optimizer`,
+from a random starting point, with plots of the optimizer path over the
+objective function.
+
+Importing this module runs nothing, and plotting libraries (plotly,
+matplotlib) are only imported by `plot`, so that `optimise` can be used in
+batch workers. With `--headless`, no plot is made, and iterates are written
+to file with `--output`.
+
+Run from `tuto3` folder: `python optimisation.py` (see `python optimisation.py --help`)
+"""
+import argparse
 
 import numpy as np
-import matplotlib.pyplot as plt
-import plotly.graph_objects as go
+from cosapp.recorders import DataFrameRecorder
+
+from function import rastrigin, make_problem
 
 
-# objective function definition
-def rastrigin(x, y):
-    return 20 + x**2 + y**2 - 10 * np.cos(np.pi * x) - 10 * np.cos(np.pi * y)
+def optimise(method="CG", max_iter=100, start=None, seed=None):
+    """
+    Minimize `rastrigin` from `start` point `(x, y)`, or from a random point
+    in [-1, 1]^2 drawn with `seed`; returns optimizer iterates (x, y, f) as
+    a DataFrame.
+    """
+    s = make_problem(method=method, max_iter=max_iter)
+    optim = s.drivers["optim"]
 
+    if start is None:
+        start = 2 * (0.5 - np.random.default_rng(seed).random(2))
+    s.x, s.y = start
 
-# small system to test
-class Function(System):
-    def setup(self):
-        # free parameters
-        self.add_inward("x", value=0)
-        self.add_inward("y", value=0)
+    # record convergence
+    recorder = DataFrameRecorder(includes=["x", "y", "f"])
+    optim.add_recorder(recorder, history=True)
 
-        # objective variable
-        self.add_outward("f", value=0)
+    s.run_drivers()
 
-    def compute(self):
-        # apply objective function
-        self.f = rastrigin(self.x, self.y)
+    return recorder.export_data()
 
 
-# generate object
-s = Function("objective")
+def plot(df, extent=1.5):
+    """Plot iterates `df` over `rastrigin` in [-extent, extent]^2: 3d with plotly, 2d with matplotlib."""
+    import matplotlib.pyplot as plt
+    import plotly.graph_objects as go
 
-# generate random initial points
-s.x, s.y = 2 * (0.5 - np.random.rand()), 2 * (0.5 - np.random.rand())
+    # shape of objective function
+    XX, YY = np.meshgrid(np.linspace(-extent, extent, 100), np.linspace(-extent, extent, 100))
 
-# optimiser parameters
-optim = s.add_driver(Optimizer("optim", method="CG", max_iter=100))
+    FF = rastrigin(XX, YY)
 
-optim.add_unknown(["x", "y"])
-optim.set_minimum("f")
+    # 3d with plotly
 
-# record convergence
-optim.options["monitor"] = True
-recorder = optim.add_recorder(DataFrameRecorder(includes=["x", "y", "f"]))
+    plots = [go.Surface(x=XX, y=YY, z=FF), go.Scatter3d(x=df["x"], y=df["y"], z=df["f"])]
 
-# run
-s.run_drivers()
+    fig = go.Figure(data=plots)
 
-# get data
-df = recorder.export_data()
-print(df)
+    fig.show()
 
-# shape of objective function
-XX, YY = np.meshgrid(np.linspace(-1.5, 1.5, 100), np.linspace(-1.5, 1.5, 100))
+    # 2d with matplotlib
+    fig1, ax = plt.subplots(nrows=1, ncols=1)
 
-FF = rastrigin(XX, YY)
+    ax.contourf(XX, YY, FF)
 
-# 3d with plotly
+    ax.plot(df["x"].to_numpy(), df["y"].to_numpy(), linestyle="--", color="k")
+    ax.scatter(df["x"].to_numpy()[0], df["y"].to_numpy()[0], marker="o", color="r")
+    ax.scatter(df["x"].to_numpy()[-1], df["y"].to_numpy()[-1], marker="o", color="b")
 
-plots = [go.Surface(x=XX, y=YY, z=FF), go.Scatter3d(x=df["x"], y=df["y"], z=df["f"])]
+    plt.tight_layout()
+    plt.show(block=True)
 
-fig = go.Figure(data=plots)
 
-fig.show()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Minimize the Rastrigin function with CoSApp Optimizer.")
+    parser.add_argument("--method", default="CG", help="optimization method (default: CG)")
+    parser.add_argument("--max-iter", type=int, default=100, help="maximum number of iterations (default: 100)")
+    parser.add_argument("--start", type=float, nargs=2, metavar=("X", "Y"), help="starting point (default: random)")
+    parser.add_argument("--seed", type=int, help="seed of random starting point")
+    parser.add_argument("-o", "--output", help="save iterates as CSV file OUTPUT")
+    parser.add_argument("--headless", action="store_true", help="do not plot (plotting libraries are not imported)")
+    args = parser.parse_args(argv)
 
+    df = optimise(args.method, args.max_iter, args.start, args.seed)
 
-# 2d with matplotlib
-fig1, ax = plt.subplots(nrows=1, ncols=1)
+    if args.output:
+        df.to_csv(args.output, index=False)
+    else:
+        print(df)
 
-ax.contourf(XX, YY, FF)
+    if not args.headless:
+        plot(df)
 
-ax.plot(df["x"].to_numpy(), df["y"].to_numpy(), linestyle="--", color="k")
-ax.scatter(df["x"].to_numpy()[0], df["y"].to_numpy()[0], marker="o", color="r")
-ax.scatter(df["x"].to_numpy()[-1], df["y"].to_numpy()[-1], marker="o", color="b")
 
-plt.tight_layout()
-plt.show(block=True)
+if __name__ == "__main__":
+    main()
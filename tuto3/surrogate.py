@@ -0,0 +1,326 @@
+import numpy as np
+import pandas as pd
+import scipy.linalg
+import scipy.optimize
+from cosapp.core.eval_str import EvalString
+from cosapp.drivers import NonLinearSolver
+from cosapp.drivers.driver import Driver
+from scipy.special import ndtr
+from scipy.stats import qmc
+
+
+class GaussianProcess:
+    """
+    Gaussian process regression model of a scalar function on the unit cube,
+    with a Matérn 5/2 or Gaussian ("RBF") kernel.
+
+    Length scales (one per dimension) are fitted by maximizing the marginal
+    likelihood, with the signal variance profiled out; observed values are
+    standardized.
+
+    Parameters
+    ----------
+    kernel : str
+        "matern52" (default) or "gaussian"
+    noise : float
+        Relative noise variance added to the kernel diagonal (regularization)
+    restarts : int
+        Number of random starting points of the length scale fit, in addition
+        to the previous fit
+    seed : int, optional
+        Random seed of length scale fit restarts
+    """
+
+    def __init__(self, kernel="matern52", noise=1e-8, restarts=2, seed=None):
+        if kernel not in ("matern52", "gaussian"):
+            raise ValueError(f"Unknown kernel {kernel!r}; must be 'matern52' or 'gaussian'")
+        self.kernel = kernel
+        self.noise = noise
+        self.restarts = restarts
+        self.rng = np.random.default_rng(seed)
+        self.length_scales = None
+
+    def _kernel(self, a, b, length_scales):
+        d = (a[:, None, :] - b[None, :, :]) / length_scales
+        r2 = np.sum(d * d, axis=-1)
+        if self.kernel == "gaussian":
+            return np.exp(-0.5 * r2)
+        r = np.sqrt(5.0 * r2)
+        return (1.0 + r + r * r / 3.0) * np.exp(-r)
+
+    def _factorize(self, log_scales):
+        K = self._kernel(self.X, self.X, np.exp(log_scales))
+        K[np.diag_indices_from(K)] += self.noise
+        L = np.linalg.cholesky(K)
+        alpha = scipy.linalg.cho_solve((L, True), self.y)
+        return L, alpha
+
+    def _nll(self, log_scales):
+        """Negative log marginal likelihood, with signal variance profiled out."""
+        try:
+            L, alpha = self._factorize(log_scales)
+        except np.linalg.LinAlgError:
+            return np.inf
+        n = len(self.y)
+        variance = max(self.y @ alpha / n, 1e-300)
+        return 0.5 * n * np.log(variance) + np.sum(np.log(np.diag(L)))
+
+    def fit(self, X, y):
+        """Fit model on points `X` (n, dim), in the unit cube, and values `y` (n,)."""
+        self.X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float)
+        self.mean, self.scale = y.mean(), y.std() or 1.0
+        self.y = (y - self.mean) / self.scale
+        dim = self.X.shape[1]
+
+        bounds = [(np.log(1e-3), np.log(10.0))] * dim
+        starts = [np.full(dim, np.log(0.3)) if self.length_scales is None else np.log(self.length_scales)]
+        starts += [self.rng.uniform(np.log(0.01), np.log(2.0), dim) for _ in range(self.restarts)]
+        best = None
+        for x0 in starts:
+            result = scipy.optimize.minimize(self._nll, x0, method="L-BFGS-B", bounds=bounds)
+            if best is None or result.fun < best.fun:
+                best = result
+        self.length_scales = np.exp(best.x)
+        self._L, self._alpha = self._factorize(best.x)
+        self.variance = self.y @ self._alpha / len(self.y)
+        return self
+
+    def predict(self, X):
+        """Mean and standard deviation of the model at points `X` (n, dim)."""
+        X = np.atleast_2d(X)
+        k = self._kernel(X, self.X, self.length_scales)
+        mean = k @ self._alpha
+        v = scipy.linalg.solve_triangular(self._L, k.T, lower=True)
+        var = self.variance * np.maximum(1.0 - np.sum(v * v, axis=0), 0.0)
+        return self.mean + self.scale * mean, self.scale * np.sqrt(var)
+
+
+def expected_improvement(mean, std, best, xi=0.0):
+    """Expected improvement below `best` of a Gaussian prediction (`mean`, `std`)."""
+    gain = best - mean - xi
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(std > 0, gain / std, 0.0)
+    ei = gain * ndtr(z) + std * np.exp(-0.5 * z * z) / np.sqrt(2 * np.pi)
+    return np.where(std > 0, ei, np.maximum(gain, 0.0))
+
+
+class SurrogateOptimizer(Driver):
+    """
+    Global optimizer for expensive systems (e.g. `HydroCircuit`, whose
+    evaluations run nested solvers), minimizing a Gaussian process model of
+    the objective fitted on all evaluations made so far.
+
+    Unknowns are first sampled by a Latin hypercube of `init_points` points.
+    Then, at each iteration, the model is refitted and the system is only
+    evaluated at the point maximizing the expected improvement over the best
+    value found. Optimization stops after `max_evals` system evaluations (or
+    as many iterations, as a proposed point may already be in cache), or
+    when the expected improvement falls below `tol`.
+
+    Evaluations are kept in `cache` (dict of unknown values to objective),
+    shared by successive runs of the driver: points already evaluated are not
+    recomputed, and a new run resumes from previous evaluations. Evaluations
+    failing (exception, non-finite objective, or any `NonLinearSolver` of the
+    system tree not converged, nested ones included) are given the worst
+    value observed, so that the model steers away from them.
+
+    At the end, unknowns are set to the best point found, and the system is
+    executed there if it was not the last evaluated point.
+
+    Parameters
+    ----------
+    name : str
+        Driver name
+    owner : System, optional
+        System to which driver belongs
+    max_evals : int
+        Maximum number of system evaluations, including initial sampling
+    init_points : int, optional
+        Number of initial sample points; defaults to `2 * dim + 1`
+    tol : float
+        Expected improvement of the objective under which optimization stops
+    kernel : str
+        Kernel of the Gaussian process, "matern52" (default) or "gaussian"
+    xi : float
+        Exploration margin of the expected improvement, relative to the
+        standard deviation of observed values
+    candidates : int
+        Number of random candidates per dimension screened for the maximum
+        expected improvement, before local refinement
+    seed : int, optional
+        Random seed
+
+    Examples
+    --------
+    >>> optim = s.add_driver(SurrogateOptimizer("optim", max_evals=60))
+    >>> optim.add_unknown("x", lower_bound=-5, upper_bound=5)
+    >>> optim.add_unknown("y", lower_bound=-5, upper_bound=5)
+    >>> optim.set_minimum("f")
+    >>> s.run_drivers()
+    """
+
+    __slots__ = (
+        "max_evals", "init_points", "tol", "kernel", "xi", "candidates", "seed",
+        "unknowns", "cache", "model", "stats", "_objective", "_rng", "_last",
+    )
+
+    def __init__(
+        self,
+        name="optimizer",
+        owner=None,
+        max_evals=50,
+        init_points=None,
+        tol=1e-6,
+        kernel="matern52",
+        xi=0.01,
+        candidates=1000,
+        seed=None,
+        **options,
+    ):
+        super().__init__(name, owner, **options)
+        self.max_evals = max_evals
+        self.init_points = init_points
+        self.tol = tol
+        self.kernel = kernel
+        self.xi = xi
+        self.candidates = candidates
+        self.seed = seed
+        self.unknowns = {}
+        self.cache = {}
+        self.model = None
+        self.stats = {}
+        self._objective = None
+        self._rng = None
+        self._last = None
+
+    def add_unknown(self, name, lower_bound, upper_bound):
+        """Add scalar unknown `name` of owner system, varying within finite bounds."""
+        self.check_owner_attr(name)
+        if not (np.isfinite(lower_bound) and np.isfinite(upper_bound) and lower_bound < upper_bound):
+            raise ValueError(f"Unknown {name!r} needs finite bounds, with lower_bound < upper_bound")
+        self.unknowns[name] = (lower_bound, upper_bound)
+        self.cache.clear()
+
+    def set_minimum(self, expression):
+        """Set objective `expression` to minimize, evaluated in owner system."""
+        self._objective = expression
+        self.cache.clear()
+
+    @property
+    def data(self):
+        """Cached evaluations, as a pandas.DataFrame."""
+        rows = [dict(zip(self.unknowns, x), objective=f) for x, f in self.cache.items()]
+        return pd.DataFrame(rows, columns=[*self.unknowns, "objective"])
+
+    def _scale(self):
+        lower, upper = np.array(list(self.unknowns.values()), dtype=float).T
+        return lower, upper - lower
+
+    def evaluate(self, x):
+        """Objective at point `x` (unknown values), from cache or by running the owner system."""
+        key = tuple(float(value) for value in x)
+        if key in self.cache:
+            self.stats["cached"] += 1
+            return self.cache[key]
+        for name, value in zip(self.unknowns, key):
+            self.owner[name] = value
+        try:
+            self._run_system()
+            value = float(EvalString(self._objective, self.owner).eval()) if self._converged() else np.nan
+        except Exception:
+            value = np.nan
+        self.stats["evaluations"] += 1
+        self.stats["failures"] += int(not np.isfinite(value))
+        self.cache[key] = value
+        self._last = key
+        return value
+
+    def _run_system(self):
+        """Run sub-drivers if any, or the owner system with its children's drivers."""
+        if self.children:
+            for child in self.children.values():
+                child.run_once()
+        else:
+            self.owner.run_children_drivers()
+
+    def _converged(self):
+        """True if all `NonLinearSolver` drivers of the owner tree which ran, nested ones included, converged."""
+        for element in self.owner.tree():
+            for top in element.drivers.values():
+                for driver in top.tree():
+                    if isinstance(driver, NonLinearSolver) and driver.results is not None and not driver.results.success:
+                        return False
+        return True
+
+    def _observations(self):
+        """Cached points in the unit cube, and values (failures set to the worst value)."""
+        lower, width = self._scale()
+        X = (np.array(list(self.cache), dtype=float) - lower) / width
+        y = np.array(list(self.cache.values()), dtype=float)
+        finite = np.isfinite(y)
+        if not finite.any():
+            raise ArithmeticError("All evaluations of the objective failed.")
+        y[~finite] = y[finite].max()
+        return X, y
+
+    def _next_point(self, X, y):
+        """Point of the unit cube maximizing expected improvement, and its value."""
+        dim = X.shape[1]
+        best = y.min()
+        xi = self.xi * y.std()
+
+        def negative_ei(u):
+            mean, std = self.model.predict(u)
+            return -expected_improvement(mean, std, best, xi)
+
+        # screening: random points, and points around the best ones
+        candidates = [self._rng.random((self.candidates * dim, dim))]
+        for x in X[np.argsort(y)[:5]]:
+            candidates.append(np.clip(x + 0.05 * self._rng.standard_normal((self.candidates // 10, dim)), 0, 1))
+        candidates = np.vstack(candidates)
+        ei = -negative_ei(candidates)
+
+        # local refinement of the best candidates
+        best_u, best_ei = None, -np.inf
+        for u0 in candidates[np.argsort(ei)[-3:]]:
+            result = scipy.optimize.minimize(lambda u: negative_ei(u)[0], u0, method="L-BFGS-B", bounds=[(0, 1)] * dim)
+            if -result.fun > best_ei:
+                best_u, best_ei = result.x, -result.fun
+        return best_u, best_ei
+
+    def compute(self):
+        if self._objective is None:
+            raise ArithmeticError("Optimization objective was not specified.")
+        if not self.unknowns:
+            raise ValueError("No unknown was specified for the optimization.")
+        dim = len(self.unknowns)
+        self.stats = dict(evaluations=0, cached=0, failures=0, iterations=0, expected_improvement=np.nan)
+        self._rng = np.random.default_rng(self.seed)
+        self.model = GaussianProcess(self.kernel, seed=self.seed)
+        lower, width = self._scale()
+
+        init_points = self.init_points or 2 * dim + 1
+        if len(self.cache) < init_points:
+            sample = qmc.LatinHypercube(dim, seed=self._rng).random(init_points - len(self.cache))
+            for u in sample:
+                self.evaluate(lower + u * width)
+
+        self.status, self.error_code = "ERROR", "9"  # max evaluations reached
+        while self.stats["evaluations"] < self.max_evals and self.stats["iterations"] < self.max_evals:
+            X, y = self._observations()
+            self.model.fit(X, y)
+            u, ei = self._next_point(X, y)
+            self.stats["iterations"] += 1
+            self.stats["expected_improvement"] = ei
+            if ei < self.tol:
+                self.status, self.error_code = "", "0"
+                break
+            self.evaluate(lower + u * width)
+
+        _, y = self._observations()
+        x_best = list(self.cache)[np.argmin(y)]
+        if x_best != self._last:
+            for name, value in zip(self.unknowns, x_best):
+                self.owner[name] = value
+            self._run_system()